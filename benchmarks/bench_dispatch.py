@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_dispatch.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Compares the per-event cost of the old handleEvent fan-out with the dispatch table used by PengWindow
+# Does not require a display, since no window is created
+
+import timeit
+
+import pyglet
+
+pyglet.options["shadow_window"] = False
+import peng3d
+
+from peng3d.window import PengWindow
+
+ITERATIONS = 100000
+ARGS = (10, 20, 1, -1)
+
+
+class FakeWindow(object):
+    # Only the parts of PengWindow needed for dispatching, since no display is required
+    _eventScopes = PengWindow._eventScopes
+
+    def __init__(self, peng):
+        self.peng = peng
+        self.menus = {}
+        self.activeMenu = None
+        self.eventHandlers = peng3d.events.ListenerRegistry(peng.eventMetrics)
+        self.table = peng3d.events.DispatchTable(self._eventScopes, peng.eventMetrics)
+
+
+class Listener(object):
+    # Bound methods are needed, since only weak references to pyglet listeners are kept
+    def on_mouse_motion(self, x, y, dx, dy):
+        pass
+
+
+def setup(n_menus, n_worlds):
+    peng = peng3d.Peng()
+    window = FakeWindow(peng)
+    listeners = []
+
+    for i in range(n_menus):
+        menu = peng3d.BasicMenu("menu%d" % i, window)
+        window.menus[menu.name] = menu
+        for j in range(n_worlds):
+            world = peng3d.World(peng)
+            menu.addWorld(world)
+            l = Listener()
+            world.registerEventHandler("on_mouse_motion", l.on_mouse_motion)
+            listeners.append(l)
+        l = Listener()
+        menu.registerEventHandler("on_mouse_motion", l.on_mouse_motion)
+        listeners.append(l)
+    window.activeMenu = "menu0"
+    peng3d.events.invalidate_dispatch_tables()
+
+    return peng, window, listeners
+
+
+def bench_fanout(n_menus, n_worlds):
+    peng, window, listeners = setup(n_menus, n_worlds)
+    menu = window.menus[window.activeMenu]
+
+    def f():
+        peng.sendPygletEvent("on_mouse_motion", ARGS, window)
+        window.eventHandlers.dispatch("on_mouse_motion", ARGS)
+        menu.handleEvent("on_mouse_motion", ARGS)
+
+    return timeit.timeit(f, number=ITERATIONS) / ITERATIONS * 1e9
+
+
+def bench_table(n_menus, n_worlds):
+    peng, window, listeners = setup(n_menus, n_worlds)
+    table = window.table
+
+    def f():
+        peng._preparePygletEvent("on_mouse_motion", ARGS, window)
+        table.dispatch("on_mouse_motion", ARGS)
+
+    return timeit.timeit(f, number=ITERATIONS) / ITERATIONS * 1e9
+
+
+def main(args):
+    print("%10s %10s %14s %14s" % ("menus", "worlds", "fanout ns", "table ns"))
+    for n_menus, n_worlds in [(1, 0), (1, 1), (1, 10), (10, 10), (10, 100)]:
+        print(
+            "%10d %10d %14.1f %14.1f"
+            % (
+                n_menus,
+                n_worlds,
+                bench_fanout(n_menus, n_worlds),
+                bench_table(n_menus, n_worlds),
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main(sys.argv))
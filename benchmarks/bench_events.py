@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_events.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+# Measures the per-event cost of Peng.sendPygletEvent() with varying listener counts
+# Does not require a display, since no window is created
+
+import timeit
+
+import pyglet
+
+pyglet.options["shadow_window"] = False
+import peng3d
+
+N = 100
+ITERATIONS = 100000
+ARGS = (10, 20, 1, -1)
+
+
+class Listener(object):
+    # Bound methods are needed, since only weak references to pyglet listeners are kept
+    def on_mouse_motion(self, x, y, dx, dy):
+        pass
+
+    def on_event(self, event, data):
+        pass
+
+
+def bench(lazy, n_pyglet, n_bridged):
+    peng = peng3d.Peng({"events.pyglet.lazy": lazy})
+    listeners = [Listener() for _ in range(max(n_pyglet, n_bridged))]
+    for l in listeners[:n_pyglet]:
+        peng.addPygletListener("on_mouse_motion", l.on_mouse_motion)
+    for l in listeners[:n_bridged]:
+        peng.addEventListener("pyglet:on_mouse_motion", l.on_event)
+
+    t = timeit.timeit(
+        lambda: peng.sendPygletEvent("on_mouse_motion", ARGS), number=ITERATIONS
+    )
+    return t / ITERATIONS * 1e9
+
+
+def main(args):
+    print("%-6s %10s %10s %12s" % ("lazy", "pyglet", "bridged", "ns/event"))
+    for lazy in [False, True]:
+        for n_pyglet, n_bridged in [(0, 0), (1, 0), (N, 0), (0, 1), (0, N)]:
+            print(
+                "%-6s %10d %10d %12.1f"
+                % (lazy, n_pyglet, n_bridged, bench(lazy, n_pyglet, n_bridged))
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main(sys.argv))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_render.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+# Measures frame times of a GUI menu and a world using pyglet's headless mode
+# Does not require a display, rendering is done offscreen via EGL, falling back to software rendering without a GPU
+# Example: python benchmarks/bench_render.py --scene gui --widgets 200 --capture gui.png
+
+import argparse
+import random
+
+import pyglet
+
+pyglet.options["shadow_window"] = False
+pyglet.options["headless"] = True
+import peng3d
+import peng3d.benchmark
+
+
+def setup_gui(peng, window, widgets):
+    menu = peng3d.GUIMenu("gui", window)
+    window.addMenu(menu)
+    sub = peng3d.SubMenu("sub", menu)
+    menu.addSubMenu(sub)
+    menu.changeSubMenu("sub")
+
+    cols = max(int(widgets**0.5), 1)
+    for i in range(widgets):
+        x, y = i % cols, i // cols
+        cls = peng3d.Button if i % 2 == 0 else peng3d.Label
+        cls(
+            "w%d" % i,
+            sub,
+            pos=(x * 64, y * 24),
+            size=(60, 20),
+            label="W%d" % i,
+        )
+    return "gui"
+
+
+def setup_world(peng, window, quads):
+    rnd = random.Random(0)
+    verts, colors = [], []
+    for i in range(quads):
+        x, z = rnd.uniform(-50, 50), rnd.uniform(-50, 50)
+        verts.extend([x, -1, z, x + 1, -1, z, x + 1, -1, z + 1, x, -1, z + 1])
+        colors.extend([rnd.randrange(256) for _ in range(3)] * 4)
+
+    world = peng3d.StaticWorld(peng, verts, colors)
+    world.addCamera(peng3d.Camera(world, "cam", pos=[0, 5, 20], rot=[0, -10]))
+    world.addView(peng3d.WorldView(world, "view", "cam"))
+
+    menu = peng3d.Menu("world", window)
+    menu.addLayer(peng3d.LayerWorld(menu, world=world, viewname="view"))
+    window.addMenu(menu)
+    return "world"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scene", choices=["gui", "world"], default="gui")
+    parser.add_argument(
+        "--widgets", type=int, default=100, help="Widgets in the gui scene"
+    )
+    parser.add_argument(
+        "--quads", type=int, default=10000, help="Quads in the world scene"
+    )
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--size", type=int, nargs=2, default=(800, 600))
+    parser.add_argument("--capture", help="Saves the last frame to the given file")
+    args = parser.parse_args()
+
+    peng = peng3d.Peng()
+    window = peng.createWindow(width=args.size[0], height=args.size[1])
+    window.setup()
+
+    if args.scene == "gui":
+        menu = setup_gui(peng, window, args.widgets)
+    else:
+        menu = setup_world(peng, window, args.quads)
+
+    print("Renderer: %s" % pyglet.gl.gl_info.get_renderer())
+
+    bench = peng3d.benchmark.FrameBenchmark(window, args.frames, args.warmup)
+    capture = [args.frames - 1] if args.capture else []
+    result = bench.run(menu, capture)
+    print("%s: %s" % (args.scene, result.format()))
+
+    if args.capture:
+        result.captures[args.frames - 1].save(args.capture)
+        print("Saved frame to %s" % args.capture)
+
+    window.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,9 @@
 # The order matters, since some modules use other modules
 
 from .peng import *
+from .events import *
+from .tracing import *
+from .replay import *
 
 # from .window import *
 from .layer import *
@@ -167,6 +167,8 @@ class Actor(object):
     def pos(self, value):
         old = self._pos
         self._pos = value
+        if self.world is not None:
+            self.world.redraw()
         self.on_move(old)
 
 
@@ -238,6 +240,8 @@ class RotatableActor(Actor):
         y = max(-90, min(90, y))
         x %= 360
         self._rot = x, y
+        if self.world is not None:
+            self.world.redraw()
         self.on_rotate(old)
 
     @property
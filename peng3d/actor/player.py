@@ -59,7 +59,7 @@ class FourDirectionalMoveController(Controller):
 
     def registerEventHandlers(self):
         """
-        Registers needed keybinds and schedules the :py:meth:`update` Method.
+        Registers needed keybinds and registers the :py:meth:`update` Method with :py:attr:`Peng.ticker <peng3d.peng.Peng.ticker>`\\ .
 
         You can control what keybinds are used via the :confval:`controls.controls.forward` etc. Configuration Values.
         """
@@ -91,7 +91,7 @@ class FourDirectionalMoveController(Controller):
             self.on_right_down,
             False,
         )
-        pyglet.clock.schedule_interval(self.update, 1.0 / 60)
+        self.peng.ticker.add(self.update)
 
     def update(self, dt):
         """
@@ -197,7 +197,7 @@ class BasicFlightController(Controller):
         """
         Registers the up and down handlers.
 
-        Also registers a scheduled function every 60th of a second, causing pyglet to redraw your window with 60fps.
+        Also registers the :py:meth:`update` method with :py:attr:`Peng.ticker <peng3d.peng.Peng.ticker>`\\ .
         """
         # Crouch/fly down
         self.peng.keybinds.add(
@@ -213,7 +213,7 @@ class BasicFlightController(Controller):
             self.on_jump_down,
             False,
         )
-        pyglet.clock.schedule_interval(self.update, 1.0 / 60)
+        self.peng.ticker.add(self.update)
 
     def update(self, dt):
         """
@@ -308,7 +308,7 @@ class FirstPersonPlayer(BasicPlayer):
         # Mouse
         self.world.registerEventHandler("on_mouse_motion", self.on_mouse_motion)
         self.world.registerEventHandler("on_mouse_drag", self.on_mouse_drag)
-        pyglet.clock.schedule_interval(self.update, 1.0 / 60)
+        self.peng.ticker.add(self.update)
 
     def update(self, dt):
         """
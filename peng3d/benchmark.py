@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  benchmark.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+__all__ = [
+    "FrameBenchmark",
+    "BenchmarkResult",
+    "captureFrame",
+    "compareFrames",
+]
+
+import math
+import time
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import pyglet
+
+if TYPE_CHECKING:
+    import peng3d.window
+
+
+def captureFrame(
+    window: "Optional[peng3d.window.PengWindow]" = None,
+) -> pyglet.image.ImageData:
+    """
+    Returns the content of the color buffer of the given or current window.
+
+    Note that this reads the back buffer, so it should be called after drawing a frame but
+    before flipping the buffers. The returned image may be saved via its ``save()`` method.
+    """
+    if window is not None:
+        window.switch_to()
+    return pyglet.image.get_buffer_manager().get_color_buffer().get_image_data()
+
+
+def compareFrames(
+    a: pyglet.image.AbstractImage, b: pyglet.image.AbstractImage, tolerance: int = 0
+) -> int:
+    """
+    Returns the number of pixels that differ between the two images.
+
+    A pixel is considered different if any of its channels differs by more than ``tolerance``\\ .
+
+    Raises a :py:exc:`ValueError` if the images do not have the same size.
+    """
+    if (a.width, a.height) != (b.width, b.height):
+        raise ValueError(
+            "Cannot compare images of size %sx%s and %sx%s"
+            % (a.width, a.height, b.width, b.height)
+        )
+    pitch = a.width * 4
+    da = a.get_image_data().get_data("RGBA", pitch)
+    db = b.get_image_data().get_data("RGBA", pitch)
+    if da == db:
+        return 0
+
+    diff = 0
+    for i in range(0, len(da), 4):
+        for c in range(4):
+            if abs(da[i + c] - db[i + c]) > tolerance:
+                diff += 1
+                break
+    return diff
+
+
+class BenchmarkResult(object):
+    """
+    Frame times measured by :py:class:`FrameBenchmark`\\ .
+
+    ``times`` is a list of frame times in seconds, in the order the frames were drawn.
+    ``captures`` maps frame indices to the images captured after drawing them.
+    """
+
+    def __init__(
+        self,
+        times: List[float],
+        captures: Optional[Dict[int, pyglet.image.ImageData]] = None,
+    ):
+        self.times: List[float] = times
+        self.captures: Dict[int, pyglet.image.ImageData] = (
+            captures if captures is not None else {}
+        )
+        self._sorted: List[float] = sorted(times)
+
+    def percentile(self, p: float) -> float:
+        """
+        Returns the ``p``\\ -th percentile of the frame times, with ``p`` between 0 and 100.
+
+        Values between two frames are interpolated linearly.
+        """
+        if not self._sorted:
+            raise ValueError("No frames have been measured")
+        if not 0 <= p <= 100:
+            raise ValueError("Percentile must be between 0 and 100")
+        k = (len(self._sorted) - 1) * p / 100.0
+        lo, hi = math.floor(k), math.ceil(k)
+        if lo == hi:
+            return self._sorted[int(k)]
+        return self._sorted[lo] * (hi - k) + self._sorted[hi] * (k - lo)
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns a dictionary with the number of ``frames``\\ , ``mean``\\ , ``min``\\ ,
+        ``max``\\ , ``p50``\\ , ``p90`` and ``p99`` frame times in seconds and the average ``fps``\\ .
+        """
+        n = len(self.times)
+        mean = sum(self.times) / n if n else 0.0
+        out = {
+            "frames": n,
+            "mean": mean,
+            "min": self._sorted[0] if n else 0.0,
+            "max": self._sorted[-1] if n else 0.0,
+            "fps": 1 / mean if mean else 0.0,
+        }
+        for p in (50, 90, 99):
+            out["p%d" % p] = self.percentile(p) if n else 0.0
+        return out
+
+    def format(self) -> str:
+        """
+        Returns a human-readable summary of the frame times.
+        """
+        s = self.summary()
+        return (
+            "%d frames, %.1f fps: mean %.3f ms, min %.3f ms, p50 %.3f ms, "
+            "p90 %.3f ms, p99 %.3f ms, max %.3f ms"
+            % (
+                s["frames"],
+                s["fps"],
+                s["mean"] * 1000,
+                s["min"] * 1000,
+                s["p50"] * 1000,
+                s["p90"] * 1000,
+                s["p99"] * 1000,
+                s["max"] * 1000,
+            )
+        )
+
+
+class FrameBenchmark(object):
+    """
+    Draws frames of a window as fast as possible and measures their times.
+
+    Each frame ticks the clock of the event loop, runs all ``on_draw`` handlers and flips
+    the buffers. If ``finish`` is true, ``glFinish()`` is called before the frame time is
+    taken, so that the time includes the actual rendering done by OpenGL.
+
+    The first ``warmup`` frames are drawn, but not measured.
+
+    This is most useful together with pyglet's headless mode, which renders to an offscreen
+    surface using EGL. It may be enabled by setting ``pyglet.options["headless"] = True``
+    before importing peng3d or via the environment variable ``PYGLET_HEADLESS=1``\\ .
+    If no GPU is available, Mesa falls back to software rendering. See
+    ``benchmarks/bench_render.py`` for an example.
+
+    Frame rate limits and damage tracking of the window are disabled while running.
+    """
+
+    def __init__(
+        self,
+        window: "peng3d.window.PengWindow",
+        frames: int = 100,
+        warmup: int = 10,
+        finish: bool = True,
+    ):
+        self.window: "peng3d.window.PengWindow" = window
+        self.frames: int = frames
+        self.warmup: int = warmup
+        self.finish: bool = finish
+
+    def run(
+        self, menu: Optional[str] = None, capture: Iterable[int] = ()
+    ) -> BenchmarkResult:
+        """
+        Runs the benchmark, returning the measured frame times.
+
+        If ``menu`` is given, the window switches to it before the first frame.
+
+        ``capture`` is an iterable of frame indices to capture the framebuffer of via
+        :py:func:`captureFrame()`\\ . Indices do not include warmup frames. Capturing is not
+        included in the frame times.
+        """
+        window = self.window
+        if menu is not None:
+            window.changeMenu(menu)
+
+        capture = set(capture)
+        captures = {}
+        times = []
+
+        clock = pyglet.app.event_loop.clock
+        pacer, damage = window.pacer, window.damageTracking
+        queue = window._enable_event_queue
+        window.pacer, window.damageTracking = None, False
+        # Events are dispatched immediately, just like in the event loop
+        window._enable_event_queue = False
+        try:
+            for i in range(self.warmup + self.frames):
+                t = time.perf_counter()
+                clock.tick()
+                window.switch_to()
+                window.dispatch_event("on_draw")
+                if self.finish:
+                    # Looked up on every call to also work with peng3d.fakegl
+                    pyglet.gl.glFinish()
+                dt = time.perf_counter() - t
+
+                n = i - self.warmup
+                if n >= 0:
+                    times.append(dt)
+                    if n in capture:
+                        captures[n] = captureFrame(window)
+                window.flip()
+        finally:
+            window.pacer, window.damageTracking = pacer, damage
+            window._enable_event_queue = queue
+
+        return BenchmarkResult(times, captures)
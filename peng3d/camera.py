@@ -83,6 +83,8 @@ class Camera(object):
             return  # Position unchanged
         old = self._pos
         self._pos = value
+        if self.world is not None:
+            self.world.redraw()
         self.on_move(old, value)
 
     @property
@@ -100,6 +102,8 @@ class Camera(object):
             return  # Rotation unchanged
         old = self._rot
         self._rot = value
+        if self.world is not None:
+            self.world.redraw()
         self.on_rotate(old, value)
 
 
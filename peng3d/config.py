@@ -129,6 +129,8 @@ DEFAULT_CONFIG = {
     "graphics.fogSettings": Config({}, defaults=CFG_FOG_DEFAULT),
     "graphics.lightSettings": Config({}, defaults=CFG_LIGHT_DEFAULT),
     "graphics.default_fps": None,
+    "graphics.damage.enable": False,
+    "graphics.glstate.cache": True,
     # controls.*
     # Controls
     "controls.mouse.sensitivity": 0.15,
@@ -153,11 +155,25 @@ DEFAULT_CONFIG = {
     "debug.events.logerr": False,
     "debug.events.register": False,
     "debug.events.dumpfile": "",  # "events.txt",
+    "debug.events.stats": False,
+    "debug.events.statsfile": "",
+    "debug.trace.enable": False,
+    "debug.trace.maxsize": 100000,
+    "debug.trace.file": "",
+    "debug.trace.hitch": None,
+    "debug.profiler.enable": False,
+    "debug.profiler.maxframes": 240,
     # rsrc.*
     # Resource config
     "rsrc.enable": True,
     "rsrc.basepath": _get_script_home(),
     "rsrc.maxtexsize": 1024,  # Actual limit may be less, will be adjusted based on GL Capabilities
+    "rsrc.async.workers": 2,
+    "rsrc.async.budget": 0.004,
+    "rsrc.atlascache.path": None,
+    "rsrc.archive": None,
+    "rsrc.roots": None,
+    "rsrc.index": False,
     # i18n.*
     # Translation config
     "i18n.enable": True,
@@ -169,6 +185,17 @@ DEFAULT_CONFIG = {
     # Event config
     "events.removeonerror": True,
     "events.maxignore": 3,
+    "events.pyglet.lazy": True,
+    "events.queue.budget": 0.002,
+    "events.queue.maxsize": None,
+    "events.router.cachesize": 1024,
+    "events.threadsafe.interval": 1 / 60.0,
+    "events.threadsafe.maxper": None,
+    "events.async.poll": 1 / 120.0,
+    # simulation.*
+    # Fixed-timestep simulation config
+    "simulation.tickrate": 60.0,
+    "simulation.maxsteps": 5,
 }
 """
 Default configuration values.
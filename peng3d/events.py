@@ -0,0 +1,1128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  events.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+__all__ = [
+    "EventRouter",
+    "ListenerRegistry",
+    "ListenerToken",
+    "WILDCARD",
+    "CoalescePolicy",
+    "COALESCE_LAST",
+    "COALESCE_FIRST",
+    "COALESCE_ACCUMULATE",
+    "DEFAULT_COALESCE_POLICIES",
+    "RateLimiter",
+    "EventQueue",
+    "PRIORITY_CRITICAL",
+    "PRIORITY_HIGH",
+    "PRIORITY_NORMAL",
+    "PRIORITY_LOW",
+    "EventMetrics",
+    "DispatchTable",
+    "invalidate_dispatch_tables",
+    "EventData",
+    "PygletEventData",
+    "KeybindEventData",
+    "TexLoadEventData",
+]
+
+import bisect
+import collections.abc
+import heapq
+import inspect
+import time
+import weakref
+
+from typing import Callable, Dict, List, Tuple, Iterable, Optional, Any, Union
+
+WILDCARD = "*"
+"""
+Segment used within event patterns to match any segment.
+
+If used as the last segment of a pattern, e.g. ``peng3d:rsrc.*``\\ , one or more
+arbitrary segments will be matched. Anywhere else, e.g. ``peng3d:*.init``\\ , it
+matches exactly one segment.
+"""
+
+# Resolved entries are stored as (pattern, entry) tuples, entry being [func, raiseErrors]
+ResolvedHandlers = Tuple[Tuple[str, list], ...]
+
+
+def split_event_name(name: str) -> List[str]:
+    """
+    Splits an event name or pattern into the segments used for routing.
+
+    The namespace is kept as its own segment, including the trailing colon. For example,
+    ``peng3d:rsrc.tex.load`` is split into ``["peng3d:", "rsrc", "tex", "load"]``\\ .
+
+    A wildcard namespace like in ``*:keybind.combo`` is normalized to :py:data:`WILDCARD`\\ .
+    """
+    if ":" in name:
+        ns, rest = name.split(":", 1)
+        ns = WILDCARD if ns == WILDCARD else ns + ":"
+        return [ns] + rest.split(".")
+    return name.split(".")
+
+
+class _RouteNode(object):
+    __slots__ = ["children", "exact", "prefix"]
+
+    def __init__(self):
+        # Maps segment -> _RouteNode, wildcard children are stored under WILDCARD
+        self.children: Dict[str, "_RouteNode"] = {}
+        # Lists of (seq, pattern, entry)
+        self.exact: list = []
+        self.prefix: list = []
+
+
+class EventRouter(object):
+    """
+    Routing index used by :py:class:`~peng3d.peng.Peng` to look up event handlers.
+
+    Handlers are registered for a pattern, which may be either a concrete event name
+    or contain :py:data:`WILDCARD` segments. See :py:data:`WILDCARD` for the matching rules.
+
+    Internally, all patterns are stored in a trie keyed on the segments described in
+    :py:func:`split_event_name()`\\ . The handlers resolved for a concrete event name are
+    cached until the next time a handler is added or removed, making repeated lookups
+    a single dictionary access.
+
+    At most ``cachesize`` event names are cached, the whole cache is cleared once this
+    limit is reached. This prevents the cache from growing without bounds if many
+    distinct event names are sent. ``None`` disables the limit.
+
+    Resolved handlers are always returned in the order they were registered, regardless
+    of which pattern they were registered for.
+
+    The :py:attr:`handlers` attribute maps each pattern to a list of ``[func, raiseErrors]``
+    entries and should be treated as read-only.
+    """
+
+    def __init__(self, cachesize: Optional[int] = 1024):
+        self.handlers: Dict[str, List[list]] = {}
+        self.cachesize: Optional[int] = cachesize
+
+        self._root: _RouteNode = _RouteNode()
+        self._cache: Dict[str, ResolvedHandlers] = {}
+        self._seq: int = 0
+
+    def add(self, pattern: str, func: Callable, raiseErrors: bool = False) -> None:
+        """
+        Adds a handler for the given pattern.
+        """
+        entry = [func, raiseErrors]
+        self.handlers.setdefault(pattern, []).append(entry)
+
+        node, is_prefix = self._get_node(pattern, True)
+        self._seq += 1
+        (node.prefix if is_prefix else node.exact).append((self._seq, pattern, entry))
+
+        self._cache.clear()
+
+    def remove(self, pattern: str, func: Callable) -> None:
+        """
+        Removes the first handler registration of ``func`` for the given pattern.
+
+        Raises a :py:exc:`NameError` if the pattern is unknown or the handler is not
+        registered for it.
+        """
+        if pattern not in self.handlers:
+            raise NameError("No handlers exist for event %s" % pattern)
+
+        entries = self.handlers[pattern]
+        for i, entry in enumerate(entries):
+            if entry[0] == func:
+                break
+        else:
+            raise NameError("This handler is not registered for event %s" % pattern)
+        del entries[i]
+        if not entries:
+            del self.handlers[pattern]
+
+        node, is_prefix = self._get_node(pattern, False)
+        l = node.prefix if is_prefix else node.exact
+        for i, (_, _, e) in enumerate(l):
+            if e is entry:
+                del l[i]
+                break
+
+        self._cache.clear()
+
+    def resolve(self, event: str) -> ResolvedHandlers:
+        """
+        Returns all handlers matching the given concrete event name.
+
+        The result is a tuple of ``(pattern, entry)`` pairs, where ``entry`` is the
+        ``[func, raiseErrors]`` list stored in :py:attr:`handlers`\\ .
+        """
+        try:
+            return self._cache[event]
+        except KeyError:
+            pass
+
+        out = []
+        self._match(self._root, split_event_name(event), 0, out)
+        out.sort(key=lambda h: h[0])
+        resolved = tuple((pattern, entry) for _, pattern, entry in out)
+
+        if self.cachesize is not None and len(self._cache) >= self.cachesize:
+            # Frequently sent events will quickly be cached again
+            self._cache.clear()
+        self._cache[event] = resolved
+        return resolved
+
+    def _match(self, node: _RouteNode, segments: List[str], i: int, out: list):
+        if i == len(segments):
+            out.extend(node.exact)
+            return
+
+        out.extend(node.prefix)
+
+        child = node.children.get(segments[i], None)
+        if child is not None:
+            self._match(child, segments, i + 1, out)
+        if segments[i] != WILDCARD:
+            child = node.children.get(WILDCARD, None)
+            if child is not None:
+                self._match(child, segments, i + 1, out)
+
+    def _get_node(self, pattern: str, create: bool) -> Tuple[_RouteNode, bool]:
+        segments = split_event_name(pattern)
+        is_prefix = segments[-1] == WILDCARD
+        if is_prefix:
+            segments = segments[:-1]
+
+        node = self._root
+        for segment in segments:
+            if segment not in node.children:
+                if not create:
+                    raise NameError("No handlers exist for event %s" % pattern)
+                node.children[segment] = _RouteNode()
+            node = node.children[segment]
+        return node, is_prefix
+
+    def __contains__(self, event: str) -> bool:
+        return len(self.resolve(event)) > 0
+
+
+COALESCE_LAST = "last"
+"""
+Coalescing mode that only keeps the arguments of the most recent event.
+"""
+COALESCE_FIRST = "first"
+"""
+Coalescing mode that only keeps the arguments of the first event since the last flush.
+"""
+COALESCE_ACCUMULATE = "accumulate"
+"""
+Coalescing mode that keeps the most recent arguments, but sums up the arguments at the
+indices given as ``accumulate``\\ . Useful for events with deltas like ``on_mouse_motion``\\ .
+"""
+
+
+class CoalescePolicy(object):
+    """
+    Declarative description of how multiple occurrences of a rate-limited pyglet event
+    are combined into a single call per frame.
+
+    ``mode`` must be one of :py:data:`COALESCE_LAST`\\ , :py:data:`COALESCE_FIRST` or
+    :py:data:`COALESCE_ACCUMULATE`\\ .
+
+    ``accumulate`` is a sequence of argument indices that will be summed up. It is only
+    used by :py:data:`COALESCE_ACCUMULATE`\\ .
+
+    ``flush_on`` is a sequence of pyglet event types that cause any pending coalesced
+    event to be dispatched immediately before them. This keeps e.g. the last
+    ``on_mouse_drag`` ordered before the ``on_mouse_release`` that ends the drag.
+
+    See :py:meth:`peng3d.peng.Peng.addRateLimitedPygletListener()` for how these policies are used.
+    """
+
+    __slots__ = ["mode", "accumulate", "flush_on"]
+
+    def __init__(
+        self,
+        mode: str = COALESCE_LAST,
+        accumulate: Iterable[int] = (),
+        flush_on: Iterable[str] = (),
+    ):
+        if mode not in [COALESCE_LAST, COALESCE_FIRST, COALESCE_ACCUMULATE]:
+            raise ValueError("Unknown coalescing mode %s" % mode)
+        self.mode: str = mode
+        self.accumulate: Tuple[int, ...] = tuple(accumulate)
+        self.flush_on: Tuple[str, ...] = tuple(flush_on)
+
+    def merge(self, old: Optional[tuple], new: tuple) -> tuple:
+        """
+        Combines the pending arguments ``old`` with the arguments ``new`` of a newer event.
+
+        ``old`` may be ``None`` if there is no pending event.
+        """
+        if old is None or self.mode == COALESCE_LAST:
+            return new
+        elif self.mode == COALESCE_FIRST:
+            return old
+
+        out = list(new)
+        for i in self.accumulate:
+            out[i] = old[i] + new[i]
+        return tuple(out)
+
+    def __eq__(self, other):
+        if not isinstance(other, CoalescePolicy):
+            return NotImplemented
+        return (self.mode, self.accumulate, self.flush_on) == (
+            other.mode,
+            other.accumulate,
+            other.flush_on,
+        )
+
+    def __hash__(self):
+        return hash((self.mode, self.accumulate, self.flush_on))
+
+    def __repr__(self):
+        return "CoalescePolicy(%r, accumulate=%r, flush_on=%r)" % (
+            self.mode,
+            self.accumulate,
+            self.flush_on,
+        )
+
+
+DEFAULT_COALESCE_POLICIES: Dict[str, CoalescePolicy] = {
+    "on_mouse_motion": CoalescePolicy(COALESCE_ACCUMULATE, (2, 3)),
+    "on_mouse_drag": CoalescePolicy(
+        COALESCE_ACCUMULATE, (2, 3), ("on_mouse_press", "on_mouse_release")
+    ),
+    "on_mouse_scroll": CoalescePolicy(COALESCE_ACCUMULATE, (2, 3)),
+    "on_resize": CoalescePolicy(COALESCE_LAST),
+    "on_text_motion": CoalescePolicy(COALESCE_LAST),
+}
+"""
+Policies used by :py:meth:`peng3d.peng.Peng.addRateLimitedPygletListener()` if none is given.
+
+Events not listed here default to :py:data:`COALESCE_LAST`\\ .
+"""
+
+
+# Incremented whenever any dispatch table may have become stale
+_generation: int = 0
+
+
+def invalidate_dispatch_tables() -> None:
+    """
+    Marks all :py:class:`DispatchTable` instances as stale.
+
+    This is called automatically whenever a listener is added to or removed from any
+    :py:class:`ListenerRegistry`\\ . It must be called manually whenever the result of
+    the ``scopes`` function of a dispatch table changes, e.g. when the active menu changes.
+
+    Tables are rebuilt lazily per event type, making this function very cheap.
+    """
+    global _generation
+    _generation += 1
+
+
+def _listener_died(dead: List["ListenerToken"], token: "ListenerToken") -> None:
+    dead.append(token)
+    invalidate_dispatch_tables()
+
+
+def _call_listeners(
+    event_type: str,
+    refs: Tuple[Any, ...],
+    args: Iterable,
+    metrics: Optional["EventMetrics"],
+) -> None:
+    if metrics is not None and metrics.enabled:
+        for ref in refs:
+            handler = ref()
+            if handler is not None:
+                t = time.perf_counter()
+                try:
+                    handler(*args)
+                finally:
+                    metrics.record(event_type, handler, time.perf_counter() - t)
+        return
+
+    for ref in refs:
+        handler = ref()
+        if handler is not None:
+            handler(*args)
+
+
+class ListenerToken(object):
+    """
+    Subscription token returned by :py:meth:`ListenerRegistry.add()`\\ .
+
+    Tokens can be used to remove the listener again in constant time via
+    :py:meth:`remove()` or :py:meth:`ListenerRegistry.remove()`\\ .
+    """
+
+    __slots__ = ["registry", "event_type", "id", "__weakref__"]
+
+    def __init__(self, registry: "ListenerRegistry", event_type: str, id: int):
+        self.registry: "ListenerRegistry" = registry
+        self.event_type: str = event_type
+        self.id: int = id
+
+    def remove(self) -> bool:
+        """
+        Removes the listener this token belongs to.
+
+        See :py:meth:`ListenerRegistry.remove()` for more information.
+        """
+        return self.registry.remove(self)
+
+    def __repr__(self):
+        return "ListenerToken(%r, %d)" % (self.event_type, self.id)
+
+
+class _StrongRef(object):
+    # Mimics the interface of weakref.ref for listeners that should be kept alive
+    __slots__ = ["obj"]
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __call__(self):
+        return self.obj
+
+
+class ListenerRegistry(object):
+    """
+    Registry of pyglet-style event listeners keyed by event type.
+
+    This class is used for all pyglet-style event handlers within peng3d, e.g. those
+    registered via :py:meth:`peng3d.peng.Peng.addPygletListener()` or
+    :py:meth:`peng3d.window.PengWindow.registerEventHandler()`\\ .
+
+    By default, only a weak reference to each listener is kept. Listeners of objects that
+    are garbage collected are removed in bulk before the next dispatch and are never called.
+
+    Adding a listener returns a :py:class:`ListenerToken` that can be used to remove it
+    again in constant time.
+
+    Listeners are always called from a snapshot of the current listeners, meaning that
+    adding or removing listeners while an event is dispatched is safe and only affects
+    subsequent dispatches.
+
+    If ``metrics`` is given and enabled, the wall time of each listener call is recorded
+    to it. See :py:class:`EventMetrics` for details.
+    """
+
+    def __init__(self, metrics: Optional["EventMetrics"] = None):
+        # Metrics that handler latencies are recorded to, if enabled
+        self.metrics: Optional[EventMetrics] = metrics
+
+        # Maps event_type -> {id: ref}, dicts keep insertion order
+        self._listeners: Dict[str, Dict[int, Any]] = {}
+        # Maps event_type -> tuple of refs, rebuilt on demand after changes
+        self._snapshots: Dict[str, Tuple[Any, ...]] = {}
+        # Tokens of dead weak references, appended to by weakref callbacks
+        self._dead: List[ListenerToken] = []
+        self._next_id: int = 0
+
+    def add(
+        self, event_type: str, handler: Callable, weak: bool = True
+    ) -> ListenerToken:
+        """
+        Adds a listener for the given event type.
+
+        If ``weak`` is true, only a weak reference to ``handler`` will be kept. Bound
+        methods are supported via :py:class:`weakref.WeakMethod`\\ .
+        """
+        token = ListenerToken(self, event_type, self._next_id)
+        self._next_id += 1
+
+        if weak:
+            # Dead listeners are only recorded here and removed before the next dispatch
+            dead = self._dead
+            callback = lambda _, t=token: _listener_died(dead, t)
+            if inspect.ismethod(handler):
+                ref = weakref.WeakMethod(handler, callback)
+            else:
+                ref = weakref.ref(handler, callback)
+        else:
+            ref = _StrongRef(handler)
+
+        if event_type not in self._listeners:
+            self._listeners[event_type] = {}
+        self._listeners[event_type][token.id] = ref
+        self._snapshots.pop(event_type, None)
+        invalidate_dispatch_tables()
+
+        return token
+
+    def remove(self, token: ListenerToken) -> bool:
+        """
+        Removes the listener belonging to the given token.
+
+        Returns whether the listener was still registered. Removing a listener twice is
+        thus not an error.
+        """
+        listeners = self._listeners.get(token.event_type, None)
+        if listeners is None or listeners.pop(token.id, None) is None:
+            return False
+
+        if not listeners:
+            del self._listeners[token.event_type]
+        self._snapshots.pop(token.event_type, None)
+        invalidate_dispatch_tables()
+        return True
+
+    def compact(self) -> None:
+        """
+        Removes all listeners whose weak references have died.
+
+        This method is called automatically before each dispatch, if necessary.
+        """
+        dead = self._dead[:]
+        del self._dead[:]
+        for token in dead:
+            self.remove(token)
+
+    def snapshot(self, event_type: str) -> Tuple[Any, ...]:
+        """
+        Returns a tuple of all references registered for the given event type.
+
+        Each reference must be called to get the actual listener, which may return ``None``
+        if the listener has been garbage collected.
+        """
+        if self._dead:
+            self.compact()
+
+        snap = self._snapshots.get(event_type, None)
+        if snap is None:
+            listeners = self._listeners.get(event_type, None)
+            if listeners is None:
+                return ()
+            snap = self._snapshots[event_type] = tuple(listeners.values())
+        return snap
+
+    def dispatch(self, event_type: str, args: Iterable) -> None:
+        """
+        Calls all listeners of the given event type with the given positional arguments.
+        """
+        if self._dead:
+            self.compact()
+
+        snap = self._snapshots.get(event_type, None)
+        if snap is None:
+            if event_type not in self._listeners:
+                return
+            snap = self.snapshot(event_type)
+
+        _call_listeners(event_type, snap, args, self.metrics)
+
+    def __contains__(self, event_type: str) -> bool:
+        return event_type in self._listeners
+
+    def __iter__(self):
+        return iter(list(self._listeners))
+
+    def __len__(self):
+        return sum(map(len, self._listeners.values()))
+
+
+class RateLimiter(object):
+    """
+    Coalesces pyglet events for rate-limited listeners until they are pumped.
+
+    Listeners are added via :py:meth:`add()`\\ . Every event passed to :py:meth:`coalesce()`
+    is merged with any pending event of the same type according to its
+    :py:class:`CoalescePolicy`\\ . :py:meth:`pump()` then calls all listeners at most once
+    per event type.
+
+    Used by :py:meth:`peng3d.peng.Peng.addRateLimitedPygletListener()` and
+    :py:meth:`peng3d.window.PengWindow.registerRateLimitedEventHandler()`\\ .
+    """
+
+    def __init__(self, metrics: Optional["EventMetrics"] = None):
+        self.handlers: ListenerRegistry = ListenerRegistry(metrics)
+        # Maps event_type -> pending arguments
+        self.params: Dict[str, tuple] = {}
+        # Maps event_type -> whether an event is pending
+        self.triggered: Dict[str, bool] = {}
+        self.policies: Dict[str, CoalescePolicy] = {}
+        # Maps event_type -> list of rate limited event types to flush before it
+        self.flushOn: Dict[str, List[str]] = {}
+
+    def add(
+        self,
+        event_type: str,
+        handler: Callable,
+        policy: Optional[Union[str, CoalescePolicy]] = None,
+    ) -> ListenerToken:
+        """
+        Adds a rate-limited listener and returns its :py:class:`ListenerToken`\\ .
+
+        See :py:meth:`peng3d.peng.Peng.addRateLimitedPygletListener()` for how ``policy``
+        is interpreted.
+        """
+        if isinstance(policy, str):
+            policy = CoalescePolicy(policy)
+
+        if event_type in self.policies:
+            if policy is not None and policy != self.policies[event_type]:
+                raise ValueError(
+                    "Conflicting coalescing policy for event %s" % event_type
+                )
+        else:
+            if policy is None:
+                policy = DEFAULT_COALESCE_POLICIES.get(
+                    event_type, CoalescePolicy(COALESCE_LAST)
+                )
+            self.policies[event_type] = policy
+            self.triggered[event_type] = False
+            for flush_event in policy.flush_on:
+                self.flushOn.setdefault(flush_event, []).append(event_type)
+
+        # Only a weak reference is kept
+        return self.handlers.add(event_type, handler)
+
+    def flush(self, event_type: str) -> None:
+        """
+        Dispatches all pending events that have to be handled before an event of the given type.
+        """
+        if event_type in self.flushOn:
+            self.pump(self.flushOn[event_type])
+
+    def coalesce(self, event_type: str, args: tuple) -> None:
+        """
+        Merges the given event into the pending event of the same type.
+
+        Events without rate-limited listeners are ignored.
+        """
+        policy = self.policies.get(event_type, None)
+        if policy is None:
+            return
+        if self.triggered[event_type]:
+            args = policy.merge(self.params[event_type], args)
+        self.params[event_type] = args
+        self.triggered[event_type] = True
+
+    def pump(self, event_types: Optional[Iterable[str]] = None) -> None:
+        """
+        Dispatches all pending events, or only those of the given types.
+        """
+        if event_types is None:
+            event_types = list(self.policies)
+        for event_type in event_types:
+            if self.triggered[event_type]:
+                self.triggered[event_type] = False
+                args = self.params.pop(event_type)
+
+                self.handlers.dispatch(event_type, args)
+
+
+PRIORITY_CRITICAL = 0
+"""
+Priority of events that bypass the event queue and are dispatched immediately.
+"""
+PRIORITY_HIGH = 10
+"""
+Priority of queued events that should be dispatched before most other events.
+"""
+PRIORITY_NORMAL = 50
+"""
+Default priority of queued events.
+"""
+PRIORITY_LOW = 100
+"""
+Priority of queued events that may be deferred to later frames, e.g. for background loading.
+"""
+
+
+class EventQueue(object):
+    """
+    Priority queue of deferred events, drained once per frame under a time budget.
+
+    Events with a lower priority number are dispatched first, events of the same priority
+    are dispatched in the order they were posted.
+
+    ``maxsize`` limits the number of queued events. If the queue is full, newly posted
+    events are dropped. ``None`` disables the limit.
+
+    This class is used by :py:meth:`peng3d.peng.Peng.postEvent()`\\ , see there for details.
+
+    The following counters are kept for diagnostic purposes and may be read at any time:
+
+    :py:attr:`posted` is the number of events accepted into the queue.
+
+    :py:attr:`dispatched` is the number of events dispatched from the queue.
+
+    :py:attr:`dropped` is the number of events that were dropped because the queue was full.
+
+    :py:attr:`deferred` is the number of times an event was left in the queue at the end
+    of a pump because the time budget was exhausted. An event deferred over multiple
+    frames is counted once per frame.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize: Optional[int] = maxsize
+
+        # Heap of (priority, seq, event, data)
+        self._heap: list = []
+        self._seq: int = 0
+
+        self.posted: int = 0
+        self.dispatched: int = 0
+        self.dropped: int = 0
+        self.deferred: int = 0
+
+    def post(
+        self, event: str, data: Any = None, priority: int = PRIORITY_NORMAL
+    ) -> bool:
+        """
+        Adds an event to the queue.
+
+        Returns whether the event was accepted.
+        """
+        if self.maxsize is not None and len(self._heap) >= self.maxsize:
+            self.dropped += 1
+            return False
+
+        self._seq += 1
+        heapq.heappush(self._heap, (priority, self._seq, event, data))
+        self.posted += 1
+        return True
+
+    def pump(self, dispatch: Callable[[str, Any], Any], budget: Optional[float]) -> int:
+        """
+        Dispatches queued events via ``dispatch`` until the queue is empty or ``budget``
+        seconds have passed.
+
+        At least one event is always dispatched, if available, to guarantee progress even
+        with very low budgets. A budget of ``None`` drains the whole queue.
+
+        If ``dispatch`` raises an exception, it is propagated after the counters have been
+        updated. The failed event counts as dispatched, while all remaining events stay
+        queued and count as deferred.
+
+        Returns the number of events dispatched.
+        """
+        heap = self._heap
+        if not heap:
+            return 0
+
+        deadline = None if budget is None else time.perf_counter() + budget
+        n = 0
+        try:
+            while heap:
+                _, _, event, data = heapq.heappop(heap)
+                n += 1
+                try:
+                    dispatch(event, data)
+                finally:
+                    self.dispatched += 1
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+        finally:
+            self.deferred += len(heap)
+        return n
+
+    def clear(self) -> None:
+        """
+        Removes all queued events without dispatching them.
+
+        Removed events are counted as dropped.
+        """
+        self.dropped += len(self._heap)
+        del self._heap[:]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Dictionary containing the counters described above and the current queue length
+        as ``queued``\\ .
+        """
+        return {
+            "queued": len(self._heap),
+            "posted": self.posted,
+            "dispatched": self.dispatched,
+            "dropped": self.dropped,
+            "deferred": self.deferred,
+        }
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def handler_name(handler: Callable) -> str:
+    # Bound methods of different instances of the same class share the same name
+    func = getattr(handler, "__func__", handler)
+    name = getattr(func, "__qualname__", None)
+    if name is None:
+        return repr(handler)
+    module = getattr(func, "__module__", None)
+    return name if module is None else "%s.%s" % (module, name)
+
+
+class EventMetrics(object):
+    """
+    Collects dispatch counts and handler latencies per event type.
+
+    Collection is disabled by default and may be toggled at any time via the
+    :py:attr:`enabled` attribute. While disabled, the only overhead is a single
+    attribute check per dispatch.
+
+    Handlers are identified by their module and qualified name, e.g.
+    ``peng3d.gui.widgets.Widget.on_resize``\\ , meaning that the same method bound to
+    many objects is aggregated into one entry.
+
+    For each handler, the wall time of each call is sorted into a histogram whose upper
+    bucket bounds are given by :py:attr:`BUCKETS`\\ , with an additional bucket for
+    anything slower.
+    """
+
+    BUCKETS: Tuple[float, ...] = (
+        10e-6,
+        50e-6,
+        100e-6,
+        500e-6,
+        1e-3,
+        5e-3,
+        10e-3,
+        50e-3,
+    )
+    """
+    Upper bounds of the histogram buckets in seconds.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled: bool = enabled
+
+        # Maps event_type -> number of dispatches
+        self._events: Dict[str, int] = {}
+        # Maps event_type -> {handler name: [count, total, max, histogram]}
+        self._handlers: Dict[str, Dict[str, list]] = {}
+
+    def count(self, event_type: str) -> None:
+        """
+        Counts a single dispatch of the given event type.
+        """
+        self._events[event_type] = self._events.get(event_type, 0) + 1
+
+    def record(self, event_type: str, handler: Callable, dt: float) -> None:
+        """
+        Records a call of ``handler`` for the given event type that took ``dt`` seconds.
+        """
+        handlers = self._handlers.get(event_type, None)
+        if handlers is None:
+            handlers = self._handlers[event_type] = {}
+
+        name = handler_name(handler)
+        stats = handlers.get(name, None)
+        if stats is None:
+            stats = handlers[name] = [0, 0.0, 0.0, [0] * (len(self.BUCKETS) + 1)]
+
+        stats[0] += 1
+        stats[1] += dt
+        if dt > stats[2]:
+            stats[2] = dt
+        stats[3][bisect.bisect_left(self.BUCKETS, dt)] += 1
+
+    def reset(self) -> None:
+        """
+        Discards all collected data.
+        """
+        self._events.clear()
+        self._handlers.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns a copy of the collected data.
+
+        The returned dictionary has the following structure::
+
+            {
+                "buckets": BUCKETS,
+                "events": {
+                    <event_type>: {
+                        "count": <number of dispatches>,
+                        "time": <total time spent in handlers>,
+                        "handlers": {
+                            <handler name>: {
+                                "count": <number of calls>,
+                                "time": <total time>,
+                                "max": <slowest call>,
+                                "histogram": [<calls per bucket>, ...],
+                            },
+                        },
+                    },
+                },
+            }
+
+        All times are in seconds.
+
+        Note that dispatch counts are only collected for events sent via
+        :py:meth:`peng3d.peng.Peng.sendEvent()` and :py:meth:`peng3d.peng.Peng.sendPygletEvent()`\\ ,
+        while handlers are also recorded for windows, menus and worlds.
+        """
+        out = {}
+        for event_type in set(self._events) | set(self._handlers):
+            handlers = {
+                name: {
+                    "count": count,
+                    "time": total,
+                    "max": tmax,
+                    "histogram": list(hist),
+                }
+                for name, (count, total, tmax, hist) in self._handlers.get(
+                    event_type, {}
+                ).items()
+            }
+            out[event_type] = {
+                "count": self._events.get(event_type, 0),
+                "time": sum(h["time"] for h in handlers.values()),
+                "handlers": handlers,
+            }
+        return {"buckets": self.BUCKETS, "events": out}
+
+    def format(self) -> str:
+        """
+        Returns a human-readable report of the collected data.
+
+        Events and handlers are sorted by the total time spent on them, slowest first.
+        """
+        snap = self.snapshot()
+        lines = [
+            "%-40s %10s %12s %12s"
+            % ("event / handler", "count", "total [ms]", "max [ms]")
+        ]
+        for event_type, ev in sorted(
+            snap["events"].items(), key=lambda i: i[1]["time"], reverse=True
+        ):
+            lines.append(
+                "%-40s %10d %12.3f" % (event_type, ev["count"], ev["time"] * 1000)
+            )
+            for name, h in sorted(
+                ev["handlers"].items(), key=lambda i: i[1]["time"], reverse=True
+            ):
+                lines.append(
+                    "  %-38s %10d %12.3f %12.3f"
+                    % (name, h["count"], h["time"] * 1000, h["max"] * 1000)
+                )
+        return "\n".join(lines) + "\n"
+
+
+class DispatchTable(object):
+    """
+    Dispatches events to the listeners of several :py:class:`ListenerRegistry` instances at once.
+
+    ``scopes`` must be a function returning the registries to dispatch to, in order.
+    For each event type, the listeners of all scopes are compiled into a single flat
+    tuple the first time the event type is dispatched. This tuple is reused until
+    :py:func:`invalidate_dispatch_tables()` is called, which happens automatically
+    whenever listeners are added or removed.
+
+    This is used by :py:class:`~peng3d.window.PengWindow` to dispatch pyglet events to
+    the listeners of the engine, the window, the active menu and its worlds in one pass.
+
+    If ``metrics`` is given and enabled, the wall time of each listener call is recorded
+    to it, see :py:class:`EventMetrics`\\ .
+    """
+
+    def __init__(
+        self,
+        scopes: Callable[[], Iterable[ListenerRegistry]],
+        metrics: Optional[EventMetrics] = None,
+    ):
+        self.scopes = scopes
+        self.metrics: Optional[EventMetrics] = metrics
+
+        # Maps event_type -> (generation, tuple of refs)
+        self._table: Dict[str, Tuple[int, Tuple[Any, ...]]] = {}
+
+    def compile(self, event_type: str) -> Tuple[Any, ...]:
+        """
+        Returns the flat tuple of listener references for the given event type, rebuilding it if necessary.
+        """
+        entry = self._table.get(event_type, None)
+        if entry is not None and entry[0] == _generation:
+            return entry[1]
+
+        refs = []
+        for registry in self.scopes():
+            # May compact the registry, which in turn invalidates all tables
+            refs.extend(registry.snapshot(event_type))
+        refs = tuple(refs)
+
+        self._table[event_type] = _generation, refs
+        return refs
+
+    def dispatch(self, event_type: str, args: Iterable) -> None:
+        """
+        Calls the listeners of all scopes for the given event type with the given positional arguments.
+        """
+        entry = self._table.get(event_type, None)
+        if entry is not None and entry[0] == _generation:
+            refs = entry[1]
+        else:
+            refs = self.compile(event_type)
+
+        if refs:
+            _call_listeners(event_type, refs, args, self.metrics)
+
+    def __len__(self):
+        return len(self._table)
+
+
+class EventData(collections.abc.MutableMapping):
+    """
+    Base class for typed event payloads passed as the ``data`` parameter of events.
+
+    Subclasses declare their fields via ``__slots__``\\ , which avoids allocating a new
+    dictionary for every event sent. For backwards compatibility, instances behave like
+    a :py:class:`dict` mapping field names to their values, e.g. ``data["peng"]`` and
+    ``data.peng`` are equivalent. Instances also compare equal to dictionaries with the
+    same content.
+
+    Keys that are not fields may still be set via item access, they are stored in a
+    separate dictionary that is only created when needed.
+
+    Note that ``isinstance(data, dict)`` is false for instances of this class, use
+    :py:class:`collections.abc.Mapping` instead or convert via :py:meth:`copy()`\\ .
+    """
+
+    __slots__ = ("_extra",)
+
+    # Names of all fields, generated from __slots__ of all subclasses
+    _fields: Tuple[str, ...] = ()
+    _fieldset: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for c in reversed(cls.__mro__):
+            for name in c.__dict__.get("__slots__", ()):
+                if not name.startswith("_") and name not in fields:
+                    fields.append(name)
+        cls._fields = tuple(fields)
+        cls._fieldset = frozenset(fields)
+
+    def __getitem__(self, key):
+        if key in self._fieldset:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        extra = getattr(self, "_extra", None)
+        if extra is None:
+            raise KeyError(key)
+        return extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._fieldset:
+            setattr(self, key, value)
+            return
+        extra = getattr(self, "_extra", None)
+        if extra is None:
+            extra = self._extra = {}
+        extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._fieldset:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            return
+        extra = getattr(self, "_extra", None)
+        if extra is None:
+            raise KeyError(key)
+        del extra[key]
+
+    def __contains__(self, key):
+        if key in self._fieldset:
+            return hasattr(self, key)
+        extra = getattr(self, "_extra", None)
+        return extra is not None and key in extra
+
+    def __iter__(self):
+        for name in self._fields:
+            if hasattr(self, name):
+                yield name
+        extra = getattr(self, "_extra", None)
+        if extra is not None:
+            yield from list(extra)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self) -> Dict[str, Any]:
+        """
+        Returns the content of this payload as a new :py:class:`dict`\\ .
+        """
+        return dict(self.items())
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.copy())
+
+
+class PygletEventData(EventData):
+    """
+    Payload of the :peng3d:event:`peng3d:pyglet` and ``pyglet:<event>`` events sent by
+    :py:meth:`peng3d.peng.Peng.sendPygletEvent()`\\ .
+    """
+
+    __slots__ = ("peng", "args", "window", "src", "event_type")
+
+    def __init__(self, peng, args: List, window, src, event_type: str):
+        self.peng = peng
+        self.args = args
+        self.window = window
+        self.src = src
+        self.event_type = event_type
+
+
+class KeybindEventData(EventData):
+    """
+    Payload of the :peng3d:event:`peng3d:keybind.combo` event and its variants.
+    """
+
+    __slots__ = ("peng", "combo", "symbol", "modifiers", "release", "mod")
+
+    def __init__(
+        self, peng, combo: str, symbol: int, modifiers: int, release: bool, mod: bool
+    ):
+        self.peng = peng
+        self.combo = combo
+        self.symbol = symbol
+        self.modifiers = modifiers
+        self.release = release
+        self.mod = mod
+
+
+class TexLoadEventData(EventData):
+    """
+    Payload of the :peng3d:event:`peng3d:rsrc.tex.load` event.
+    """
+
+    __slots__ = ("peng", "name", "category")
+
+    def __init__(self, peng, name: str, category: str):
+        self.peng = peng
+        self.name = name
+        self.category = category
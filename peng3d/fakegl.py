@@ -0,0 +1,626 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  fakegl.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+__all__ = [
+    "GLRecorder",
+    "HeadlessWindow",
+    "install",
+    "uninstall",
+    "installed",
+    "CAT_DRAW",
+    "CAT_BIND",
+    "CAT_STATE",
+    "CAT_UPLOAD",
+    "CAT_OTHER",
+]
+
+import collections
+import ctypes
+import sys
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pyglet
+from pyglet import gl
+
+from . import window
+
+CAT_DRAW = "draw"
+"""
+Category of calls that draw primitives, e.g. ``glDrawArrays()``\\ .
+"""
+CAT_BIND = "bind"
+"""
+Category of texture binds via ``glBindTexture()``\\ .
+"""
+CAT_STATE = "state"
+"""
+Category of calls changing the rendering state, e.g. ``glEnable()`` or ``glViewport()``\\ .
+"""
+CAT_UPLOAD = "upload"
+"""
+Category of calls uploading buffer or texture data, e.g. ``glBufferData()``\\ .
+"""
+CAT_OTHER = "other"
+"""
+Category of all other calls.
+"""
+
+_DRAW_CALLS = {
+    "glDrawArrays",
+    "glDrawElements",
+    "glDrawRangeElements",
+    "glMultiDrawArrays",
+    "glMultiDrawElements",
+    "glDrawArraysInstanced",
+    "glDrawElementsInstanced",
+    "glBegin",
+    "glCallList",
+    "glCallLists",
+    "glDrawPixels",
+}
+_UPLOAD_CALLS = {
+    "glBufferData",
+    "glBufferSubData",
+    "glTexImage1D",
+    "glTexImage2D",
+    "glTexImage3D",
+    "glTexSubImage1D",
+    "glTexSubImage2D",
+    "glTexSubImage3D",
+    "glCompressedTexImage2D",
+    "glCompressedTexSubImage2D",
+    "glCopyTexImage2D",
+    "glCopyTexSubImage2D",
+}
+_STATE_PREFIXES = (
+    "glEnable",
+    "glDisable",
+    "glBlend",
+    "glPolygonMode",
+    "glViewport",
+    "glScissor",
+    "glMatrixMode",
+    "glLoadIdentity",
+    "glLoadMatrix",
+    "glMultMatrix",
+    "glOrtho",
+    "glFrustum",
+    "gluPerspective",
+    "gluOrtho2D",
+    "glPush",
+    "glPop",
+    "glRotate",
+    "glTranslate",
+    "glScale",
+    "glClearColor",
+    "glShadeModel",
+    "glFog",
+    "glLight",
+    "glTexParameter",
+    "glTexEnv",
+    "glBindBuffer",
+    "glBindFramebuffer",
+    "glUseProgram",
+    "glDepth",
+    "glAlphaFunc",
+    "glLineWidth",
+    "glPointSize",
+    "glPixelStore",
+    "glHint",
+    "glCullFace",
+    "glFrontFace",
+    "glColorMask",
+    "glStencil",
+    "glActiveTexture",
+    "glClientActiveTexture",
+)
+
+# Values returned by glGetIntegerv() and similar, everything else is 0
+_INTEGER_VALUES = {
+    gl.GL_MAX_TEXTURE_SIZE: 4096,
+    gl.GL_MAX_TEXTURE_UNITS: 8,
+    gl.GL_UNPACK_ALIGNMENT: 4,
+    gl.GL_PACK_ALIGNMENT: 4,
+}
+
+
+def _category(name: str) -> str:
+    if name in _DRAW_CALLS:
+        return CAT_DRAW
+    elif name == "glBindTexture":
+        return CAT_BIND
+    elif name in _UPLOAD_CALLS:
+        return CAT_UPLOAD
+    elif name.startswith(_STATE_PREFIXES):
+        return CAT_STATE
+    return CAT_OTHER
+
+
+def _deref(arg: Any) -> Any:
+    # Unwraps arguments passed via ctypes.byref()
+    return getattr(arg, "_obj", arg)
+
+
+def _fill(arg: Any, values: List) -> None:
+    obj = _deref(arg)
+    if isinstance(obj, ctypes.Array):
+        for i in range(min(len(obj), len(values))):
+            obj[i] = values[i]
+    elif hasattr(obj, "value"):
+        obj.value = values[0]
+
+
+class GLRecorder(object):
+    """
+    Recorder for the OpenGL calls made while :py:func:`install()` is active.
+
+    Calls are counted per function and per category, see :py:data:`CAT_DRAW`\\ ,
+    :py:data:`CAT_BIND`\\ , :py:data:`CAT_STATE`\\ , :py:data:`CAT_UPLOAD` and
+    :py:data:`CAT_OTHER`\\ . Counts of the current frame are available via
+    :py:attr:`current` and :py:attr:`calls`\\ , while the counts of the last ``maxframes``
+    frames are kept in :py:attr:`frames`\\ .
+
+    A frame is ended by :py:meth:`endFrame()`\\ , which is called automatically whenever
+    a :py:class:`HeadlessWindow` flips its buffers.
+
+    If ``log`` is true, all calls are additionally stored in :py:attr:`log` as
+    tuples of ``(name, args)``\\ . This is useful for debugging, but slow.
+    """
+
+    def __init__(self, maxframes: int = 100, log: bool = False):
+        self.current: collections.Counter = collections.Counter()
+        """
+        Counter of the calls per category in the current frame.
+        """
+        self.calls: collections.Counter = collections.Counter()
+        """
+        Counter of the calls per function name in the current frame.
+        """
+        self.frames: collections.deque = collections.deque(maxlen=maxframes)
+        """
+        Ring buffer of tuples of ``(categories, calls)`` for the last frames, oldest first.
+        """
+        self.total: collections.Counter = collections.Counter()
+        """
+        Counter of the calls per category since creation or the last :py:meth:`reset()`\\ .
+        """
+
+        self.frameCount: int = 0
+        """
+        Number of frames ended since creation.
+        """
+
+        self.log: Optional[List[Tuple[str, tuple]]] = [] if log else None
+
+        self._next_id: int = 1
+        self._buffers: Dict[int, ctypes.Array] = {}
+        self._viewport: List[int] = [0, 0, 0, 0]
+
+    def record(self, name: str, category: str, args: tuple) -> None:
+        """
+        Records a single call to the GL function ``name``\\ .
+        """
+        self.current[category] += 1
+        self.calls[name] += 1
+        if self.log is not None:
+            self.log.append((name, args))
+
+    def endFrame(self) -> Dict[str, int]:
+        """
+        Ends the current frame, returning its counts per category.
+        """
+        counts = dict(self.current)
+        self.frameCount += 1
+        self.frames.append((counts, dict(self.calls)))
+        self.total.update(self.current)
+        self.current.clear()
+        self.calls.clear()
+        return counts
+
+    def reset(self) -> None:
+        """
+        Clears all counters, frames and the log.
+        """
+        self.current.clear()
+        self.calls.clear()
+        self.frames.clear()
+        self.total.clear()
+        if self.log is not None:
+            self.log.clear()
+
+    @property
+    def last(self) -> Dict[str, int]:
+        """
+        Counts per category of the last completed frame.
+
+        Categories without any calls are included with a count of zero.
+        """
+        counts = dict.fromkeys(
+            [CAT_DRAW, CAT_BIND, CAT_STATE, CAT_UPLOAD, CAT_OTHER], 0
+        )
+        if self.frames:
+            counts.update(self.frames[-1][0])
+        return counts
+
+    def _gen_ids(self, n, arg) -> None:
+        _fill(arg, list(range(self._next_id, self._next_id + n)))
+        self._next_id += n
+
+    def _call(self, name: str, category: str, args: tuple) -> Any:
+        self.record(name, category, args)
+
+        # Functions that return values or write to their arguments
+        if name in ("glGenTextures", "glGenBuffers", "glGenFramebuffers"):
+            self._gen_ids(args[0], args[1])
+        elif name == "glGenLists":
+            i = self._next_id
+            self._next_id += args[0]
+            return i
+        elif name == "glViewport":
+            self._viewport = list(args)
+        elif name in ("glGetIntegerv", "glGetFloatv", "glGetDoublev"):
+            if args[0] == gl.GL_VIEWPORT:
+                _fill(args[1], self._viewport)
+            else:
+                _fill(args[1], [_INTEGER_VALUES.get(args[0], 0)] * 16)
+        elif name == "glBufferData":
+            self._buffers[args[0]] = (ctypes.c_byte * args[1])()
+        elif name == "glMapBuffer":
+            buf = self._buffers.get(args[0], None)
+            return ctypes.addressof(buf) if buf is not None else None
+        elif name == "glCheckFramebufferStatus":
+            return gl.GL_FRAMEBUFFER_COMPLETE
+        return None
+
+
+class _FakeGLInfo(object):
+    # Replaces the attributes of the shared pyglet GLInfo instances
+    attrs = {
+        "have_context": True,
+        "_have_info": True,
+        "version": "2.1.0",
+        "vendor": "peng3d",
+        "renderer": "fakegl",
+        "extensions": set(),
+    }
+
+
+class _FakeScreen(object):
+    def __init__(self, display):
+        self.display = display
+        self.x = 0
+        self.y = 0
+        self.width = 1920
+        self.height = 1080
+
+
+class _FakeDisplay(object):
+    def __init__(self):
+        self._screen = _FakeScreen(self)
+
+    def get_default_screen(self):
+        return self._screen
+
+    def get_screens(self):
+        return [self._screen]
+
+
+class _FakeConfig(gl.Config):
+    def __init__(self, screen, **kwargs):
+        super(_FakeConfig, self).__init__(**kwargs)
+        self.screen = screen
+
+    def is_complete(self):
+        return True
+
+    def create_context(self, share):
+        return _FakeContext(self, share)
+
+
+class _FakeContext(gl.Context):
+    def __init__(self, config, context_share=None):
+        super(_FakeContext, self).__init__(config, context_share)
+        self._info = gl.gl_info._gl_info
+        for attr, check in self._workaround_checks:
+            setattr(self, attr, check(self._info))
+
+    def set_current(self):
+        gl.current_context = self
+
+    def get_info(self):
+        return gl.gl_info._gl_info
+
+    def flip(self):
+        pass
+
+    def destroy(self):
+        if gl.current_context is self:
+            gl.current_context = None
+
+
+class _State(object):
+    recorder: Optional[GLRecorder] = None
+    patched: List[Tuple[dict, str, Any]] = []
+    info: Dict[str, Any] = {}
+    context: Any = None
+
+
+def installed() -> Optional[GLRecorder]:
+    """
+    Returns the recorder of the fake backend if it is installed, else ``None``\\ .
+    """
+    return _State.recorder
+
+
+def install(recorder: Optional[GLRecorder] = None) -> GLRecorder:
+    """
+    Replaces the OpenGL functions used by peng3d and pyglet with recording fakes.
+
+    All modules that have been imported at the time this function is called are patched,
+    including user code that used ``from pyglet.gl import *``\\ . Modules imported
+    afterwards still use the real functions, so this function should be called as early
+    as possible. Note that ``pyglet.options["shadow_window"]`` must be set to ``False``
+    before importing peng3d, since creating the shadow window requires a display.
+
+    If no ``recorder`` is given, a new :py:class:`GLRecorder` is created. The recorder
+    in use is returned.
+
+    Windows must be created using :py:class:`HeadlessWindow` while the fake backend is
+    installed. Use :py:func:`uninstall()` to restore the real functions.
+    """
+    if _State.recorder is not None:
+        raise RuntimeError("Fake GL backend is already installed")
+    if recorder is None:
+        recorder = GLRecorder()
+
+    # Make sure the modules used while drawing are imported, and thus patched
+    import pyglet.graphics
+    import pyglet.image
+    import pyglet.text
+    import pyglet.font
+    import pyglet.sprite
+    from . import gui
+
+    fakes: Dict[int, Tuple[Any, Callable]] = {}
+    for name in dir(gl):
+        if not name.startswith("gl"):
+            continue
+        func = getattr(gl, name)
+        if not isinstance(func, ctypes._CFuncPtr):
+            continue
+        fakes[id(func)] = (func, _make_fake(recorder, name, _category(name)))
+
+    patched = []
+    for mod in list(sys.modules.values()):
+        d = getattr(mod, "__dict__", None)
+        if d is None or mod is sys.modules[__name__]:
+            continue
+        for k, v in list(d.items()):
+            entry = fakes.get(id(v), None)
+            if entry is not None and entry[0] is v:
+                patched.append((d, k, v))
+                d[k] = entry[1]
+
+    info = {}
+    for glinfo in [gl.gl_info._gl_info, gl.glu_info._glu_info]:
+        info[id(glinfo)] = (glinfo, dict(glinfo.__dict__))
+        for k, v in _FakeGLInfo.attrs.items():
+            setattr(glinfo, k, v)
+    # GLU versions are checked separately
+    gl.glu_info._glu_info.version = "1.3"
+
+    _State.recorder = recorder
+    _State.patched = patched
+    _State.info = info
+    _State.context = gl.current_context
+    return recorder
+
+
+def uninstall() -> None:
+    """
+    Restores the real OpenGL functions replaced by :py:func:`install()`\\ .
+
+    Does nothing if the fake backend is not installed.
+    """
+    if _State.recorder is None:
+        return
+    for d, k, v in reversed(_State.patched):
+        d[k] = v
+    for glinfo, attrs in _State.info.values():
+        glinfo.__dict__.clear()
+        glinfo.__dict__.update(attrs)
+    gl.current_context = _State.context
+
+    _State.recorder = None
+    _State.patched = []
+    _State.info = {}
+    _State.context = None
+
+
+def _make_fake(recorder: GLRecorder, name: str, category: str) -> Callable:
+    call = recorder._call
+
+    def fake(*args):
+        return call(name, category, args)
+
+    fake.__name__ = name
+    return fake
+
+
+class _HeadlessBase(pyglet.window.Window):
+    # Replaces the platform-specific parts of pyglet windows
+    # Inserted between PengWindow and the platform window class in the MRO of HeadlessWindow
+
+    # There is no platform event queue, so events are always dispatched immediately
+    _enable_event_queue = False
+
+    def __init__(self, *args, **kwargs):
+        if _State.recorder is None:
+            raise RuntimeError("HeadlessWindow requires the fake GL backend")
+        display = _FakeDisplay()
+        screen = display.get_default_screen()
+        config = _FakeConfig(screen, double_buffer=True, depth_size=24)
+        if "config" in kwargs and kwargs["config"] is not None:
+            # Keep requested attributes like the stencil size
+            for attr in kwargs["config"].get_gl_attributes():
+                setattr(config, attr[0], attr[1])
+        kwargs["display"] = display
+        kwargs["screen"] = screen
+        kwargs["config"] = config
+        # Like pyglet, objects are shared with the current context
+        share = gl.current_context
+        kwargs["context"] = config.create_context(
+            share if isinstance(share, _FakeContext) else None
+        )
+
+        self._x, self._y = 0, 0
+        self._visible = False
+        self._min_size = None
+        self._max_size = None
+
+        # Skips the initialization of the platform window class
+        pyglet.window.BaseWindow.__init__(self, *args, **kwargs)
+
+    def _create(self):
+        # New contexts start with a viewport covering the whole window
+        _State.recorder._viewport = [0, 0, self._width, self._height]
+
+    def _recreate(self, changes):
+        pass
+
+    def close(self):
+        pyglet.window.BaseWindow.close(self)
+
+    def switch_to(self):
+        if self.context:
+            self.context.set_current()
+
+    def flip(self):
+        recorder = _State.recorder
+        if recorder is not None:
+            recorder.endFrame()
+
+    def set_vsync(self, vsync):
+        self._vsync = vsync
+
+    def set_caption(self, caption):
+        self._caption = caption
+
+    def get_caption(self):
+        return self._caption
+
+    def set_size(self, width, height):
+        self._width, self._height = width, height
+        self.dispatch_event("on_resize", width, height)
+
+    def get_size(self):
+        return self._width, self._height
+
+    def get_framebuffer_size(self):
+        return self._width, self._height
+
+    def set_location(self, x, y):
+        self._x, self._y = x, y
+
+    def get_location(self):
+        return self._x, self._y
+
+    def activate(self):
+        pass
+
+    def set_visible(self, visible=True):
+        self._visible = visible
+
+    def set_minimum_size(self, width, height):
+        self._min_size = width, height
+
+    def set_maximum_size(self, width, height):
+        self._max_size = width, height
+
+    def minimize(self):
+        pass
+
+    def maximize(self):
+        pass
+
+    def set_mouse_platform_visible(self, platform_visible=None):
+        pass
+
+    def set_mouse_position(self, x, y):
+        pass
+
+    def set_exclusive_mouse(self, exclusive=True):
+        self._mouse_exclusive = exclusive
+
+    def set_exclusive_keyboard(self, exclusive=True):
+        self._keyboard_exclusive = exclusive
+
+    def get_system_mouse_cursor(self, name):
+        return pyglet.window.DefaultMouseCursor()
+
+    def set_icon(self, *images):
+        pass
+
+    def dispatch_events(self):
+        pass
+
+    def dispatch_pending_events(self):
+        pass
+
+
+class HeadlessWindow(window.PengWindow, _HeadlessBase):
+    """
+    Variant of :py:class:`~peng3d.window.PengWindow` that does not require a display.
+
+    All OpenGL calls are passed to the recorder of the fake backend, which must have been
+    installed via :py:func:`install()` before creating this window. Flipping the buffers
+    ends the current frame of the recorder.
+
+    Use it via :py:meth:`Peng.createWindow() <peng3d.peng.Peng.createWindow()>`::
+
+        recorder = peng3d.fakegl.install()
+        peng = peng3d.Peng()
+        window = peng.createWindow(peng3d.fakegl.HeadlessWindow)
+
+        # Setup menus etc.
+
+        counts = window.drawFrame()
+        assert counts[peng3d.fakegl.CAT_DRAW] <= 10
+    """
+
+    def drawFrame(self) -> Dict[str, int]:
+        """
+        Draws and flips a single frame, returning the counts of the recorder per category.
+
+        If nothing was drawn due to damage tracking, an empty dictionary is returned.
+        """
+        recorder = _State.recorder
+        n = recorder.frameCount
+        self.dispatch_event("on_draw")
+        self.flip()
+        if recorder.frameCount == n:
+            return {}
+        return recorder.last
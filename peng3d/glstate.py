@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  glstate.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+__all__ = [
+    "GLStateCache",
+]
+
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    from pyglet.gl import *
+
+    _have_pyglet = True
+except ImportError:
+    _have_pyglet = False
+
+
+class GLStateCache(object):
+    """
+    Tracker for a small subset of the OpenGL state that skips redundant state changes.
+
+    Each :py:class:`~peng3d.window.PengWindow` has its own instance available via
+    :py:attr:`PengWindow.glstate <peng3d.window.PengWindow.glstate>`\\ , which is used by
+    :py:meth:`~peng3d.window.PengWindow.set2d()`\\ , :py:meth:`~peng3d.window.PengWindow.set3d()`
+    and the scissoring of :py:class:`~peng3d.gui.container.Container`\\ .
+
+    The tracked state consists of enabled capabilities, the polygon mode, viewport, scissor
+    box, matrix mode and the projection and modelview matrices. Matrices are identified by
+    a key describing how they were created, e.g. ``("ortho", width, height)``\\ .
+
+    Since OpenGL state may be changed by any code, the cache is cleared at the start of
+    each frame. Draw code like layers, submenu backgrounds and custom widget ``draw()``
+    methods may freely enable or disable capabilities and change the matrix mode and
+    modelview matrix, e.g. via ``glTranslatef()``\\ . This state is forgotten via
+    :py:meth:`invalidateVolatile()` after each of these callbacks, while the remaining
+    state stays cached between them.
+
+    The viewport, scissor box, polygon mode and projection matrix must only be changed via
+    the methods of this class. Code that changes them directly has to call
+    :py:meth:`invalidate()` afterwards.
+
+    If ``enabled`` is false, all calls are passed through, while still being counted.
+
+    The number of issued and skipped calls is counted per frame, see :py:attr:`stats`\\ .
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled: bool = enabled
+
+        self.calls: int = 0
+        """
+        Number of GL calls issued in the current frame.
+        """
+        self.skipped: int = 0
+        """
+        Number of GL calls skipped in the current frame.
+        """
+        self._last: Tuple[int, int] = (0, 0)
+
+        self._caps: Dict[int, bool] = {}
+        self._polygon_mode: Optional[int] = None
+        self._viewport: Optional[Tuple[int, int, int, int]] = None
+        self._scissor: Optional[Tuple[int, int, int, int]] = None
+        self._matrix_mode: Optional[int] = None
+        self._projection: Optional[Hashable] = None
+        self._modelview: Optional[Hashable] = None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Dictionary with the number of GL ``calls`` issued and ``skipped`` during the last frame.
+        """
+        calls, skipped = self._last
+        return {"calls": calls, "skipped": skipped}
+
+    def newFrame(self) -> None:
+        """
+        Stores the counters of the previous frame and clears the cache.
+
+        Called automatically at the start of each frame.
+        """
+        self._last = (self.calls, self.skipped)
+        self.calls = 0
+        self.skipped = 0
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Forgets all tracked state, causing the next change of each state to be issued.
+        """
+        self._caps.clear()
+        self._polygon_mode = None
+        self._viewport = None
+        self._scissor = None
+        self._matrix_mode = None
+        self._projection = None
+        self._modelview = None
+
+    def invalidateVolatile(self) -> None:
+        """
+        Forgets the state that draw code may change directly, i.e. enabled capabilities,
+        the matrix mode and the modelview matrix.
+
+        Called automatically after each draw callback, see the class documentation.
+        """
+        self._caps.clear()
+        self._matrix_mode = None
+        self._modelview = None
+
+    def enable(self, cap: int) -> None:
+        """
+        Equivalent to ``glEnable(cap)``\\ .
+        """
+        if self.enabled and self._caps.get(cap, False):
+            self.skipped += 1
+            return
+        glEnable(cap)
+        self.calls += 1
+        self._caps[cap] = True
+
+    def disable(self, cap: int) -> None:
+        """
+        Equivalent to ``glDisable(cap)``\\ .
+        """
+        if self.enabled and self._caps.get(cap, True) is False:
+            self.skipped += 1
+            return
+        glDisable(cap)
+        self.calls += 1
+        self._caps[cap] = False
+
+    def polygonMode(self, mode: int) -> None:
+        """
+        Equivalent to ``glPolygonMode(GL_FRONT_AND_BACK, mode)``\\ .
+        """
+        if self.enabled and self._polygon_mode == mode:
+            self.skipped += 1
+            return
+        glPolygonMode(GL_FRONT_AND_BACK, mode)
+        self.calls += 1
+        self._polygon_mode = mode
+
+    def viewport(self, x: int, y: int, width: int, height: int) -> None:
+        """
+        Equivalent to ``glViewport(x, y, width, height)``\\ .
+        """
+        box = (x, y, width, height)
+        if self.enabled and self._viewport == box:
+            self.skipped += 1
+            return
+        glViewport(*box)
+        self.calls += 1
+        self._viewport = box
+
+    def scissor(self, x: int, y: int, width: int, height: int) -> None:
+        """
+        Equivalent to ``glScissor(x, y, width, height)``\\ .
+        """
+        box = (x, y, width, height)
+        if self.enabled and self._scissor == box:
+            self.skipped += 1
+            return
+        glScissor(*box)
+        self.calls += 1
+        self._scissor = box
+
+    def matrixMode(self, mode: int) -> None:
+        """
+        Equivalent to ``glMatrixMode(mode)``\\ .
+        """
+        if self.enabled and self._matrix_mode == mode:
+            self.skipped += 1
+            return
+        glMatrixMode(mode)
+        self.calls += 1
+        self._matrix_mode = mode
+
+    def projection(self, key: Hashable, func: Callable, *args: Any) -> None:
+        """
+        Loads the projection matrix created by calling ``func(*args)`` on the identity matrix.
+
+        ``key`` must uniquely identify the resulting matrix. If it matches the key of the
+        current projection matrix, nothing is done.
+
+        Note that the matrix mode is always ``GL_MODELVIEW`` after calling this method.
+        """
+        if not (self.enabled and self._projection == key):
+            self.matrixMode(GL_PROJECTION)
+            glLoadIdentity()
+            func(*args)
+            self.calls += 2
+            self._projection = key
+        else:
+            # glLoadIdentity() and func()
+            self.skipped += 2
+        self.matrixMode(GL_MODELVIEW)
+
+    def modelview(
+        self, key: Hashable, func: Optional[Callable] = None, *args: Any
+    ) -> None:
+        """
+        Loads the modelview matrix created by calling ``func(*args)`` on the identity matrix.
+
+        ``func`` may be ``None`` to load the identity matrix, in which case ``key`` should
+        be ``("identity",)``\\ . Otherwise, the same rules as for :py:meth:`projection()` apply.
+        """
+        self.matrixMode(GL_MODELVIEW)
+        n = 1 if func is None else 2
+        if self.enabled and self._modelview == key:
+            self.skipped += n
+            return
+        glLoadIdentity()
+        if func is not None:
+            func(*args)
+        self.calls += n
+        self._modelview = key
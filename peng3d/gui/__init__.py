@@ -52,6 +52,7 @@ from .text import *
 from .container import *
 from .layered import *
 from .layout import *
+from .profiler import *
 from .. import util
 from ..util.types import *
 from .style import Style
@@ -121,7 +122,7 @@ class GUIMenu(Menu):
             "enter", f"peng3d:menu.[{self.name}].send_form", self._on_send_form, False
         )
 
-        self.peng.registerEventHandler("on_resize", self.on_resize)
+        self.window.registerEventHandler("on_resize", self.on_resize)
         self.on_resize(*self.size)
 
     def addSubMenu(self, submenu: "SubMenu") -> None:
@@ -153,6 +154,7 @@ class GUIMenu(Menu):
             return  # Ignore double submenu activation to prevent bugs in submenu initializer
         old = self.activeSubMenu
         self.activeSubMenu = submenu
+        self.window.markDirty()
         if old is not None:
             self.submenus[old].on_exit(submenu)
             self.submenus[old].doAction("exit")
@@ -315,7 +317,7 @@ class SubMenu(util.ActionDispatcher):
             "v2f",
             "c4B",
         )
-        self.peng.registerEventHandler("on_resize", self.on_resize)
+        self.window.registerEventHandler("on_resize", self.on_resize)
         self.on_resize(*self.size)
 
         self.batch2d: pyglet.graphics.Batch = pyglet.graphics.Batch()
@@ -334,6 +336,11 @@ class SubMenu(util.ActionDispatcher):
 
         Note that this leaves the OpenGL state set to 2d drawing.
         """
+        tracer = self.peng.tracer
+        t = tracer.now() if tracer.enabled else None
+        profiler = self.peng.profiler
+        pt = profiler.now() if profiler.enabled else None
+
         # Sets the OpenGL state for 2D-Drawing
         self.window.set2d()
 
@@ -360,16 +367,40 @@ class SubMenu(util.ActionDispatcher):
             raise TypeError("Unknown/Unsupported background type")
 
         # In case the background modified relevant state
+        # The background may have bypassed the state cache, so it has to be updated first
+        self.window.glstate.invalidateVolatile()
         self.window.set2d()
+        if pt is not None:
+            pt = profiler.add("submenu.bg", pt)
 
         # Check that all widgets that need redrawing have been redrawn
         for widget in self.widgets.values():
             if widget.do_redraw:
-                widget.on_redraw()
+                if t is None and pt is None:
+                    widget.on_redraw()
+                else:
+                    tw = tracer.now() if t is not None else None
+                    pw = profiler.now() if pt is not None else None
+                    widget.on_redraw()
+                    if tw is not None:
+                        tracer.complete(
+                            "Widget.on_redraw", tw, "redraw", {"widget": widget.name}
+                        )
+                    if pw is not None:
+                        profiler.addWidget(widget.name, pw)
                 widget.do_redraw = False
+        if pt is not None:
+            pt = profiler.add("submenu.redraw", pt)
+
+        # Textures loaded while redrawing need their mipmaps before being drawn
+        rsrcMgr = self.peng.resourceMgr
+        if rsrcMgr is not None and rsrcMgr._dirtyTextures:
+            rsrcMgr.flushMipmaps()
 
         # Actually draw the content
         self.batch2d.draw()
+        if pt is not None:
+            pt = profiler.add("submenu.batch", pt)
 
         # Call custom draw methods where needed
         # for widget in self.widgets.values():
@@ -377,6 +408,13 @@ class SubMenu(util.ActionDispatcher):
         for order in sorted(self.widget_order.keys()):
             for w in self.widget_order[order]:
                 w.draw()
+        # Custom draw methods may change some of the GL state directly
+        self.window.glstate.invalidateVolatile()
+        if pt is not None:
+            profiler.add("submenu.draw", pt)
+
+        if t is not None:
+            tracer.complete("SubMenu.draw", t, "draw", {"submenu": self.name})
 
     def addWidget(self, widget: BasicWidget, order_key: int = 0) -> None:
         """
@@ -115,7 +115,9 @@ class Container(Widget):
             "v2f",
             ("c4B", [0, 0, 0, 0] * 4),
         )
-        self.peng.registerEventHandler("on_resize", self.on_resize)
+        self._event_tokens.append(
+            self.window.registerEventHandler("on_resize", self.on_resize)
+        )
         if not _skip_draw:
             self.on_resize(*self.submenu.size)
 
@@ -195,14 +197,15 @@ class Container(Widget):
             # Simple visibility check, has to be tested to see if it works properly
             return
 
+        gl = self.window.glstate
         if not isinstance(self.submenu, Container):
-            glEnable(GL_SCISSOR_TEST)
-            glScissor(*[int(i) for i in self.pos + self.size])
+            gl.enable(GL_SCISSOR_TEST)
+            gl.scissor(*[int(i) for i in self.pos + self.size])
 
         SubMenu.draw(self)
 
         if not isinstance(self.submenu, Container):
-            glDisable(GL_SCISSOR_TEST)
+            gl.disable(GL_SCISSOR_TEST)
 
     def on_redraw(self):
         """
@@ -300,7 +303,11 @@ class ScrollableContainer(Container):
 
         self.redraw()
 
-        self.peng.registerEventHandler("on_mouse_scroll", self.on_mouse_scroll)
+        self._event_tokens.append(
+            self.window.registerRateLimitedEventHandler(
+                "on_mouse_scroll", self.on_mouse_scroll
+            )
+        )
 
     def on_redraw(self):
         """
@@ -263,13 +263,13 @@ class BasicWidgetLayer(object):
 
                         traceback.print_exc()
 
-        for eframe in self.widget.peng.window._event_stack:
+        for eframe in self.widget.window._event_stack:
             for e_t, e_m in eframe.items():
                 if (
                     inspect.ismethod(e_m)
                     and dict(inspect.getmembers(e_m))["__self__"] == self
                 ):
-                    self.widget.peng.window.remove_handler(e_t, e_m)
+                    self.widget.window.remove_handler(e_t, e_m)
 
 
 class WidgetLayer(BasicWidgetLayer):
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  profiler.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+__all__ = [
+    "ProfilerOverlay",
+]
+
+import time
+
+import pyglet
+from pyglet.gl import *
+
+from typing import Optional, Any, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import SubMenu
+
+from .widgets import Widget, Background
+from ..util.types import *
+
+
+class ProfilerOverlay(Widget):
+    """
+    Widget displaying the data collected by :py:attr:`Peng.profiler <peng3d.peng.Peng.profiler>`\\ .
+
+    The lower half of the widget shows a graph of the frame times of all frames in the
+    ring buffer of the profiler. ``scale`` is the frame time in seconds corresponding to
+    the full height of the graph, while ``target`` optionally draws a horizontal line at
+    the given frame time, e.g. ``1/60`` for 60 FPS.
+
+    The upper half shows the average frame time and the ``top`` widgets that spent the most
+    time redrawing. Since laying out text is comparatively expensive, this text is only
+    updated every ``interval`` seconds.
+
+    ``font``\\ , ``font_size`` and ``font_color`` default to the style of the widget.
+
+    Creating this widget automatically enables the profiler. Note that the time spent
+    drawing this widget is counted within the ``submenu.draw`` phase. Since every drawn
+    frame adds a new sample, the window is marked as dirty whenever this widget is drawn,
+    keeping the graph up to date even with :confval:`graphics.damage.enable`\\ .
+    """
+
+    def __init__(
+        self,
+        name: Optional[str],
+        submenu: "SubMenu",
+        window: Any = None,
+        peng: Any = None,
+        *,
+        pos: DynPosition,
+        size: DynSize = None,
+        bg: Background = None,
+        scale: float = 1 / 30.0,
+        target: Optional[float] = 1 / 60.0,
+        top: int = 5,
+        interval: float = 0.5,
+        font=None,
+        font_size=None,
+        font_color=None,
+    ):
+        super(ProfilerOverlay, self).__init__(
+            name, submenu, window, peng, pos=pos, size=size, bg=bg
+        )
+
+        self.scale: float = scale
+        self.target: Optional[float] = target
+        self.top: int = top
+        self.interval: float = interval
+
+        self.font = font
+        self.font_size = font_size
+        self.font_color = font_color
+
+        self.profiler = self.peng.profiler
+        self.profiler.enabled = True
+
+        n = self.profiler.maxframes
+        self._bg_vlist = pyglet.graphics.vertex_list(
+            4, "v2f", ("c4B", (0, 0, 0, 160) * 4)
+        )
+        self._graph_vlist = pyglet.graphics.vertex_list(
+            n, "v2f", ("c4B", (0, 255, 0, 255) * n)
+        )
+        self._target_vlist = pyglet.graphics.vertex_list(
+            2, "v2f", ("c4B", (255, 0, 0, 255) * 2)
+        )
+        self._label = pyglet.text.Label(
+            "",
+            font_name=self.font,
+            font_size=self.font_size,
+            color=self.font_color,
+            anchor_x="left",
+            anchor_y="top",
+            multiline=True,
+            width=max(int(self.size[0]), 1),
+        )
+        self._last_update: float = 0.0
+
+        self.redraw()
+
+    def on_redraw(self):
+        super(ProfilerOverlay, self).on_redraw()
+
+        x, y = self.pos
+        sx, sy = self.size
+
+        self._bg_vlist.vertices = [x, y, x + sx, y, x + sx, y + sy, x, y + sy]
+
+        if self.target is not None:
+            ty = y + min(self.target / self.scale, 1.0) * sy / 2.0
+            self._target_vlist.vertices = [x, ty, x + sx, ty]
+
+        self._label.font_name = self.font
+        self._label.font_size = self.font_size
+        self._label.color = self.font_color
+        self._label.x = int(x + 2)
+        self._label.y = int(y + sy - 2)
+        self._label.width = max(int(sx) - 4, 1)
+
+    def updateGraph(self) -> None:
+        """
+        Updates the frame time graph from the data of the profiler.
+
+        Called automatically every frame.
+        """
+        times = self.profiler.frameTimes()
+        n = self.profiler.maxframes
+        if not times:
+            return
+
+        x, y = self.pos
+        sx, sy = self.size
+        step = sx / max(n - 1, 1)
+        h = sy / 2.0
+        scale = self.scale
+
+        # Unused vertices are collapsed onto the oldest frame
+        pad = n - len(times)
+        verts = []
+        for i in range(n):
+            t = times[max(i - pad, 0)]
+            verts.append(x + max(i, pad) * step)
+            verts.append(y + min(t / scale, 1.0) * h)
+        self._graph_vlist.vertices = verts
+
+    def updateText(self) -> None:
+        """
+        Updates the statistics text from the data of the profiler.
+
+        Called automatically every ``interval`` seconds.
+        """
+        avg = self.profiler.averages()
+        lines: List[str] = []
+        if "frame" in avg:
+            frame = avg["frame"]
+            lines.append(
+                "frame %.2f ms (%.0f fps)" % (frame * 1000, 1 / frame if frame else 0)
+            )
+        for name, count, total, tmax in self.profiler.slowestWidgets(self.top):
+            lines.append(
+                "%s: %.2f ms in %d redraws, max %.2f ms"
+                % (name, total * 1000, count, tmax * 1000)
+            )
+        self._label.text = "\n".join(lines)
+
+    def draw(self):
+        super(ProfilerOverlay, self).draw()
+
+        now = time.perf_counter()
+        if now - self._last_update >= self.interval:
+            self._last_update = now
+            self.updateText()
+        self.updateGraph()
+
+        self._bg_vlist.draw(GL_QUADS)
+        self._graph_vlist.draw(GL_LINE_STRIP)
+        if self.target is not None:
+            self._target_vlist.draw(GL_LINES)
+        self._label.draw()
+
+        # The frame currently being drawn will add a new sample
+        self.window.markDirty()
+
+    def delete(self):
+        self._bg_vlist.delete()
+        self._graph_vlist.delete()
+        self._target_vlist.delete()
+        self._label.delete()
+        super(ProfilerOverlay, self).delete()
@@ -31,6 +31,7 @@ __all__ = [
 ]
 
 import time
+import weakref
 
 import pyglet
 from pyglet.gl import *
@@ -440,8 +441,10 @@ class TextInput(Widget):
 
         self.peng.i18n.addAction("setlang", self.redraw)  # for dynamic size
 
-        self.peng.registerEventHandler("on_text", self.on_text)
-        self.peng.registerEventHandler("on_text_motion", self.on_text_motion)
+        self._event_tokens += [
+            self.window.registerEventHandler("on_text", self.on_text),
+            self.window.registerEventHandler("on_text_motion", self.on_text_motion),
+        ]
         if self.allow_copypaste:
             self.peng.keybinds.add(
                 self.window.cfg["controls.keybinds.common.copy"],
@@ -460,7 +463,28 @@ class TextInput(Widget):
             )
 
         self.redraw()
-        pyglet.clock.schedule_interval(lambda dt: self.redraw(), 1.0 / 2.0)
+        # Cursor blinking
+        # Only a weak reference is kept, so that the widget can still be garbage collected
+        ticker = self.peng.ticker
+        ref = weakref.ref(self)
+
+        def blink(dt):
+            widget = ref()
+            if widget is None:
+                ticker.remove(blink)
+            else:
+                widget.redraw()
+
+        self._blink = ticker.add(blink, interval=1.0 / 2.0, name="TextInput.blink")
+
+    def delete(self):
+        """
+        Deletes resources of this widget that require manual cleanup.
+
+        In addition to :py:meth:`BasicWidget.delete()`\\ , this stops the cursor from blinking.
+        """
+        self._blink.remove()
+        super(TextInput, self).delete()
 
     def on_redraw(self):
         super(TextInput, self).on_redraw()
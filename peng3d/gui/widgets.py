@@ -32,7 +32,7 @@ __all__ = [
 ]
 
 import warnings
-
+import inspect
 import weakref
 
 from typing import TYPE_CHECKING, List, Optional, Any, Dict
@@ -53,6 +53,7 @@ from ..util import (
     WatchingList as _WatchingList,
     default_property,
 )
+from ..events import ListenerToken
 from . import layout
 from ..util.types import *
 from .style import Style
@@ -280,6 +281,8 @@ class BasicWidget(ActionDispatcher):
         self.stay_pressed: bool = False
         self._visible: bool = True
 
+        # Tokens of all pyglet event handlers, used to unregister them in delete()
+        self._event_tokens: List[ListenerToken] = []
         self.registerEventHandlers()
 
         if order_key is not None:
@@ -290,14 +293,22 @@ class BasicWidget(ActionDispatcher):
         Registers event handlers used by this widget, e.g. mouse click/motion and window resize.
 
         This will allow the widget to redraw itself upon resizing of the window in case the position needs to be adjusted.
+
+        Mouse motion, mouse drag and resize events are rate-limited and thus only handled once per frame.
+
+        All handlers are registered on the window of this widget, so events of other windows are ignored.
         """
-        self.peng.registerEventHandler("on_mouse_press", self.on_mouse_press)
-        self.peng.registerEventHandler("on_mouse_release", self.on_mouse_release)
-        self.peng.registerEventHandler("on_mouse_drag", self.on_mouse_drag)
-        self.peng.registerRateLimitedEventHandler(
-            "on_mouse_motion", self.on_mouse_motion
-        )
-        self.peng.registerRateLimitedEventHandler("on_resize", self.on_resize)
+        self._event_tokens += [
+            self.window.registerEventHandler("on_mouse_press", self.on_mouse_press),
+            self.window.registerEventHandler("on_mouse_release", self.on_mouse_release),
+            self.window.registerRateLimitedEventHandler(
+                "on_mouse_drag", self.on_mouse_drag
+            ),
+            self.window.registerRateLimitedEventHandler(
+                "on_mouse_motion", self.on_mouse_motion
+            ),
+            self.window.registerRateLimitedEventHandler("on_resize", self.on_resize),
+        ]
 
     @property
     def pos(self) -> List[float]:
@@ -460,7 +471,20 @@ class BasicWidget(ActionDispatcher):
         Draws all vertex lists associated with this widget.
         """
         if self.do_redraw:
-            self.on_redraw()
+            tracer = self.peng.tracer
+            profiler = self.peng.profiler
+            if not (tracer.enabled or profiler.enabled):
+                self.on_redraw()
+            else:
+                t = tracer.now() if tracer.enabled else None
+                pt = profiler.now() if profiler.enabled else None
+                self.on_redraw()
+                if t is not None:
+                    tracer.complete(
+                        "Widget.on_redraw", t, "redraw", {"widget": self.name}
+                    )
+                if pt is not None:
+                    profiler.addWidget(self.name, pt)
             self.do_redraw = False
 
     def redraw(self) -> None:
@@ -478,6 +502,7 @@ class BasicWidget(ActionDispatcher):
         #    _num_saved_redraws+=1
         #    print("saved redraw #%s"%_num_saved_redraws)
         self.do_redraw = True
+        self.window.markDirty()
 
     def on_redraw(self) -> None:
         """
@@ -566,33 +591,17 @@ class BasicWidget(ActionDispatcher):
 
         self.actions = {}
 
-        for e_type, e_handlers in self.peng.eventHandlers.items():
-            if True or e_type in eh:
-                to_del = []
-                for e_handler in e_handlers:
-                    # Weird workaround due to implementation details of WeakMethod
-                    if isinstance(e_handler, weakref.ref):
-                        if super(weakref.WeakMethod, e_handler).__call__() is self:
-                            to_del.append(e_handler)
-                    elif e_handler is self:
-                        to_del.append(e_handler)
-                for d in to_del:
-                    try:
-                        # print("Deleting handler %s of type %s"%(d,e_type))
-                        del e_handlers[e_handlers.index(d)]
-                    except Exception:
-                        # print("Could not delete handler %s, memory leak may occur"%d)
-                        import traceback
-
-                        traceback.print_exc()
-
-        for eframe in self.peng.window._event_stack:
+        for token in self._event_tokens:
+            token.remove()
+        self._event_tokens = []
+
+        for eframe in self.window._event_stack:
             for e_t, e_m in eframe.items():
                 if (
                     inspect.ismethod(e_m)
                     and dict(inspect.getmembers(e_m))["__self__"] == self
                 ):
-                    self.peng.window.remove_handler(e_t, e_m)
+                    self.window.remove_handler(e_t, e_m)
 
     # def __del__(self):
     #    print("del %s"%self.name)
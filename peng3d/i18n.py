@@ -26,7 +26,6 @@ __all__ = [
     "TranslationManager",
 ]
 
-import glob
 import re
 
 from .util import ActionDispatcher
@@ -121,22 +120,22 @@ class TranslationManager(ActionDispatcher):
         The optional ``domain`` argument may specify a domain to use when checking
         for files. By default, all domains are checked.
 
-        This internally uses the :py:mod:`glob` built-in module and the
-        :confval:`i18n.lang.format` config option to find suitable filenames.
-        It then applies the regex in :confval:`i18n.discover_regex` to extract the
-        language code.
+        This internally uses :py:meth:`Storage.glob() <peng3d.storage.Storage.glob()>` and the
+        :confval:`i18n.lang.format` config option to find suitable files.
+        It then applies the regex in :confval:`i18n.discover_regex` to the storage key of
+        each file to extract the language code.
         """
         rsrc = self.peng.cfg["i18n.lang.format"].format(domain=domain, lang="*")
-        pattern = self.peng.rsrcMgr.resourceNameToPath(
-            rsrc, self.peng.cfg["i18n.lang.ext"]
+        rsrcMgr = self.peng.rsrcMgr
+        files = rsrcMgr.storage.glob(
+            rsrcMgr.resourceNameToKey(rsrc, self.peng.cfg["i18n.lang.ext"])
         )
-        files = glob.iglob(pattern)
 
         langs = set()
         r = re.compile(self.peng.cfg["i18n.discover_regex"])
 
         for f in files:
-            m = r.fullmatch(f.replace("\\", "/"))
+            m = r.fullmatch(f)
             if m is not None:
                 langs.add(m.group("lang"))
 
@@ -235,12 +234,15 @@ class TranslationManager(ActionDispatcher):
         rsrc = self.peng.cfg["i18n.lang.format"].format(domain=domain, lang=lang)
         if not self.peng.rsrcMgr.resourceExists(rsrc, self.peng.cfg["i18n.lang.ext"]):
             return False  # prevents errors
-        fname = self.peng.rsrcMgr.resourceNameToPath(
-            rsrc, self.peng.cfg["i18n.lang.ext"]
-        )
         try:
-            with open(fname, "r", encoding=encoding, errors="surrogateescape") as f:
-                data = f.readlines()
+            with self.peng.rsrcMgr.openResource(
+                rsrc, self.peng.cfg["i18n.lang.ext"]
+            ) as f:
+                data = (
+                    f.read()
+                    .decode(encoding, errors="surrogateescape")
+                    .splitlines(keepends=True)
+                )
         except Exception:
             return False  # prevents errors
 
@@ -29,6 +29,8 @@ import bidict
 
 from typing import TYPE_CHECKING, Dict, Callable, List, Any
 
+from .events import KeybindEventData
+
 if TYPE_CHECKING:
     import peng3d
 
@@ -243,41 +245,15 @@ class KeybindHandler(object):
         self.peng.sendPygletEvent(
             "on_key_combo", (combo, symbol, modifiers, release, mod)
         )
+        # Each event gets its own payload, as listeners may modify it
         self.peng.sendEvent(
             "peng3d:keybind.combo",
-            {
-                "peng": self.peng,
-                "combo": combo,
-                "symbol": symbol,
-                "modifiers": modifiers,
-                "release": release,
-                "mod": mod,
-            },
+            KeybindEventData(self.peng, combo, symbol, modifiers, release, mod),
+        )
+        self.peng.sendEvent(
+            "peng3d:keybind.combo.release" if release else "peng3d:keybind.combo.press",
+            KeybindEventData(self.peng, combo, symbol, modifiers, release, mod),
         )
-        if release:
-            self.peng.sendEvent(
-                "peng3d:keybind.combo.release",
-                {
-                    "peng": self.peng,
-                    "combo": combo,
-                    "symbol": symbol,
-                    "modifiers": modifiers,
-                    "release": release,
-                    "mod": mod,
-                },
-            )
-        else:
-            self.peng.sendEvent(
-                "peng3d:keybind.combo.press",
-                {
-                    "peng": self.peng,
-                    "combo": combo,
-                    "symbol": symbol,
-                    "modifiers": modifiers,
-                    "release": release,
-                    "mod": mod,
-                },
-            )
 
     def on_key_release(self, symbol, modifiers):
         # self.on_key_press(symbol,modifiers|MOD_RELEASE)
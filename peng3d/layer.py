@@ -128,6 +128,7 @@ class Layer(object):
         :return:
         """
         self.should_redraw = True
+        self.window.markDirty()
 
     # Event handlers
 
@@ -151,17 +152,36 @@ class Layer(object):
         if not self.enabled:
             return
 
+        tracer = self.peng.tracer
+        t = tracer.now() if tracer.enabled else None
+        profiler = self.peng.profiler
+        pt = profiler.now() if profiler.enabled else None
+
         if self.should_redraw:
             self.on_redraw()
             self.should_redraw = False
+            if pt is not None:
+                pt = profiler.add("layer.redraw", pt)
 
         self.predraw()
+        if pt is not None:
+            pt = profiler.add("layer.predraw", pt)
         try:
             self.draw()
         except Exception:
             raise
         finally:
+            if pt is not None:
+                pt = profiler.add("layer.draw", pt)
             self.postdraw()
+            # Layers may change some of the GL state directly, bypassing the state cache
+            self.window.glstate.invalidateVolatile()
+            if pt is not None:
+                profiler.add("layer.postdraw", pt)
+            if t is not None:
+                tracer.complete(
+                    "Layer._draw", t, "draw", {"layer": self.__class__.__name__}
+                )
 
 
 class Layer2D(Layer):
@@ -274,6 +294,7 @@ class LayerWorld(Layer3D):
         self.world = world
         self.viewname = viewname
         self.view = self.world.getView(self.viewname)
+        self.view.window = self.window
 
     def setView(self, name: str) -> None:
         """
@@ -285,6 +306,7 @@ class LayerWorld(Layer3D):
             raise ValueError("Invalid viewname for world!")
         self.viewname = name
         self.view = self.world.getView(self.viewname)
+        self.view.window = self.window
 
     def predraw(self):
         """
@@ -36,6 +36,7 @@ if TYPE_CHECKING:
 
 
 from .layer import Layer
+from .events import ListenerRegistry, ListenerToken, invalidate_dispatch_tables
 from .util import ActionDispatcher
 from .util.types import *
 
@@ -70,7 +71,7 @@ class BasicMenu(ActionDispatcher):
         self.window: "peng3d.window.PengWindow" = window
         self.peng: "peng3d.peng.Peng" = window.peng
 
-        self.eventHandlers = {}
+        self.eventHandlers: ListenerRegistry = ListenerRegistry(self.peng.eventMetrics)
 
         self.worlds = []
 
@@ -89,34 +90,32 @@ class BasicMenu(ActionDispatcher):
         Worlds that are registered via this method will get all events that are given to this menu passed through.
 
         This mechanic is mainly used to implement actor controllers.
+
+        Note that the ``worlds`` list should not be modified directly, since the event dispatch
+        tables of the window would not be updated.
         """
         self.worlds.append(world)
+        invalidate_dispatch_tables()
 
     # Event handlers
     def handleEvent(self, event_type: str, args: Any) -> None:
-        if event_type in self.eventHandlers:
-            for whandler in self.eventHandlers[event_type]:
-                # This allows for proper collection of deleted handler methods by using weak references
-                handler = whandler()
-                if handler is None:
-                    del self.eventHandlers[event_type][
-                        self.eventHandlers[event_type].index(whandler)
-                    ]
-                handler(*args)
+        self.eventHandlers.dispatch(event_type, args)
         for world in self.worlds:
             world.handle_event(event_type, args, self.window)
 
     handleEvent.__noautodoc__ = True
 
-    def registerEventHandler(self, event_type: str, handler: Callable):
-        if event_type not in self.eventHandlers:
-            self.eventHandlers[event_type] = []
+    def registerEventHandler(self, event_type: str, handler: Callable) -> ListenerToken:
         # Only a weak reference is kept
-        if inspect.ismethod(handler):
-            handler = weakref.WeakMethod(handler)
-        else:
-            handler = weakref.ref(handler)
-        self.eventHandlers[event_type].append(handler)
+        return self.eventHandlers.add(event_type, handler)
+
+    def delEventHandler(self, token: ListenerToken) -> bool:
+        """
+        Removes the event handler belonging to the token returned by :py:meth:`registerEventHandler()`\\ .
+
+        Returns whether the handler was still registered.
+        """
+        return self.eventHandlers.remove(token)
 
     def on_enter(self, old):
         """
@@ -1105,7 +1105,7 @@ class Model(object):
         if "_anidata" in data:
             adata = data["_anidata"]
             if "_schedfunc" in adata:
-                pyglet.clock.unschedule(adata["_schedfunc"])
+                self.peng.ticker.remove(adata["_schedfunc"])
 
         if data.get("_manual_render", False):
             del obj.batch3d
@@ -1198,18 +1198,29 @@ class Model(object):
         if "_schedfunc" in adata:
             # unschedule the old animation, if any
             # prevents clashing and crashes
-            pyglet.clock.unschedule(adata["_schedfunc"])
+            self.peng.ticker.remove(adata["_schedfunc"])
 
         # Schedule the animation function
         def schedfunc(*args):
             # This function is defined locally to create a closure
             # The closure stores the local variables, e.g. anim and data even after the parent function has finished
             # Note that this may also prevent the garbage collection of any objects defined in the parent scope
-            anim.tickEntity(data)
-
-        # register the function to pyglet
-        pyglet.clock.schedule_interval(
-            schedfunc, 1.0 / (anim.kps if anim.atype == "keyframes" else 60)
+            peng = anim.rsrcMgr.peng
+            peng.markDirty()
+            tracer = peng.tracer
+            if tracer.enabled:
+                t = tracer.now()
+                anim.tickEntity(data)
+                tracer.complete(
+                    "Animation.tickEntity", t, "animation", {"animation": anim.name}
+                )
+            else:
+                anim.tickEntity(data)
+
+        # register the function with the simulation scheduler
+        # the returned handle is saved for later for de-initialization
+        adata["_schedfunc"] = self.peng.ticker.add(
+            schedfunc,
+            interval=1.0 / anim.kps if anim.atype == "keyframes" else None,
+            name="Animation.tickEntity",
         )
-        # save it for later for de-initialization
-        adata["_schedfunc"] = schedfunc
@@ -25,22 +25,42 @@
 __all__ = ["Peng", "HeadlessPeng"]
 
 import sys
+import time
+import asyncio
+import collections
 
 import weakref
 import inspect
 
 # from . import window, config, keybind, pyglet_patch
-from typing import Optional, TYPE_CHECKING, Type, List, Callable, Union, Tuple, Dict
-
-from . import config, world, resource, i18n
+from typing import (
+    Optional,
+    TYPE_CHECKING,
+    Type,
+    List,
+    Callable,
+    Union,
+    Tuple,
+    Dict,
+    Deque,
+    Any,
+)
+
+from . import config, world, resource, i18n, events, tracing, tick
 from .gui.style import Style, DEFAULT_STYLE
 from .util.types import *
 
-if TYPE_CHECKING:
+if world._have_pyglet:
     import pyglet
+
+if TYPE_CHECKING:
     from . import keybind, window
 
 
+# These events are never printed, even if debug.events.dump is enabled
+_NO_DUMP_EVENTS = frozenset(["on_draw", "on_mouse_motion"])
+
+
 class Peng(object):
     """
     This Class should only be instantiated once per application, if you want to use multiple windows, see :py:meth:`createWindow()`\\ .
@@ -61,25 +81,61 @@ class Peng(object):
                 keybind,
             )  # Local import for compat with headless machines
         self.window: Optional["window.PengWindow"] = None
+        self.windows: List["window.PengWindow"] = []
 
-        self.pygletEventHandlers = {}
-        self.rlPygletEventHandlers = {}
-        self.rlPygletEventHandlersParams = {
-            "on_mouse_motion": (0, 0, 0, 0),
-            "on_resize": (0, 0),
-        }
-        self.rlPygletEventHandlersTriggered = {
-            "on_mouse_motion": False,
-            "on_resize": False,
-        }
+        # Config is not yet available, the real value is set below
+        self.eventMetrics: events.EventMetrics = events.EventMetrics()
 
-        self.eventHandlers = {}
+        self.pygletEventHandlers: events.ListenerRegistry = events.ListenerRegistry(
+            self.eventMetrics
+        )
+        self.rateLimiter: events.RateLimiter = events.RateLimiter(self.eventMetrics)
+        # Aliases kept for compatibility
+        self.rlPygletEventHandlers: events.ListenerRegistry = self.rateLimiter.handlers
+        self.rlPygletEventHandlersParams = self.rateLimiter.params
+        self.rlPygletEventHandlersTriggered = self.rateLimiter.triggered
+        self.rlPygletEventPolicies: Dict[
+            str, events.CoalescePolicy
+        ] = self.rateLimiter.policies
+
+        self.eventRouter: events.EventRouter = events.EventRouter()
+        # Maps event pattern -> list of [func, raiseErrors], kept for compatibility
+        self.eventHandlers = self.eventRouter.handlers
 
         self.events_ignored = {}
         self.event_list = set()
 
         cfg = cfg if cfg is not None else {}
         self.cfg = config.Config(cfg, defaults=config.DEFAULT_CONFIG)
+
+        self.eventMetrics.enabled = self.cfg["debug.events.stats"]
+        self.eventRouter.cachesize = self.cfg["events.router.cachesize"]
+
+        self.tracer: tracing.Tracer = tracing.Tracer(
+            self.cfg["debug.trace.enable"], self.cfg["debug.trace.maxsize"]
+        )
+        self.profiler: tracing.FrameProfiler = tracing.FrameProfiler(
+            self.cfg["debug.profiler.enable"], self.cfg["debug.profiler.maxframes"]
+        )
+
+        self.ticker: tick.TickScheduler = tick.TickScheduler(
+            self, self.cfg["simulation.tickrate"], self.cfg["simulation.maxsteps"]
+        )
+
+        self.eventQueue: events.EventQueue = events.EventQueue(
+            self.cfg["events.queue.maxsize"]
+        )
+
+        # Futures returned by next_frame(), resolved after each frame
+        self._frameWaiters: List[asyncio.Future] = []
+
+        # Tasks submitted from other threads, deque.append() and popleft() are atomic
+        self._threadsafeQueue: Deque[Tuple[Callable, tuple]] = collections.deque()
+
+        self.lazyPygletEvents: bool = self.cfg["events.pyglet.lazy"]
+        # Cache of event_type -> "pyglet:<event_type>" to avoid formatting each time
+        self._pygletEventNames: Dict[str, str] = {}
+
         if world._have_pyglet:
             self.keybinds: Optional["keybind.KeybindHandler"] = keybind.KeybindHandler(
                 self
@@ -98,8 +154,6 @@ class Peng(object):
         self.tl = lambda *args, **kwargs: self._tl(*args, **kwargs)
 
         self.addEventListener("peng3d:peng.exit", self.handler_exit)
-        self.registerEventHandler("on_mouse_motion", self.on_mouse_motion)
-        self.registerEventHandler("on_resize", self.on_resize)
 
     def createWindow(
         self,
@@ -118,29 +172,35 @@ class Peng(object):
 
         Any other positional or keyword arguments are passed to the class constructor.
 
-        Note that this method currently does not support using multiple windows.
+        This method may be called multiple times to create multiple windows. All windows
+        are available via :py:attr:`windows`\\ , while :py:attr:`window` always refers to
+        the first window that is still open, or ``None`` once all windows have been closed.
+        Each window has its own menus, but all windows share the OpenGL objects of the
+        first window, meaning that textures loaded by the
+        :py:class:`~peng3d.resource.ResourceManager` and vertex lists may be used in all of them.
+        The resource manager and translation system are only initialized once.
 
-        .. todo::
-
-           Implement having multiple windows.
+        All windows are run by the same event loop via :py:meth:`run()`\\ .
         """
         if cls is None:
             from . import window
 
             cls = window.PengWindow
 
-        if self.window is not None:
-            raise RuntimeError("Window already created!")
-
         self.sendEvent("peng3d:window.create.pre", {"peng": self, "cls": cls})
 
+        if self.window is not None:
+            # pyglet shares the objects of new contexts with the current context
+            self.window.switch_to()
+
         if caption_t is not None:
             kwargs["caption"] = "Peng3d Application"
-        self.window = cls(self, *args, **kwargs)
+        win = cls(self, *args, **kwargs)
+        self.windows.append(win)
+        if self.window is None:
+            self.window = win
 
-        self.sendEvent(
-            "peng3d:window.create.post", {"peng": self, "window": self.window}
-        )
+        self.sendEvent("peng3d:window.create.post", {"peng": self, "window": win})
 
         # Initialize resource manager
         if self.cfg["rsrc.enable"] and self.resourceMgr is None:
@@ -164,19 +224,45 @@ class Peng(object):
             self._t = self.i18n.t
             self._tl = self.i18n.tl
             self.sendEvent("peng3d:i18n.init.post", {"peng": self, "i18n": self.i18n})
-            if caption_t is not None:
-                self.window.set_caption(self.t(caption_t))
+        if caption_t is not None:
+            if self.i18n is None:
+                raise RuntimeError(
+                    "Could not set translated window title since either the resource system or i18n has been disabled"
+                )
+            win.set_caption(self.t(caption_t))
+
+            def f():
+                win.set_caption(self.t(caption_t))
+
+            self.i18n.addAction("setlang", f)
+        return win
+
+    def _removeWindow(self, win: "window.PengWindow") -> None:
+        # Called by PengWindow.close()
+        if win in self.windows:
+            self.windows.remove(win)
+        if self.window is win:
+            self.window = self.windows[0] if self.windows else None
+
+    def markDirty(self) -> None:
+        """
+        Marks all windows as dirty, see :py:meth:`PengWindow.markDirty() <peng3d.window.PengWindow.markDirty()>`\\ .
+        """
+        for win in self.windows:
+            win.markDirty()
 
-                def f():
-                    self.window.set_caption(self.t(caption_t))
+    def _prepareRun(self, evloop: Optional["pyglet.app.EventLoop"]) -> None:
+        if evloop is None:
+            from . import window
 
-                self.i18n.addAction("setlang", f)
-                return self.window
-        if caption_t is not None:
-            raise RuntimeError(
-                "Could not set translated window title since either the resource system or i18n has been disabled"
-            )
-        return self.window
+            evloop = window.PengEventLoop()
+        pyglet.app.event_loop = evloop
+
+        # The main window is set up by PengWindow.run()
+        for win in self.windows:
+            if win is not self.window:
+                win.setup()
+                win.set_fps(self.cfg["graphics.default_fps"])
 
     def run(self, evloop: Optional["pyglet.app.EventLoop"] = None):
         """
@@ -185,14 +271,151 @@ class Peng(object):
         This method is blocking and needs to be called from the main thread to avoid OpenGL bugs that can occur.
 
         ``evloop`` may optionally be a subclass of :py:class:`pyglet.app.base.EventLoop` to replace the default event loop.
+        By default, a :py:class:`~peng3d.window.PengEventLoop` is used, which runs all
+        windows and only redraws those that need it.
+        """
+        self.sendEvent(
+            "peng3d:peng.run", {"peng": self, "window": self.window, "evloop": evloop}
+        )
+        self._prepareRun(evloop)
+        pyglet.clock.schedule_interval(
+            self._pumpThreadsafeTick, self.cfg["events.threadsafe.interval"]
+        )
+        try:
+            self.window.run()
+        finally:
+            pyglet.clock.unschedule(self._pumpThreadsafeTick)
+        self.sendEvent("peng3d:peng.exit", {"peng": self})
+
+    async def run_async(self, evloop: Optional["pyglet.app.EventLoop"] = None):
+        """
+        Coroutine variant of :py:meth:`run()` that runs the application main loop within
+        the currently running :py:mod:`asyncio` event loop.
+
+        Both the pyglet clock and asyncio run on the main thread, meaning that other
+        coroutines may freely use peng3d without needing :py:meth:`call_soon_threadsafe()`\\ .
+
+        Typical usage looks like this::
+
+            async def main():
+                peng.createWindow()
+                # Set up menus etc.
+                await peng.run_async()
+
+            asyncio.run(main())
+
+        Pending window events are polled at least every :confval:`events.async.poll` seconds.
+
+        See :py:meth:`run()` for the meaning of ``evloop``\\ .
         """
-        # TODO: support more than one event loop
         self.sendEvent(
             "peng3d:peng.run", {"peng": self, "window": self.window, "evloop": evloop}
         )
-        self.window.run(evloop)
+        self._prepareRun(evloop)
+        pyglet.clock.schedule_interval(
+            self._pumpThreadsafeTick, self.cfg["events.threadsafe.interval"]
+        )
+        try:
+            await self.window.run_async()
+        finally:
+            pyglet.clock.unschedule(self._pumpThreadsafeTick)
+            self._resolveFrameWaiters()
         self.sendEvent("peng3d:peng.exit", {"peng": self})
 
+    def next_frame(self) -> "asyncio.Future":
+        """
+        Returns an awaitable that completes after the next frame has been drawn.
+
+        Frames that are skipped due to :confval:`graphics.damage.enable` also complete the awaitable.
+
+        This allows coroutines to perform work once per frame::
+
+            while True:
+                await peng.next_frame()
+                # Update state
+
+        Note that this requires the :py:mod:`asyncio` event loop to be running, usually via
+        :py:meth:`run_async()`\\ . Pending awaitables are also completed once the main loop exits.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._frameWaiters.append(fut)
+        return fut
+
+    def _resolveFrameWaiters(self):
+        waiters = self._frameWaiters
+        self._frameWaiters = []
+        for fut in waiters:
+            if not fut.done():
+                fut.set_result(None)
+
+    def _scheduleCoroutine(self, coro):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            coro.close()
+            raise RuntimeError(
+                "Coroutine event handlers require a running asyncio event loop, see Peng.run_async()"
+            )
+        return asyncio.ensure_future(coro)
+
+    def call_soon_threadsafe(self, func: Callable, *args) -> None:
+        """
+        Schedules ``func`` to be called with the given positional arguments in the main thread.
+
+        This method may be called from any thread and is the recommended way for worker
+        threads to hand results back to the main thread, since most other methods of
+        peng3d must only be called from the main thread.
+
+        Internally, a :py:class:`collections.deque` is used as the queue, which does not
+        require any locking. The queue is drained by :py:meth:`pumpThreadsafe()`\\ , which
+        is called every :confval:`events.threadsafe.interval` seconds while :py:meth:`run()`
+        is active.
+
+        Functions are called in the order they were submitted. Exceptions raised by them
+        are propagated to the main loop.
+        """
+        self._threadsafeQueue.append((func, args))
+
+    def sendEventThreadsafe(self, event: str, data: Optional[dict] = None) -> None:
+        """
+        Thread-safe variant of :py:meth:`sendEvent()`\\ .
+
+        The event will be sent from the main thread the next time :py:meth:`pumpThreadsafe()` is called.
+        See :py:meth:`call_soon_threadsafe()` for details.
+        """
+        self._threadsafeQueue.append((self.sendEvent, (event, data)))
+
+    def pumpThreadsafe(self, limit: Optional[int] = None) -> int:
+        """
+        Calls functions submitted via :py:meth:`call_soon_threadsafe()` or
+        :py:meth:`sendEventThreadsafe()`\\ .
+
+        At most ``limit`` functions are called. If ``limit`` is not given, :confval:`events.threadsafe.maxper`
+        is used instead. Functions submitted while this method is running are never called
+        within the same call.
+
+        This method must only be called from the main thread.
+
+        Returns the number of functions called.
+        """
+        queue = self._threadsafeQueue
+        if not queue:
+            return 0
+
+        n = len(queue)
+        if limit is None:
+            limit = self.cfg["events.threadsafe.maxper"]
+        if limit is not None:
+            n = min(n, limit)
+
+        for _ in range(n):
+            func, args = queue.popleft()
+            func(*args)
+        return n
+
+    def _pumpThreadsafeTick(self, dt):
+        self.pumpThreadsafe()
+
     def sendPygletEvent(
         self,
         event_type: str,
@@ -207,53 +430,70 @@ class Peng(object):
         See :py:meth:`registerEventHandler()` for how to listen to these events.
 
         This method should be used to send pyglet events.
+
+        If :confval:`events.pyglet.lazy` is enabled, the bridged events described below
+        are only created and sent if there is at least one listener for them. This avoids
+        any allocations for high-frequency events like ``on_draw`` or ``on_mouse_motion``\\ .
+
         For new code, it is recommended to use :py:meth:`sendEvent()` instead.
         For "tunneling" pyglet events, use event names of the format ``pyglet:<event>``
-        and for the data use ``{"args":<args as list>,"window":<window object or none>,"src":<event source>,"event_type":<event type>}``
+        and for the data use ``{"args":<args as list>,"window":<window object or none>,"src":<event source>,"event_type":<event type>}``\\ .
+        Note that the data of the bridged events is an instance of :py:class:`~peng3d.events.PygletEventData`\\ ,
+        which behaves like such a dictionary.
 
         Note that you should send pyglet events only via this method, the above event will be sent automatically.
 
         Do not use this method to send custom events, use :py:meth:`sendEvent` instead.
         """
-        args = list(args)
-
-        self.sendEvent(
-            "pyglet:%s" % event_type,
-            {
-                "peng": self,
-                "args": args,
-                "window": window,
-                "src": self,
-                "event_type": event_type,
-            },
-        )
-        self.sendEvent(
-            "peng3d:pyglet",
-            {
-                "peng": self,
-                "args": args,
-                "window": window,
-                "src": self,
-                "event_type": event_type,
-            },
-        )
+        self._preparePygletEvent(event_type, args, window)
+        self.pygletEventHandlers.dispatch(event_type, args)
 
-        if (
-            event_type not in ["on_draw", "on_mouse_motion"]
-            and self.cfg["debug.events.dump"]
-        ):
-            print("Event %s with args %s" % (event_type, args))
-        if event_type in self.pygletEventHandlers:
-            for whandler in self.pygletEventHandlers[event_type]:
-                # This allows for proper collection of deleted handler methods by using weak references
-                handler = whandler()
-                if handler is None:
-                    del self.pygletEventHandlers[event_type][
-                        self.pygletEventHandlers[event_type].index(whandler)
-                    ]
-                handler(*args)
-
-    def addPygletListener(self, event_type: str, handler: Callable):
+    def _preparePygletEvent(
+        self,
+        event_type: str,
+        args: Tuple,
+        window: Optional["pyglet.window.Window"] = None,
+    ):
+        # Everything sendPygletEvent() does except for calling the pyglet listeners, which
+        # PengWindow does itself via its dispatch table
+        if self.eventMetrics.enabled:
+            self.eventMetrics.count(event_type)
+
+        if event_type in self.rateLimiter.flushOn:
+            self._pumpRateLimitedEvents(self.rateLimiter.flushOn[event_type])
+
+        router = self.eventRouter
+        if self.lazyPygletEvents:
+            name = self._pygletEventNames.get(event_type, None)
+            if name is None:
+                name = self._pygletEventNames[event_type] = "pyglet:%s" % event_type
+            send_pyglet = len(router.resolve(name)) > 0
+            send_peng3d = len(router.resolve("peng3d:pyglet")) > 0
+        else:
+            name = "pyglet:%s" % event_type
+            send_pyglet = send_peng3d = True
+
+        if send_pyglet or send_peng3d:
+            # Payloads are only built if they will actually be received
+            # Each event gets its own payload, as listeners may modify it
+            if send_pyglet:
+                self.sendEvent(
+                    name,
+                    events.PygletEventData(self, list(args), window, self, event_type),
+                )
+            if send_peng3d:
+                self.sendEvent(
+                    "peng3d:pyglet",
+                    events.PygletEventData(self, list(args), window, self, event_type),
+                )
+
+        if event_type not in _NO_DUMP_EVENTS and self.cfg["debug.events.dump"]:
+            print("Event %s with args %s" % (event_type, list(args)))
+        self.rateLimiter.coalesce(event_type, tuple(args))
+
+    def addPygletListener(
+        self, event_type: str, handler: Callable
+    ) -> events.ListenerToken:
         """
         Registers an event handler.
 
@@ -261,6 +501,9 @@ class Peng(object):
 
         All event arguments are passed as positional arguments.
 
+        Only a weak reference to the handler is kept. The returned :py:class:`~peng3d.events.ListenerToken`
+        can be passed to :py:meth:`delPygletListener()` to remove the handler again.
+
         This method should be used to listen for pyglet events.
         For new code, it is recommended to use :py:meth:`addEventListener()` instead.
 
@@ -270,45 +513,64 @@ class Peng(object):
         """
         if self.cfg["debug.events.register"]:
             print("Registered Event: %s Handler: %s" % (event_type, handler))
-        if event_type not in self.pygletEventHandlers:
-            self.pygletEventHandlers[event_type] = []
         # Only a weak reference is kept
-        if inspect.ismethod(handler):
-            handler = weakref.WeakMethod(handler)
-        else:
-            handler = weakref.ref(handler)
-        self.pygletEventHandlers[event_type].append(handler)
+        return self.pygletEventHandlers.add(event_type, handler)
+
+    def delPygletListener(self, token: events.ListenerToken) -> bool:
+        """
+        Removes a handler previously registered via :py:meth:`addPygletListener()` or
+        :py:meth:`addRateLimitedPygletListener()`\\ .
+
+        ``token`` must be the token returned by the registering method.
+
+        Returns whether the handler was still registered.
+        """
+        if (
+            token.registry is not self.pygletEventHandlers
+            and token.registry is not self.rlPygletEventHandlers
+        ):
+            raise ValueError("Token does not belong to this instance")
+        return token.remove()
+
+    def addRateLimitedPygletListener(
+        self,
+        event_type: str,
+        handler: Callable,
+        policy: Optional[Union[str, events.CoalescePolicy]] = None,
+    ) -> events.ListenerToken:
+        """
+        Registers a rate-limited event handler.
 
-    def addRateLimitedPygletListener(self, event_type: str, handler: Callable):
+        Similar to :py:meth:`addPygletListener()`\\ , but all occurrences of ``event_type``
+        within a frame are coalesced and the handler is only called once per frame, just
+        before the frame is drawn.
+
+        ``policy`` determines how the arguments of multiple events are combined, see
+        :py:class:`~peng3d.events.CoalescePolicy` for details. A string is interpreted as
+        the coalescing mode. If not given, the policy is taken from
+        :py:data:`~peng3d.events.DEFAULT_COALESCE_POLICIES`\\ , falling back to
+        :py:data:`~peng3d.events.COALESCE_LAST`\\ .
+
+        All handlers of the same event type share the same policy. Trying to register a
+        handler with a policy conflicting with an earlier one raises a :py:exc:`ValueError`\\ .
+
+        Returns a :py:class:`~peng3d.events.ListenerToken` that may be passed to :py:meth:`delPygletListener()`\\ .
+        """
         if self.cfg["debug.events.register"]:
             print(
                 "Registered Rate Limited Event: %s Handler: %s" % (event_type, handler)
             )
-        if event_type not in self.rlPygletEventHandlers:
-            self.rlPygletEventHandlers[event_type] = []
         # Only a weak reference is kept
-        if inspect.ismethod(handler):
-            handler = weakref.WeakMethod(handler)
-        else:
-            handler = weakref.ref(handler)
-        self.rlPygletEventHandlers[event_type].append(handler)
-
-    def _pumpRateLimitedEvents(self):
-        for event_type in self.rlPygletEventHandlers:
-            if self.rlPygletEventHandlersTriggered[event_type]:
-                self.rlPygletEventHandlersTriggered[event_type] = False
-
-                if event_type in self.rlPygletEventHandlers:
-                    args = list(self.rlPygletEventHandlersParams.get(event_type, []))
-
-                    for whandler in self.rlPygletEventHandlers[event_type]:
-                        # This allows for proper collection of deleted handler methods by using weak references
-                        handler = whandler()
-                        if handler is None:
-                            del self.rlPygletEventHandlers[event_type][
-                                self.rlPygletEventHandlers[event_type].index(whandler)
-                            ]
-                        handler(*args)
+        return self.rateLimiter.add(event_type, handler, policy)
+
+    def _pumpRateLimitedEvents(self, event_types: Optional[List[str]] = None):
+        tracer = self.tracer
+        t = tracer.now() if tracer.enabled else None
+
+        self.rateLimiter.pump(event_types)
+
+        if t is not None:
+            tracer.complete("Peng._pumpRateLimitedEvents", t, "events")
 
     @property
     def rsrcMgr(self):
@@ -330,91 +592,195 @@ class Peng(object):
         ``data`` may be any Python Object, but it usually is a dictionary containing relevant parameters.
         For example, most built-in events use a dictionary containing at least the ``peng`` key set to an instance of this class.
 
+        All handlers whose pattern matches ``event`` will be called in the order they were registered.
+        See :py:meth:`addEventListener()` for more information about patterns.
+
         If there are no handlers for the event, a corresponding message will be printed to the log file.
         To prevent spam, the maximum amount of ignored messages can be configured via :confval:`events.maxignore` and defaults to 3.
 
         If the config value :confval:`debug.events.dumpfile` is a file path, the event type will be added to an internal list and be saved to the given file during program exit.
+
+        If :py:attr:`eventMetrics` is enabled, the event and the time spent in each handler are recorded, see :py:meth:`eventStats()`\\ .
         """
         if self.cfg["debug.events.dumpfile"] != "" and event not in self.event_list:
             self.event_list.add(event)
-        if event not in self.eventHandlers:
+
+        metrics = self.eventMetrics
+        if metrics.enabled:
+            metrics.count(event)
+
+        handlers = self.eventRouter.resolve(event)
+        if not handlers:
+            ignored = self.events_ignored.get(event, 0)
             if (
-                event not in self.events_ignored
-                or self.events_ignored[event] <= self.cfg["events.maxignore"]
+                ignored <= self.cfg["events.maxignore"]
             ):  # Prevents spamming logfile with ignored event messages
                 # TODO: write to logfile
                 # Needs a logging module first...
-                self.events_ignored[event] = self.events_ignored.get(event, 0) + 1
+                self.events_ignored[event] = ignored + 1
             return
 
-        for handler in self.eventHandlers[event]:
+        for pattern, handler in handlers:
             f = handler[0]
             try:
-                f(event, data)
+                if metrics.enabled:
+                    t = time.perf_counter()
+                    try:
+                        r = f(event, data)
+                    finally:
+                        metrics.record(event, f, time.perf_counter() - t)
+                else:
+                    r = f(event, data)
+                if r is not None and inspect.iscoroutine(r):
+                    self._scheduleCoroutine(r)
             except Exception:
                 if not handler[1]:
                     raise
                 else:
                     # TODO: write to logfile
                     if self.cfg["events.removeonerror"]:
-                        self.delEventListener(event, f)
+                        self.delEventListener(pattern, f)
 
     def addEventListener(self, event: str, func: Callable, raiseErrors: bool = False):
         """
         Adds a handler to the given event.
 
-        A event may have an arbitrary amount of handlers, though assigning too
-        many handlers may slow down event processing.
+        A event may have an arbitrary amount of handlers. Since the handlers of each
+        event are resolved only once and then cached, adding many handlers will not
+        slow down event processing.
 
         For the format of ``event``\\ , see :py:meth:`sendEvent()`\\ .
 
+        ``event`` may also be a pattern containing ``*`` segments to subscribe to many
+        events at once. A trailing ``*`` matches one or more segments, e.g. ``peng3d:rsrc.*``
+        receives both :peng3d:event:`peng3d:rsrc.tex.load` and :peng3d:event:`peng3d:rsrc.init`\\ .
+        A ``*`` anywhere else matches exactly one segment, e.g. ``peng3d:*.init``\\ .
+        The namespace counts as a segment as well, so ``*`` alone matches all events.
+
         ``func`` is the handler which will be executed with two arguments, ``event_type`` and ``data``\\ , as supplied to :py:meth:`sendEvent()`\\ .
+        For patterns, ``event_type`` is always the concrete name of the event that was sent.
 
         If ``raiseErrors`` is True, exceptions caused by the handler will be re-raised.
         Defaults to ``False``\\ .
+
+        ``func`` may also be a coroutine function, in which case the returned coroutine is
+        scheduled as an :py:class:`asyncio.Task` on the running event loop. Exceptions raised
+        by the task are handled by asyncio and not subject to ``raiseErrors``\\ .
+        Coroutine handlers are only supported while :py:meth:`run_async()` is running.
         """
         if not isinstance(event, str):
             raise TypeError("Event types must always be strings")
 
-        if event not in self.eventHandlers:
-            self.eventHandlers[event] = []
+        self.eventRouter.add(event, func, raiseErrors)
+
+    def postEvent(
+        self,
+        event: str,
+        data: Optional[dict] = None,
+        priority: int = events.PRIORITY_NORMAL,
+    ) -> bool:
+        """
+        Posts an event to be sent at a later time.
+
+        Posted events are stored in :py:attr:`eventQueue` and sent via :py:meth:`sendEvent()`
+        once per frame, just before the active menu is drawn. Only as many events are sent
+        per frame as fit into the time budget set by :confval:`events.queue.budget`\\ ,
+        remaining events are deferred to the next frame. This spreads out bursts of events
+        that would otherwise cause a single very long frame.
 
-        self.eventHandlers[event].append([func, raiseErrors])
+        ``priority`` determines the order in which queued events are sent, lower values
+        are sent first. See :py:data:`~peng3d.events.PRIORITY_NORMAL` and similar constants.
+        Events with a priority of :py:data:`~peng3d.events.PRIORITY_CRITICAL` or lower bypass
+        the queue and are sent immediately.
+
+        If the queue is full as per :confval:`events.queue.maxsize`\\ , the event is dropped.
+
+        Returns whether the event was sent or queued.
+
+        See :py:attr:`eventQueueStats` for counters of queued, deferred and dropped events.
+        """
+        if priority <= events.PRIORITY_CRITICAL:
+            self.sendEvent(event, data)
+            return True
+        return self.eventQueue.post(event, data, priority)
+
+    def pumpEvents(self, budget: Optional[float] = None) -> int:
+        """
+        Sends queued events posted via :py:meth:`postEvent()`\\ .
+
+        ``budget`` is the time in seconds after which no more events will be sent. If not given,
+        :confval:`events.queue.budget` is used.
+
+        This method is called automatically by :py:meth:`PengWindow.on_draw() <peng3d.window.PengWindow.on_draw()>`\\ .
+
+        Returns the number of events sent.
+        """
+        if not self.eventQueue:
+            return 0
+        if budget is None:
+            budget = self.cfg["events.queue.budget"]
+        return self.eventQueue.pump(self.sendEvent, budget)
+
+    @property
+    def eventQueueStats(self) -> Dict[str, int]:
+        """
+        Read-only property containing counters of the event queue.
+
+        See :py:attr:`EventQueue.stats <peng3d.events.EventQueue.stats>` for details.
+        """
+        return self.eventQueue.stats
+
+    def eventStats(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Returns a snapshot of the collected event metrics.
+
+        Metrics are only collected while :py:attr:`eventMetrics` is enabled, either via
+        :confval:`debug.events.stats` or by setting ``peng.eventMetrics.enabled`` at runtime.
+        Handlers of :py:meth:`sendEvent()`\\ , :py:meth:`sendPygletEvent()` and of all windows,
+        menus and worlds are included.
+
+        If ``reset`` is true, all collected metrics are discarded after the snapshot has been taken.
+
+        See :py:meth:`EventMetrics.snapshot() <peng3d.events.EventMetrics.snapshot()>` for the
+        structure of the returned dictionary.
+        """
+        stats = self.eventMetrics.snapshot()
+        if reset:
+            self.eventMetrics.reset()
+        return stats
 
     def delEventListener(self, event: str, func: Callable):
         """
         Removes the given handler from the given event.
 
+        ``event`` must be the same name or pattern that was passed to :py:meth:`addEventListener()`\\ .
+
         If the event does not exist, a :py:exc:`NameError` is thrown.
 
         If the handler has not been registered previously, also a :py:exc:`NameError` will be thrown.
         """
-        if event not in self.eventHandlers:
-            raise NameError("No handlers exist for event %s" % event)
-
-        if [func, True] in self.eventHandlers[event]:
-            del self.eventHandlers[event][self.eventHandlers[event].index(func)]
-        elif [func, False] in self.eventHandlers[event]:
-            del self.eventHandlers[event][self.eventHandlers[event].index(func)]
-        else:
-            raise NameError("This handler is not registered for event %s" % event)
-
-        if not self.eventHandlers[event]:
-            del self.eventHandlers[event]
+        self.eventRouter.remove(event, func)
 
+    # Rate limited events are now collected by sendPygletEvent(), kept for compatibility
     def on_mouse_motion(self, x, y, dx, dy):
-        _, _, odx, ody = self.rlPygletEventHandlersParams["on_mouse_motion"]
-        self.rlPygletEventHandlersParams["on_mouse_motion"] = (x, y, dx + odx, dy + ody)
-        self.rlPygletEventHandlersTriggered["on_mouse_motion"] = True
+        self.rateLimiter.coalesce("on_mouse_motion", (x, y, dx, dy))
+
+    on_mouse_motion.__noautodoc__ = True
 
     def on_resize(self, width, height):
-        self.rlPygletEventHandlersParams["on_resize"] = (width, height)
-        self.rlPygletEventHandlersTriggered["on_resize"] = True
+        self.rateLimiter.coalesce("on_resize", (width, height))
+
+    on_resize.__noautodoc__ = True
 
     def handler_exit(self, event, data):
         if self.cfg["debug.events.dumpfile"] != "":
             with open(self.cfg["debug.events.dumpfile"], "w") as f:
                 f.write("\n".join(sorted(list(self.event_list))))
+        if self.cfg["debug.events.statsfile"] != "":
+            with open(self.cfg["debug.events.statsfile"], "w") as f:
+                f.write(self.eventMetrics.format())
+        if self.cfg["debug.trace.file"] != "" and len(self.tracer) > 0:
+            self.tracer.dump(self.cfg["debug.trace.file"])
 
     handler_exit.__noautodoc__ = True
 
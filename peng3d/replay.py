@@ -0,0 +1,423 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  replay.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+__all__ = [
+    "InputRecorder",
+    "InputReplayer",
+    "read_recording",
+    "DEFAULT_EXCLUDE",
+]
+
+import struct
+import time
+
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union, Any, Iterable
+
+from . import world
+
+if world._have_pyglet:
+    import pyglet
+
+# File format:
+#
+# The file starts with MAGIC followed by the format version as an unsigned short.
+# Afterwards, records follow until the end of the file. Each record starts with a single
+# byte denoting its kind:
+#
+# _REC_NAME: defines an event name, followed by the id as an unsigned short and the
+#            UTF-8 encoded name prefixed with its length as an unsigned short
+# _REC_EVENT: an event, followed by the timestamp in seconds as a double, the id of the
+#             event name as an unsigned short and the number of arguments as an unsigned byte
+#             Each argument is a single type tag byte followed by its value.
+#
+# All values are little-endian.
+
+MAGIC = b"P3DI"
+VERSION = 1
+
+_REC_NAME = 0
+_REC_EVENT = 1
+
+_HEADER = struct.Struct("<4sH")
+_NAME = struct.Struct("<BHH")
+_EVENT = struct.Struct("<BdHB")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_STR = struct.Struct("<I")
+
+DEFAULT_EXCLUDE = frozenset(["on_draw", "on_refresh", "on_expose"])
+"""
+Events that are not recorded by default, since they are generated by the event loop
+itself and not caused by the user.
+"""
+
+
+def _encode_arg(arg: Any) -> bytes:
+    # bool must be checked first, since it is a subclass of int
+    if arg is None:
+        return b"N"
+    elif arg is True:
+        return b"T"
+    elif arg is False:
+        return b"F"
+    elif isinstance(arg, int):
+        return b"i" + _INT.pack(arg)
+    elif isinstance(arg, float):
+        return b"f" + _FLOAT.pack(arg)
+    elif isinstance(arg, str):
+        data = arg.encode("utf-8")
+        return b"s" + _STR.pack(len(data)) + data
+    raise TypeError("Cannot record argument of type %s" % type(arg).__name__)
+
+
+def _read_exact(f: BinaryIO, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) != n:
+        raise EOFError("Unexpected end of recording")
+    return data
+
+
+def _decode_arg(f: BinaryIO) -> Any:
+    tag = _read_exact(f, 1)
+    if tag == b"N":
+        return None
+    elif tag == b"T":
+        return True
+    elif tag == b"F":
+        return False
+    elif tag == b"i":
+        return _INT.unpack(_read_exact(f, _INT.size))[0]
+    elif tag == b"f":
+        return _FLOAT.unpack(_read_exact(f, _FLOAT.size))[0]
+    elif tag == b"s":
+        (n,) = _STR.unpack(_read_exact(f, _STR.size))
+        return _read_exact(f, n).decode("utf-8")
+    raise ValueError("Unknown argument type tag %r" % tag)
+
+
+def read_recording(f: BinaryIO) -> Iterator[Tuple[float, str, Tuple]]:
+    """
+    Reads a recording created by :py:class:`InputRecorder` from the given binary file-like object.
+
+    Yields tuples of ``(timestamp, event_type, args)``\\ , where ``timestamp`` is the time in
+    seconds since the recording was started.
+
+    Raises a :py:exc:`ValueError` if the file is not a valid recording.
+    """
+    header = f.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise ValueError("File is not a peng3d input recording")
+    magic, version = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("File is not a peng3d input recording")
+    if version != VERSION:
+        raise ValueError("Unsupported input recording version %d" % version)
+
+    names: Dict[int, str] = {}
+    while True:
+        kind = f.read(1)
+        if not kind:
+            return
+        if kind[0] == _REC_NAME:
+            _, nid, n = _NAME.unpack(kind + _read_exact(f, _NAME.size - 1))
+            names[nid] = _read_exact(f, n).decode("utf-8")
+        elif kind[0] == _REC_EVENT:
+            _, t, nid, argc = _EVENT.unpack(kind + _read_exact(f, _EVENT.size - 1))
+            args = tuple(_decode_arg(f) for _ in range(argc))
+            yield t, names[nid], args
+        else:
+            raise ValueError("Unknown record kind %d" % kind[0])
+
+
+class InputRecorder(object):
+    """
+    Records pyglet events dispatched by a window into a compact binary file.
+
+    ``f`` must be a binary file-like object opened for writing.
+
+    Events whose type is in ``exclude`` are not recorded, see :py:data:`DEFAULT_EXCLUDE`\\ .
+
+    Only events whose arguments are ``None``\\ , booleans, integers, floats or strings can
+    be recorded, which includes all input events of pyglet. Other events are skipped and
+    counted in :py:attr:`skipped`\\ .
+
+    Recording is started via :py:meth:`start()` and stopped via :py:meth:`stop()`\\ .
+    The recorder may also be used as a context manager::
+
+        with open("session.p3di", "wb") as f, InputRecorder(f).start(peng.window):
+            peng.run()
+
+    Recordings can be played back using :py:class:`InputReplayer`\\ .
+    """
+
+    def __init__(self, f: BinaryIO, exclude: Iterable[str] = DEFAULT_EXCLUDE):
+        self.f: BinaryIO = f
+        self.exclude = frozenset(exclude)
+
+        self.window = None
+        self.recorded: int = 0
+        self.skipped: int = 0
+
+        self._names: Dict[str, int] = {}
+        self._start: Optional[float] = None
+
+        self.f.write(_HEADER.pack(MAGIC, VERSION))
+
+    def start(self, window) -> "InputRecorder":
+        """
+        Starts recording all events dispatched by the given :py:class:`~peng3d.window.PengWindow`\\ .
+
+        Timestamps are relative to the first call of this method.
+
+        Returns the recorder itself, for use in ``with`` statements.
+        """
+        if self._start is None:
+            self._start = time.perf_counter()
+        self.window = window
+        window.inputRecorder = self
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops recording and flushes the file.
+
+        Note that the file is not closed.
+        """
+        if self.window is not None and self.window.inputRecorder is self:
+            self.window.inputRecorder = None
+        self.window = None
+        self.f.flush()
+
+    def record(self, event_type: str, args: Tuple, t: Optional[float] = None) -> None:
+        """
+        Records a single event.
+
+        This method is called by :py:meth:`PengWindow.dispatch_event() <peng3d.window.PengWindow.dispatch_event()>`
+        while recording.
+
+        ``t`` is the timestamp of the event in seconds, defaulting to the time since the
+        recording was started.
+        """
+        if event_type in self.exclude:
+            return
+        if t is None:
+            if self._start is None:
+                self._start = time.perf_counter()
+            t = time.perf_counter() - self._start
+
+        try:
+            data = b"".join(map(_encode_arg, args))
+        except TypeError:
+            self.skipped += 1
+            return
+
+        nid = self._names.get(event_type, None)
+        if nid is None:
+            nid = self._names[event_type] = len(self._names)
+            name = event_type.encode("utf-8")
+            self.f.write(_NAME.pack(_REC_NAME, nid, len(name)) + name)
+
+        self.f.write(_EVENT.pack(_REC_EVENT, t, nid, len(args)) + data)
+        self.recorded += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class InputReplayer(object):
+    """
+    Plays back a recording created by :py:class:`InputRecorder` into a :py:class:`~peng3d.peng.Peng` instance.
+
+    ``f`` may be a binary file-like object or a path to a recording.
+
+    Events are dispatched via :py:meth:`PengWindow.dispatch_event() <peng3d.window.PengWindow.dispatch_event()>`
+    of ``window``\\ , defaulting to the first window of ``peng``\\ . If there is no window,
+    :py:meth:`Peng.sendPygletEvent() <peng3d.peng.Peng.sendPygletEvent()>` is used instead.
+
+    The replayer keeps a virtual clock that is advanced to the timestamp of each event
+    before it is dispatched. Between events, frames are drawn every ``frame_interval``
+    seconds of virtual time, pumping rate-limited and queued events just like the real
+    event loop does. Passing ``None`` disables drawing frames, only events are dispatched.
+
+    The virtual time also drives the clock of the pyglet event loop, :py:attr:`Peng.ticker <peng3d.peng.Peng.ticker>`
+    and a private pyglet clock available via :py:attr:`clock`\\ . This makes replays
+    independent of the speed of the machine they run on.
+    """
+
+    def __init__(
+        self,
+        peng,
+        f: Union[str, BinaryIO],
+        window=None,
+        frame_interval: Optional[float] = 1 / 60.0,
+    ):
+        self.peng = peng
+        self.window = window if window is not None else peng.window
+
+        if isinstance(f, str):
+            with open(f, "rb") as fo:
+                self.events = list(read_recording(fo))
+        else:
+            self.events = list(read_recording(f))
+
+        if frame_interval is not None and frame_interval <= 0:
+            raise ValueError("frame_interval must be positive")
+        self.frame_interval: Optional[float] = frame_interval
+        self.frames: int = 0
+
+        self.pos: int = 0
+        self._time: float = 0.0
+
+        if world._have_pyglet:
+            self.clock: Optional["pyglet.clock.Clock"] = pyglet.clock.Clock(
+                time_function=self.now
+            )
+        else:
+            self.clock = None
+
+    def now(self) -> float:
+        """
+        Returns the current time of the virtual clock in seconds.
+        """
+        return self._time
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether all events have been replayed.
+        """
+        return self.pos >= len(self.events)
+
+    def step(self) -> bool:
+        """
+        Advances the virtual clock to the next event and dispatches it.
+
+        Any frames due before the event are drawn first.
+
+        Returns ``False`` if there were no events left.
+        """
+        if self.done:
+            return False
+        t, event_type, args = self.events[self.pos]
+        self.pos += 1
+
+        self.advance(t)
+
+        window = self.window
+        if window is not None:
+            window.dispatch_event(event_type, *args)
+        else:
+            self.peng.sendPygletEvent(event_type, args)
+        return True
+
+    def run(self, speed: Optional[float] = None) -> int:
+        """
+        Replays all remaining events.
+
+        If ``speed`` is ``None``\\ , events are replayed as fast as possible. Otherwise,
+        the original timing is reproduced, with ``speed`` acting as a multiplier, e.g.
+        ``2.0`` replays at double speed.
+
+        Unless frames are disabled, one more frame is drawn after the last event, so that
+        rate-limited events are handled.
+
+        Returns the number of events dispatched.
+        """
+        n = 0
+        start = time.perf_counter() - self._time / (speed or 1.0)
+        while not self.done:
+            if speed is not None:
+                delay = start + self.events[self.pos][0] / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.step()
+            n += 1
+        if self.frame_interval is not None:
+            self.advance(self.frames * self.frame_interval)
+        return n
+
+    def advance(self, t: float) -> None:
+        """
+        Advances the virtual clock to ``t``\\ , drawing all frames due until then.
+
+        Times before the current virtual time are ignored.
+        """
+        interval = self.frame_interval
+        if interval is not None:
+            # Computed from the frame count to avoid accumulating rounding errors
+            while self.frames * interval <= t:
+                self._setTime(self.frames * interval)
+                self._drawFrame()
+        self._setTime(t)
+
+    def _setTime(self, t: float) -> None:
+        dt = t - self._time
+        if dt < 0:
+            return
+        self._time = t
+
+        if self.clock is not None:
+            self.clock.tick(True)
+
+        ticker = self.peng.ticker
+        if world._have_pyglet:
+            loop_clock = pyglet.app.event_loop.clock
+            _tickClock(loop_clock, dt)
+            if ticker._scheduled and loop_clock is pyglet.clock.get_default():
+                # Already ticked by the clock
+                return
+        ticker.tick(dt)
+
+    def _drawFrame(self) -> None:
+        self.frames += 1
+        window = self.window
+        if window is None:
+            # Mirrors what the event loop does if no window is drawn
+            self.peng._pumpRateLimitedEvents()
+            self.peng.pumpEvents()
+            return
+
+        window.switch_to()
+        if window.pacer is None:
+            window.dispatch_event("on_draw")
+        else:
+            # The pacer works with real time and would skip most frames
+            window._drawFrame()
+        window.flip()
+
+
+def _tickClock(clock: "pyglet.clock.Clock", dt: float) -> None:
+    # Ticks the clock as if exactly dt seconds had passed since its last tick
+    real = clock.time
+    if clock.last_ts is None:
+        clock.update_time()
+    ts = clock.last_ts + dt
+    clock.time = lambda: ts
+    try:
+        clock.tick(True)
+    finally:
+        clock.time = real
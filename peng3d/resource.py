@@ -25,6 +25,11 @@
 __all__ = ["ResourceManager"]
 
 import os
+import re
+import time
+import traceback
+import collections
+import concurrent.futures
 
 try:
     import pyglet
@@ -50,9 +55,22 @@ except ImportError:
         # not found at all, most features will still work, but comments and extraneous commas in JSON files will not
         pass
 
-from . import model
-
-from typing import TYPE_CHECKING, Dict, Tuple, Any, Optional, Union
+from . import model, events
+from . import storage as _storage
+
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Tuple,
+    Any,
+    Optional,
+    Union,
+    Callable,
+    List,
+    Deque,
+    IO,
+    Set,
+)
 
 if TYPE_CHECKING:
     import peng3d
@@ -73,14 +91,50 @@ class ResourceManager(object):
     Textures can be queried by any part of the application, they are only loaded on the first request and then cached for every request following it.
 
     The same caching and lazy-loading principle applies to models loaded via this system.
+
+    All files are read via a :py:class:`~peng3d.storage.Storage` backend, available as
+    :py:attr:`storage`\\ . If ``storage`` is not given, a :py:class:`~peng3d.storage.ArchiveStorage`
+    is used if :confval:`rsrc.archive` is set and a :py:class:`~peng3d.storage.FileStorage`
+    reading the ``assets`` folder within ``basepath`` otherwise.
+
+    Additional asset folders overriding single files of the base assets, e.g. for mods,
+    may be configured via :confval:`rsrc.roots` or added later via :py:meth:`addResourceRoot()`\\ .
     """
 
     missingtexturename: str = "peng3d:missingtexture"
 
-    def __init__(self, peng: "peng3d.Peng", basepath: str):
+    def __init__(
+        self,
+        peng: "peng3d.Peng",
+        basepath: str,
+        storage: Optional[_storage.Storage] = None,
+    ):
         self.basepath: str = basepath
         self.peng: "peng3d.Peng" = peng
 
+        if storage is None:
+            archive = self.peng.cfg["rsrc.archive"]
+            if archive is not None:
+                storage = _storage.ArchiveStorage(os.path.join(basepath, archive))
+            else:
+                storage = _storage.FileStorage(
+                    os.path.join(basepath, "assets"), self.peng.cfg["rsrc.index"]
+                )
+
+            roots = self.peng.cfg["rsrc.roots"]
+            if roots:
+                storage = _storage.OverlayStorage(
+                    [
+                        _storage.FileStorage(os.path.join(basepath, root), True)
+                        for root in roots
+                    ]
+                    + [storage]
+                )
+        self.storage: _storage.Storage = storage
+
+        # Maps (name, ext) -> storage key
+        self._keyCache: Dict[Tuple[str, str], str] = {}
+
         maxsize = GLint()
         glGetIntegerv(GL_MAX_TEXTURE_SIZE, maxsize)
         maxsize = min(
@@ -108,6 +162,34 @@ class ResourceManager(object):
 
         self.missingTexture: Optional[pyglet.image.AbstractImage] = None
 
+        # Asynchronous texture loading, see getTexAsync()
+        self._texExecutor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        # Maps (category, name) -> future of the decoded image
+        self._texFutures: Dict[Tuple[str, str], concurrent.futures.Future] = {}
+        # Maps (category, name) -> callbacks waiting for the texture
+        self._texCallbacks: Dict[Tuple[str, str], List[Callable]] = {}
+        # Keys of decoded images waiting to be uploaded, only touched on the main thread
+        self._texReady: Deque[Tuple[str, str]] = collections.deque()
+
+        # Maps texture id -> (target, magfilter, minfilter) of atlases that need new mipmaps
+        self._dirtyTextures: Dict[int, Tuple[int, int, int]] = {}
+        # Texture ids of dirty atlases only loaded from the atlas cache, see mipmapStats()
+        self._uncountedMipmaps: Set[int] = set()
+        self._mipmapRequests: int = 0
+        self._mipmapGenerations: int = 0
+
+        # Persistent atlas cache, see loadAtlasCache()
+        # Maps category -> texture id -> (atlas, list of allocated (width, height) in order)
+        self._atlasPages: Dict[str, Dict[int, Tuple[Any, List[Tuple[int, int]]]]] = {}
+        # Maps category -> names of textures that were loaded from a file
+        self._atlasSources: Dict[str, set] = {}
+        # Categories whose cache has not been checked yet
+        self._atlasCachePending: set = set()
+        # Categories that contain textures not yet stored in their cache
+        self._atlasCacheDirty: set = set()
+        if self.peng.cfg["rsrc.atlascache.path"] is not None:
+            self.peng.addEventListener("peng3d:window.close", self._saveAtlasCaches)
+
         self.modelcache = {}
         self.modelobjcache = {}
 
@@ -125,10 +207,65 @@ class ResourceManager(object):
 
         This resource naming scheme is used by most other methods of this class.
 
-        Note that it is currently not possible to define multiple base paths to search through.
+        If the resource exists in a resource root overriding the base assets, see
+        :py:meth:`addResourceRoot()`\\ , the path within that root is returned.
+        Note that the returned path is only meaningful when reading loose files, resources
+        should thus be read via :py:meth:`openResource()` instead.
+        """
+        path = self.storage.path(self.resourceNameToKey(name, ext))
+        if path is not None:
+            return path
+        app, rname = name.split(":", 1)
+        return os.path.join(self.basepath, "assets", app, *rname.split(".")) + ext
+
+    def resourceNameToKey(self, name: str, ext: str = "") -> str:
+        """
+        Converts the given resource name to a key of :py:attr:`storage`\\ .
+
+        For example, the resource name ``peng3d:some.category.foo`` with the extension
+        ``.png`` results in the key ``peng3d/some/category/foo.png``\\ .
+        """
+        try:
+            return self._keyCache[name, ext]
+        except KeyError:
+            pass
+        app, rname = name.split(":", 1)
+        key = self._keyCache[name, ext] = "/".join([app] + rname.split(".")) + ext
+        return key
+
+    def addResourceRoot(self, path: str, index: int = 0) -> _storage.Storage:
+        """
+        Adds an additional asset folder to search for resources.
+
+        Files in the new root override files with the same key in all roots after it,
+        by default including the base assets. This allows e.g. mods to replace single
+        textures without copying the whole asset tree. Relative paths are resolved
+        against the ``basepath`` of this manager.
+
+        ``index`` is the position of the root in :py:attr:`OverlayStorage.roots <peng3d.storage.OverlayStorage.roots>`\\ ,
+        with ``0`` having the highest priority. If :py:attr:`storage` is not yet an
+        :py:class:`~peng3d.storage.OverlayStorage`\\ , it is wrapped into one first.
+
+        Textures already loaded are not affected.
+
+        Returns the storage backend created for the new root.
+        """
+        root = _storage.FileStorage(os.path.join(self.basepath, path), True)
+        if not isinstance(self.storage, _storage.OverlayStorage):
+            self.storage = _storage.OverlayStorage([self.storage])
+        self.storage.addRoot(root, index)
+        return root
+
+    def refreshResources(self) -> Set[str]:
         """
-        nsplit = name.split(":")[1].split(".")
-        return os.path.join(self.basepath, "assets", name.split(":")[0], *nsplit) + ext
+        Updates the index of all resource roots to pick up files that have been added
+        or removed since the index was built.
+
+        Only directories whose modification time changed are rescanned.
+
+        Returns the set of storage keys that have been added or removed.
+        """
+        return self.storage.refresh()
 
     def resourceExists(self, name: str, ext: str = "") -> bool:
         """
@@ -136,7 +273,29 @@ class ResourceManager(object):
 
         This must not mean that the resource is meaningful, it simply signals that the file exists.
         """
-        return os.path.exists(self.resourceNameToPath(name, ext))
+        return self.storage.exists(self.resourceNameToKey(name, ext))
+
+    def openResource(self, name: str, ext: str = "") -> IO[bytes]:
+        """
+        Opens the resource with the given name and extension for binary reading.
+
+        May be called from any thread.
+
+        :raises FileNotFoundError: if the resource does not exist
+        """
+        return self.storage.open(self.resourceNameToKey(name, ext))
+
+    def loadImage(self, name: str) -> "pyglet.image.AbstractImage":
+        """
+        Loads the PNG image with the given resource name, without uploading it to a texture.
+
+        May be called from any thread.
+
+        :raises FileNotFoundError: if the resource does not exist
+        """
+        with self.openResource(name, ".png") as f:
+            # The file name is only used to choose a suitable decoder
+            return pyglet.image.load(self.resourceNameToKey(name, ".png"), file=f)
 
     def addCategory(self, name: str, size: Optional[int] = None) -> int:
         """
@@ -155,6 +314,12 @@ class ResourceManager(object):
         self.categoriesSizes[name] = {}
         self.categoriesTexCache[name] = {}
         self.categoriesTexBin[name] = pyglet.image.atlas.TextureBin(size, size)
+        self._atlasPages[name] = {}
+        self._atlasSources[name] = set()
+        self._atlasCacheDirty.discard(name)
+        if self.peng.cfg["rsrc.atlascache.path"] is not None:
+            # Loaded lazily, to allow changing the category settings after adding it
+            self._atlasCachePending.add(name)
         self.peng.sendEvent(
             "peng3d:rsrc.category.add", {"peng": self.peng, "category": name}
         )
@@ -178,7 +343,10 @@ class ResourceManager(object):
             )
             return self.getMissingTex(category)
         if name not in self.categoriesTexCache[category]:
-            self.loadTex(name, category)
+            if category in self._atlasCachePending:
+                self.loadAtlasCache(category)
+            if name not in self.categoriesTexCache[category]:
+                self.loadTex(name, category)
         return self.categoriesTexCache[category][name]
 
     def loadTex(self, name: str, category: str) -> TexInfo:
@@ -192,15 +360,53 @@ class ResourceManager(object):
         Currently, all texture mipmaps will be generated and the filters will be set to
         :py:const:`GL_NEAREST` for the magnification filter and :py:const:`GL_NEAREST_MIPMAP_LINEAR` for the minification filter.
         This results in a pixelated texture and not  a blurry one.
+
+        If the texture is currently being decoded in the background, see :py:meth:`getTexAsync()`\\ ,
+        this method waits for the decoding to finish instead of decoding it again.
         """
+        tracer = self.peng.tracer
+        t = tracer.now() if tracer.enabled else None
+
+        fut = self._texFutures.pop((category, name), None)
+        if fut is not None:
+            img = self._texFutureResult(fut)
+        else:
+            img = self._decodeTex(name)
+
+        out = self._uploadTex(name, category, img)
+
+        if t is not None:
+            tracer.complete(
+                "ResourceManager.loadTex",
+                t,
+                "rsrc",
+                {"name": name, "category": category},
+            )
+        return out
+
+    def _decodeTex(self, name: str) -> Optional["pyglet.image.AbstractImage"]:
+        # Does not touch any OpenGL or peng3d state and is thus safe to call from any thread
         try:
-            img = pyglet.image.load(self.resourceNameToPath(name, ".png"))
-        except FileNotFoundError:
+            return self.loadImage(name)
+        except (OSError, pyglet.image.codecs.ImageDecodeException):
+            # Missing or undecodable files are replaced by the missing texture
+            return None
+
+    def _uploadTex(
+        self,
+        name: str,
+        category: str,
+        img: Optional["pyglet.image.AbstractImage"],
+    ) -> TexInfo:
+        if img is None:
             self.peng.sendEvent(
                 "peng3d:rsrc.missing.tex", {"cat": category, "name": name}
             )
             img = self.getMissingTexture()
-        texreg = self.categoriesTexBin[category].add(img)
+        else:
+            self._atlasSources[category].add(name)
+            self._atlasCacheDirty.add(category)
+        texreg = self._addToAtlas(category, img)
 
         # texreg = texreg.get_transform(True,True) # Mirrors the image due to how pyglets coordinate system works
         # Strange behavior, sometimes needed and sometimes not
@@ -211,29 +417,252 @@ class ResourceManager(object):
         texid = texreg.id
         texcoords = texreg.tex_coords
 
-        # Prevents texture bleeding with texture sizes that are powers of 2, else weird lines may appear at certain angles.
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        glTexParameteri(
-            GL_TEXTURE_2D,
-            GL_TEXTURE_MAG_FILTER,
+        self._markMipmapsDirty(
+            texreg,
             self.categoriesSettings[category]["magfilter"],
-        )
-        glTexParameteri(
-            GL_TEXTURE_2D,
-            GL_TEXTURE_MIN_FILTER,
             self.categoriesSettings[category]["minfilter"],
         )
-        glGenerateMipmap(GL_TEXTURE_2D)
 
         out = target, texid, texcoords
         self.categoriesTexCache[category][name] = out
+
         self.peng.sendEvent(
             "peng3d:rsrc.tex.load",
-            {"peng": self.peng, "name": name, "category": category},
+            events.TexLoadEventData(self.peng, name, category),
         )
         return out
 
+    def _addToAtlas(self, category: str, img: "pyglet.image.AbstractImage"):
+        bin = self.categoriesTexBin[category]
+        texreg = bin.add(img)
+
+        # The allocations are recorded to be able to restore the atlas from the cache
+        pages = self._atlasPages[category]
+        if texreg.owner.id not in pages:
+            atlas = [a for a in bin.atlases if a.texture is texreg.owner][0]
+            pages[texreg.owner.id] = atlas, []
+        pages[texreg.owner.id][1].append((img.width, img.height))
+        return texreg
+
+    def _markMipmapsDirty(
+        self, texreg, magfilter: int, minfilter: int, count: bool = True
+    ) -> None:
+        # Mipmaps of the whole atlas are regenerated once by flushMipmaps(), instead of once per added image
+        if count:
+            self._mipmapRequests += 1
+            self._uncountedMipmaps.discard(texreg.id)
+        elif texreg.id not in self._dirtyTextures:
+            self._uncountedMipmaps.add(texreg.id)
+        self._dirtyTextures[texreg.id] = texreg.target, magfilter, minfilter
+
+    def flushMipmaps(self) -> int:
+        """
+        Sets the texture parameters and regenerates the mipmaps of all texture atlases
+        that images have been added to since the last call.
+
+        Adding an image to an atlas only marks it as dirty, meaning that loading many
+        textures into the same category only regenerates the mipmaps of the atlas once.
+
+        This method is called automatically before each frame and before the widgets of
+        a submenu are drawn. It should be called manually when drawing newly loaded
+        textures outside of a :py:class:`~peng3d.window.PengWindow`\\ . Until then, the
+        smaller mipmap levels of a dirty atlas may still show its previous content.
+
+        Must only be called from the main thread.
+
+        Returns the number of atlases that have been updated.
+        """
+        if not self._dirtyTextures:
+            return 0
+
+        tracer = self.peng.tracer
+        t = tracer.now() if tracer.enabled else None
+
+        n = 0
+        for texid, (target, magfilter, minfilter) in self._dirtyTextures.items():
+            glBindTexture(target, texid)
+            # Prevents texture bleeding with texture sizes that are powers of 2, else weird lines may appear at certain angles.
+            glTexParameteri(target, GL_TEXTURE_WRAP_S, GL_REPEAT)
+            glTexParameteri(target, GL_TEXTURE_WRAP_T, GL_REPEAT)
+            glTexParameteri(target, GL_TEXTURE_MAG_FILTER, magfilter)
+            glTexParameteri(target, GL_TEXTURE_MIN_FILTER, minfilter)
+            glGenerateMipmap(target)
+            n += 1
+        self._dirtyTextures.clear()
+        self._mipmapGenerations += n - len(self._uncountedMipmaps)
+        self._uncountedMipmaps.clear()
+
+        if t is not None:
+            tracer.complete("ResourceManager.flushMipmaps", t, "rsrc", {"count": n})
+        return n
+
+    def mipmapStats(self) -> Dict[str, int]:
+        """
+        Returns a dictionary of counters describing mipmap generation.
+
+        ``requested`` is the number of images added to any atlas, each of which would
+        have caused a full mipmap regeneration if done immediately. ``generated`` is the
+        number of regenerations that actually happened and ``avoided`` the difference,
+        minus any atlases that are still waiting in ``pending``\\ .
+
+        Atlases loaded from the atlas cache, see :py:meth:`loadAtlasCache()`\\ , are
+        only counted once images are added to them.
+        """
+        pending = len(self._dirtyTextures) - len(self._uncountedMipmaps)
+        return {
+            "requested": self._mipmapRequests,
+            "generated": self._mipmapGenerations,
+            "pending": pending,
+            "avoided": self._mipmapRequests - self._mipmapGenerations - pending,
+        }
+
+    def getTexAsync(
+        self,
+        name: str,
+        category: str,
+        callback: Optional[Callable[[TexInfo], Any]] = None,
+    ) -> TexInfo:
+        """
+        Non-blocking variant of :py:meth:`getTex()`\\ .
+
+        If the texture has already been loaded, it is returned immediately and ``callback``
+        is called right away. Otherwise, the image is decoded in a background thread via
+        :py:meth:`prefetch()` and the missing texture of the category is returned as a
+        placeholder. See :py:meth:`getMissingTexture()` for more information.
+
+        Once the texture has been uploaded by :py:meth:`processUploads()`\\ , ``callback``
+        is called with the real texture. Since most widgets bake their texture into their
+        vertex lists, the callback is usually used to update these, e.g. by re-creating
+        the widget background.
+
+        The ``peng3d:rsrc.tex.load`` event is sent once the texture is available, as
+        with synchronously loaded textures.
+        """
+        if category in self._atlasCachePending:
+            self.loadAtlasCache(category)
+        if (
+            category not in self.categoriesTexCache
+            or name in self.categoriesTexCache[category]
+        ):
+            out = self.getTex(name, category)
+            if callback is not None:
+                callback(out)
+            return out
+
+        self.prefetch(name, category)
+        if callback is not None:
+            self._texCallbacks.setdefault((category, name), []).append(callback)
+        return self.getTex(self.missingtexturename, category)
+
+    def prefetch(self, name: str, category: str) -> None:
+        """
+        Starts decoding the texture with the given name and category in the background.
+
+        The decoded image will be uploaded to the texture atlas of the category on the
+        main thread by :py:meth:`processUploads()`\\ , which is called automatically
+        every frame. Subsequent calls to :py:meth:`getTex()` will then return the texture
+        without blocking.
+
+        This is useful for warming up the textures of a menu before it is first shown,
+        avoiding a stutter while all its textures are loaded synchronously.
+
+        The number of worker threads can be configured via :confval:`rsrc.async.workers`\\ .
+
+        Does nothing if the texture is already loaded or being loaded.
+        """
+        if category not in self.categoriesTexCache:
+            # getTex() will handle the missing category
+            return
+        if category in self._atlasCachePending:
+            self.loadAtlasCache(category)
+        key = category, name
+        if name in self.categoriesTexCache[category] or key in self._texFutures:
+            return
+
+        if self._texExecutor is None:
+            self._texExecutor = concurrent.futures.ThreadPoolExecutor(
+                self.peng.cfg["rsrc.async.workers"],
+                thread_name_prefix="peng3d-rsrc",
+            )
+        self._texFutures[key] = self._texExecutor.submit(self._decodeTexAsync, key)
+
+    def _decodeTexAsync(self, key: Tuple[str, str]):
+        # Runs in a worker thread
+        try:
+            return self._decodeTex(key[1])
+        finally:
+            self.peng.call_soon_threadsafe(self._texDecoded, key)
+
+    def _texFutureResult(
+        self, fut: concurrent.futures.Future
+    ) -> Optional["pyglet.image.AbstractImage"]:
+        # Unexpected errors of a worker are only printed, the missing texture is used instead
+        try:
+            return fut.result()
+        except Exception:
+            traceback.print_exc()
+            return None
+
+    def _texDecoded(self, key: Tuple[str, str]):
+        self._texReady.append(key)
+        # Ensures that a frame will be drawn to process the upload
+        self.peng.markDirty()
+
+    def processUploads(self, budget: Optional[float] = None) -> int:
+        """
+        Uploads textures decoded in the background to their texture atlas.
+
+        Uploads happen until ``budget`` seconds have passed, though at least one texture
+        is uploaded per call. Any remaining textures are uploaded during the next call.
+        ``budget`` defaults to :confval:`rsrc.async.budget`\\ , ``None`` disables the limit.
+
+        This method is called automatically at the start of every frame and must only be
+        called from the main thread.
+
+        Returns the number of textures that have been processed.
+        """
+        if not self._texReady:
+            return 0
+        if budget is None:
+            budget = self.peng.cfg["rsrc.async.budget"]
+
+        tracer = self.peng.tracer
+        t = tracer.now() if tracer.enabled else None
+
+        deadline = time.perf_counter() + budget if budget is not None else None
+        n = 0
+        while self._texReady:
+            if n > 0 and deadline is not None and time.perf_counter() >= deadline:
+                break
+            category, name = key = self._texReady.popleft()
+            n += 1
+
+            if key in self._texFutures:
+                # Not already loaded synchronously via getTex() in the meantime
+                img = self._texFutureResult(self._texFutures.pop(key))
+                out = self._uploadTex(name, category, img)
+            else:
+                out = self.categoriesTexCache.get(category, {}).get(name, None)
+                if out is None:
+                    # The category has been reset in the meantime
+                    out = self.getTex(name, category)
+
+            for callback in self._texCallbacks.pop(key, []):
+                callback(out)
+
+        if self._texReady:
+            # Continue on the next frame
+            self.peng.markDirty()
+
+        if t is not None:
+            tracer.complete(
+                "ResourceManager.processUploads",
+                t,
+                "rsrc",
+                {"count": n, "remaining": len(self._texReady)},
+            )
+        return n
+
     def getMissingTexture(self) -> pyglet.image.AbstractImage:
         """
         Returns a texture to be used as a placeholder for missing textures.
@@ -247,13 +676,11 @@ class ResourceManager(object):
         """
         if self.missingTexture is None:
             if self.resourceExists(self.missingtexturename, ".png"):
-                self.missingTexture = pyglet.image.load(
-                    self.resourceNameToPath(self.missingtexturename, ".png")
-                )
+                self.missingTexture = self.loadImage(self.missingtexturename)
                 return self.missingTexture
             else:  # Falls back to create pattern in-memory
                 self.missingTexture = pyglet.image.create(
-                    1, 1, pyglet.image.SolidColorImagePattern([255, 0, 255, 255])
+                    1, 1, pyglet.image.SolidColorImagePattern((255, 0, 255, 255))
                 )
                 return self.missingTexture
         else:
@@ -274,7 +701,8 @@ class ResourceManager(object):
 
         This can be used to add textures that come from non-file sources, e.g. Render-to-texture.
         """
-        texreg = self.categoriesTexBin[category].add(img)
+        texreg = self._addToAtlas(category, img)
+        self._atlasSources[category].discard(name)
         # texreg = texreg.get_transform(True,True) # Mirrors the image due to how pyglets coordinate system works
         # Strange behaviour, sometimes needed and sometimes not
 
@@ -283,12 +711,7 @@ class ResourceManager(object):
         texid = texreg.id
         texcoords = texreg.tex_coords
 
-        # Prevents texture bleeding with texture sizes that are powers of 2, else weird lines may appear at certain angles.
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST_MIPMAP_LINEAR)
-        glGenerateMipmap(GL_TEXTURE_2D)
+        self._markMipmapsDirty(texreg, GL_NEAREST, GL_NEAREST_MIPMAP_LINEAR)
 
         out = target, texid, texcoords
         self.categoriesTexCache[category][name] = out
@@ -315,9 +738,211 @@ class ResourceManager(object):
 
     def getTexSize(self, name: str, category: str) -> Tuple[float, float]:
         if name not in self.categoriesSizes[category]:
-            self.loadTex(name, category)
+            self.getTex(name, category)
         return self.categoriesSizes[category][name]
 
+    def _atlasCacheFile(self, path: str, category: str, ext: str) -> str:
+        # Category names may contain characters not allowed in file names
+        return os.path.join(path, re.sub(r"[^A-Za-z0-9_.-]", "_", category) + ext)
+
+    def loadAtlasCache(self, category: str, path: Optional[str] = None) -> bool:
+        """
+        Fills the given category from its persistent atlas cache.
+
+        The cache of a category consists of the packed atlas textures stored as PNG files
+        and a manifest containing the position and size of each texture within them.
+        Loading it only requires decoding and uploading each atlas once, instead of
+        opening, decoding and packing every texture file individually.
+
+        The cache is only used if the :py:meth:`fingerprint <peng3d.storage.Storage.fingerprint()>`
+        of all texture files it contains still matches, e.g. their modification time and
+        size for loose files, otherwise it is ignored as a whole. Textures not contained
+        in the cache will still be loaded from their files as usual and added to the free
+        space of the cached atlases.
+
+        ``path`` is the directory the cache is stored in and defaults to
+        :confval:`rsrc.atlascache.path`\\ . If it has been set, this method is called
+        automatically on the first access to a category.
+
+        Returns whether the cache has been loaded.
+        """
+        self._atlasCachePending.discard(category)
+        if path is None:
+            path = self.peng.cfg["rsrc.atlascache.path"]
+        if path is None or category not in self.categories:
+            return False
+
+        tracer = self.peng.tracer
+        t = tracer.now() if tracer.enabled else None
+
+        try:
+            with open(self._atlasCacheFile(path, category, ".json"), "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get("version", None) != 2:
+            return False
+
+        # Invalidate the whole cache if any source file has changed
+        for name, entry in manifest["textures"].items():
+            try:
+                fp = self.storage.fingerprint(self.resourceNameToKey(name, ".png"))
+            except OSError:
+                return False
+            if list(fp) != entry["fingerprint"]:
+                return False
+
+        atlases = []
+        for page in manifest["pages"]:
+            try:
+                img = pyglet.image.load(os.path.join(path, page["file"]))
+            except Exception:
+                # pyglet raises different exceptions depending on the decoder used
+                return False
+            atlas = pyglet.image.atlas.TextureAtlas(page["width"], page["height"])
+            if (atlas.texture.width, atlas.texture.height) != (img.width, img.height):
+                # Maximum texture size changed
+                return False
+            atlas.texture.blit_into(img, 0, 0, 0)
+
+            # Replays the allocations, allowing new textures to use the free space
+            allocs = [tuple(a) for a in page["allocs"]]
+            for w, h in allocs:
+                atlas.allocator.alloc(w, h)
+            atlases.append((atlas, allocs))
+
+        # Only modify any state once the whole cache has been validated and loaded
+        bin = self.categoriesTexBin[category]
+        settings = self.categoriesSettings[category]
+        for atlas, allocs in atlases:
+            bin.atlases.append(atlas)
+            self._atlasPages[category][atlas.texture.id] = atlas, allocs
+            self._markMipmapsDirty(
+                atlas.texture, settings["magfilter"], settings["minfilter"], False
+            )
+
+        loaded = []
+        for name, entry in manifest["textures"].items():
+            if name in self.categoriesTexCache[category]:
+                # Added before the cache was loaded
+                continue
+            x, y, w, h = entry["region"]
+            texreg = atlases[entry["page"]][0].texture.get_region(x, y, w, h)
+
+            self.categories[category][name] = texreg
+            self.categoriesSizes[category][name] = tuple(entry["size"])
+            self.categoriesTexCache[category][name] = (
+                texreg.target,
+                texreg.id,
+                texreg.tex_coords,
+            )
+            self._atlasSources[category].add(name)
+            loaded.append(name)
+
+        if t is not None:
+            tracer.complete(
+                "ResourceManager.loadAtlasCache",
+                t,
+                "rsrc",
+                {"category": category, "pages": len(atlases), "count": len(loaded)},
+            )
+
+        for name in loaded:
+            self.peng.sendEvent(
+                "peng3d:rsrc.tex.load",
+                events.TexLoadEventData(self.peng, name, category),
+            )
+        return True
+
+    def saveAtlasCache(self, category: str, path: Optional[str] = None) -> bool:
+        """
+        Stores the atlases of the given category in its persistent atlas cache.
+
+        Only textures loaded from files are stored, textures added via :py:meth:`addFromTex()`
+        or replaced by the missing texture are not.
+
+        ``path`` defaults to :confval:`rsrc.atlascache.path`\\ . If it has been set, this
+        method is called automatically when the last window is closed for every category
+        that contains textures not yet stored in its cache.
+
+        The atlases are read back from the GPU, so a window sharing the texture objects
+        must still be open and its context current.
+
+        See :py:meth:`loadAtlasCache()` for more information.
+
+        Returns whether the cache has been written.
+        """
+        if path is None:
+            path = self.peng.cfg["rsrc.atlascache.path"]
+        if path is None or category not in self.categories:
+            return False
+        os.makedirs(path, exist_ok=True)
+
+        pages = []
+        pageindex = {}
+        for i, (texid, (atlas, allocs)) in enumerate(
+            self._atlasPages[category].items()
+        ):
+            fname = os.path.basename(
+                self._atlasCacheFile(path, category, ".%d.png" % i)
+            )
+            atlas.texture.get_image_data().save(os.path.join(path, fname))
+            pages.append(
+                {
+                    "file": fname,
+                    "width": atlas.texture.width,
+                    "height": atlas.texture.height,
+                    "allocs": allocs,
+                }
+            )
+            pageindex[texid] = i
+
+        textures = {}
+        for name in self._atlasSources[category]:
+            texreg = self.categories[category][name]
+            try:
+                fp = self.storage.fingerprint(self.resourceNameToKey(name, ".png"))
+            except OSError:
+                continue
+            textures[name] = {
+                "page": pageindex[texreg.owner.id],
+                "region": [texreg.x, texreg.y, texreg.width, texreg.height],
+                "tex_coords": list(texreg.tex_coords),
+                "size": list(self.categoriesSizes[category][name]),
+                "fingerprint": list(fp),
+            }
+
+        manifest = {"version": 2, "pages": pages, "textures": textures}
+        fname = self._atlasCacheFile(path, category, ".json")
+        # Written to a temporary file first to never leave a partial manifest behind
+        with open(fname + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(fname + ".tmp", fname)
+
+        # Removes pages left over from a previous cache with more pages
+        prefix = os.path.basename(self._atlasCacheFile(path, category, ""))
+        stale = re.compile(re.escape(prefix) + r"\.(\d+)\.png$")
+        for fname in os.listdir(path):
+            m = stale.match(fname)
+            if m is not None and int(m.group(1)) >= len(pages):
+                try:
+                    os.remove(os.path.join(path, fname))
+                except OSError:
+                    pass
+
+        self._atlasCacheDirty.discard(category)
+        return True
+
+    def _saveAtlasCaches(self, event, data):
+        # Sent before the context of the window is destroyed
+        win = data["window"]
+        if any(w is not win for w in self.peng.windows):
+            # Textures may still be loaded by the remaining windows
+            return
+        win.switch_to()
+        for category in list(self._atlasCacheDirty):
+            self.saveAtlasCache(category)
+
     def getModel(self, name: str) -> model.Model:
         """
         Gets the model object by the given name.
@@ -357,9 +982,9 @@ class ResourceManager(object):
 
         The model file must always be a .json file.
         """
-        path = self.resourceNameToPath(name, ".json")
         try:
-            data = json.load(open(path, "r"))
+            with self.openResource(name, ".json") as f:
+                data = json.loads(f.read().decode("utf-8"))
         except Exception:
             # Temporary
             print("Exception during model load: ")
@@ -0,0 +1,553 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  storage.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+__all__ = [
+    "Storage",
+    "FileStorage",
+    "ArchiveStorage",
+    "OverlayStorage",
+    "packArchive",
+]
+
+import argparse
+import fnmatch
+import glob
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from typing import IO, Dict, List, Optional, Set, Tuple
+
+ARCHIVE_MAGIC = b"P3DA"
+ARCHIVE_VERSION = 1
+
+# magic, version, index offset, index length
+_HEADER = struct.Struct("<4sIQQ")
+
+
+def _globMatch(pattern: str, key: str) -> bool:
+    # Like glob, wildcards never match across path separators
+    psplit = pattern.split("/")
+    ksplit = key.split("/")
+    if len(psplit) != len(ksplit):
+        return False
+    return all(fnmatch.fnmatchcase(k, p) for p, k in zip(psplit, ksplit))
+
+
+class Storage(object):
+    """
+    Base class for storage backends used by :py:class:`~peng3d.resource.ResourceManager`\\ .
+
+    A storage backend maps keys to binary files. Keys are paths relative to the root of
+    the asset tree, always separated by forward slashes, e.g. ``peng3d/gui/button.png``\\ .
+
+    Subclasses need to implement all methods of this class.
+    """
+
+    def exists(self, key: str) -> bool:
+        """
+        Returns whether a file with the given key exists.
+        """
+        raise NotImplementedError("exists() must be implemented by subclasses")
+
+    def open(self, key: str) -> IO[bytes]:
+        """
+        Opens the file with the given key for binary reading.
+
+        :raises FileNotFoundError: if there is no such file
+        """
+        raise NotImplementedError("open() must be implemented by subclasses")
+
+    def read(self, key: str) -> bytes:
+        """
+        Returns the contents of the file with the given key.
+
+        :raises FileNotFoundError: if there is no such file
+        """
+        with self.open(key) as f:
+            return f.read()
+
+    def fingerprint(self, key: str) -> Tuple[int, ...]:
+        """
+        Returns a tuple that changes whenever the contents of the given file change.
+
+        Used to invalidate caches derived from the file, e.g. the atlas cache.
+
+        :raises FileNotFoundError: if there is no such file
+        """
+        raise NotImplementedError("fingerprint() must be implemented by subclasses")
+
+    def glob(self, pattern: str) -> List[str]:
+        """
+        Returns a sorted list of all keys matching the given glob-style pattern.
+
+        As with :py:mod:`glob`\\ , wildcards do not match the ``/`` separator.
+        """
+        raise NotImplementedError("glob() must be implemented by subclasses")
+
+    def keys(self) -> Set[str]:
+        """
+        Returns the set of all keys in this backend.
+
+        The returned set must not be modified.
+        """
+        raise NotImplementedError("keys() must be implemented by subclasses")
+
+    def path(self, key: str) -> Optional[str]:
+        """
+        Returns the file system path of the given key, or ``None`` if the backend does
+        not store files as loose files.
+        """
+        return None
+
+    def refresh(self) -> Set[str]:
+        """
+        Updates any index of the backend to reflect files that have been added or removed.
+
+        Returns the set of keys that have been added or removed.
+        """
+        return set()
+
+    def close(self) -> None:
+        """
+        Releases any resources held by this backend.
+        """
+        pass
+
+
+class FileStorage(Storage):
+    """
+    Storage backend reading loose files from a directory.
+
+    This is the default backend, with ``root`` being the ``assets`` folder within
+    :confval:`rsrc.basepath`\\ .
+
+    If ``index`` is true, the whole directory tree is scanned once and kept in memory,
+    turning :py:meth:`exists()` and :py:meth:`glob()` into lookups that do not access
+    the file system. Files added or removed afterwards are only picked up by
+    :py:meth:`refresh()`\\ , which only rescans directories whose modification time
+    has changed. The index is also built on the first call to :py:meth:`keys()`\\ .
+    """
+
+    def __init__(self, root: str, index: bool = False):
+        self.root: str = root
+
+        self._keys: Optional[Set[str]] = None
+        # Maps directory key -> (mtime, file keys, subdirectory keys), "" is the root
+        self._dirs: Dict[str, Tuple[int, Set[str], Set[str]]] = {}
+        if index:
+            self._buildIndex()
+
+    @property
+    def indexed(self) -> bool:
+        """
+        Whether the directory tree is currently indexed.
+        """
+        return self._keys is not None
+
+    def path(self, key: str) -> str:
+        """
+        Returns the file system path of the given key.
+        """
+        return os.path.join(self.root, *key.split("/"))
+
+    def _buildIndex(self) -> None:
+        self._keys = set()
+        self._dirs = {}
+        self._scanDir("")
+
+    def _scanDir(self, dirkey: str) -> bool:
+        # Scans the given directory and any subdirectories not indexed yet
+        path = self.path(dirkey) if dirkey else self.root
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except OSError:
+            return False
+
+        files, subdirs = set(), set()
+        prefix = dirkey + "/" if dirkey else ""
+        for entry in entries:
+            if entry.is_dir():
+                subdirs.add(prefix + entry.name)
+            else:
+                files.add(prefix + entry.name)
+        self._dirs[dirkey] = mtime, files, subdirs
+        self._keys |= files
+
+        for subdir in subdirs:
+            if subdir not in self._dirs:
+                self._scanDir(subdir)
+        return True
+
+    def _forgetDir(self, dirkey: str, changed: Set[str]) -> None:
+        mtime, files, subdirs = self._dirs.pop(dirkey)
+        self._keys -= files
+        changed |= files
+        for subdir in subdirs:
+            if subdir in self._dirs:
+                self._forgetDir(subdir, changed)
+
+    def refresh(self) -> Set[str]:
+        if self._keys is None:
+            return set()
+
+        old = set(self._keys)
+        changed = set()
+        for dirkey in list(self._dirs.keys()):
+            if dirkey not in self._dirs:
+                # Already removed as part of its parent
+                continue
+            path = self.path(dirkey) if dirkey else self.root
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            oldmtime, oldfiles, oldsubdirs = self._dirs[dirkey]
+            if mtime == oldmtime:
+                continue
+
+            # Only this directory is rescanned, unchanged subdirectories are kept
+            self._keys -= oldfiles
+            changed |= oldfiles
+            if mtime is None or not self._scanDir(dirkey):
+                self._forgetDir(dirkey, changed)
+                continue
+            for subdir in oldsubdirs - self._dirs[dirkey][2]:
+                if subdir in self._dirs:
+                    self._forgetDir(subdir, changed)
+
+        # Keys that were only rescanned did not change
+        return (changed - self._keys) | (self._keys - old)
+
+    def keys(self) -> Set[str]:
+        if self._keys is None:
+            self._buildIndex()
+        return self._keys
+
+    def exists(self, key: str) -> bool:
+        if self._keys is not None:
+            return key in self._keys
+        return os.path.exists(self.path(key))
+
+    def open(self, key: str) -> IO[bytes]:
+        return open(self.path(key), "rb")
+
+    def fingerprint(self, key: str) -> Tuple[int, int]:
+        st = os.stat(self.path(key))
+        return st.st_mtime_ns, st.st_size
+
+    def glob(self, pattern: str) -> List[str]:
+        if self._keys is not None:
+            return sorted(k for k in self._keys if _globMatch(pattern, k))
+        out = []
+        for path in glob.iglob(self.path(pattern)):
+            out.append(os.path.relpath(path, self.root).replace(os.sep, "/"))
+        return sorted(out)
+
+    def __repr__(self):
+        return "FileStorage(%r)" % self.root
+
+
+class ArchiveStorage(Storage):
+    """
+    Storage backend reading from a single, memory-mapped archive file.
+
+    Archives contain the files of a whole asset tree and a central index mapping each
+    key to the offset, length and CRC32 checksum of its data. Looking up files thus does
+    not require any file system access, which is much faster than opening many small
+    files, especially on slow network drives.
+
+    Archives are created via :py:func:`packArchive()` or from the command line::
+
+        python -m peng3d.storage pack path/to/assets assets.p3da
+
+    Reading files is thread-safe.
+
+    :raises ValueError: if the file is not a valid archive
+    """
+
+    def __init__(self, filename: str):
+        self.filename: str = filename
+
+        with open(filename, "rb") as f:
+            self._mm: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mm) < _HEADER.size:
+            self._mm.close()
+            raise ValueError("File %r is too small to be an archive" % filename)
+        magic, version, offset, length = _HEADER.unpack_from(self._mm, 0)
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            self._mm.close()
+            raise ValueError(
+                "File %r is not a version %d archive" % (filename, ARCHIVE_VERSION)
+            )
+
+        index = json.loads(self._mm[offset : offset + length].decode("utf-8"))
+        # Maps key -> (offset, length, crc32)
+        self.index: Dict[str, Tuple[int, int, int]] = {
+            k: tuple(v) for k, v in index["files"].items()
+        }
+
+    def exists(self, key: str) -> bool:
+        return key in self.index
+
+    def open(self, key: str) -> IO[bytes]:
+        return io.BytesIO(self.read(key))
+
+    def read(self, key: str) -> bytes:
+        try:
+            offset, length, crc = self.index[key]
+        except KeyError:
+            raise FileNotFoundError("No file %r in archive %r" % (key, self.filename))
+        return self._mm[offset : offset + length]
+
+    def fingerprint(self, key: str) -> Tuple[int, int]:
+        try:
+            offset, length, crc = self.index[key]
+        except KeyError:
+            raise FileNotFoundError("No file %r in archive %r" % (key, self.filename))
+        return crc, length
+
+    def glob(self, pattern: str) -> List[str]:
+        return sorted(k for k in self.index if _globMatch(pattern, k))
+
+    def keys(self) -> Set[str]:
+        return self.index.keys()
+
+    def verify(self) -> List[str]:
+        """
+        Checks the checksums of all files in the archive.
+
+        Returns a list of keys whose data is corrupted.
+        """
+        bad = []
+        for key, (offset, length, crc) in sorted(self.index.items()):
+            if zlib.crc32(self._mm[offset : offset + length]) != crc:
+                bad.append(key)
+        return bad
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __repr__(self):
+        return "ArchiveStorage(%r)" % self.filename
+
+
+class OverlayStorage(Storage):
+    """
+    Storage backend combining multiple backends, called roots, into one.
+
+    If a file exists in multiple roots, the one in the root coming first in ``roots``
+    is used. This allows e.g. mods to override single assets of a game by adding their
+    own asset folder in front of the one of the game, without copying the whole tree.
+
+    An index mapping each key to its root is built once, meaning that looking up files
+    does not require any file system access. Call :py:meth:`refresh()` to pick up
+    files added to or removed from any root.
+
+    :py:class:`FileStorage` roots are indexed automatically.
+    """
+
+    def __init__(self, roots: List[Storage]):
+        self.roots: List[Storage] = list(roots)
+        # Maps key -> index of the root it is read from
+        self._owners: Dict[str, int] = {}
+        self._buildIndex()
+
+    def _buildIndex(self) -> None:
+        owners = {}
+        # Iterating in reverse lets earlier roots override later ones
+        for i in range(len(self.roots) - 1, -1, -1):
+            owners.update(dict.fromkeys(self.roots[i].keys(), i))
+        self._owners = owners
+
+    def addRoot(self, storage: Storage, index: int = 0) -> None:
+        """
+        Inserts a new root at the given position of :py:attr:`roots`\\ .
+
+        By default, the new root takes precedence over all existing roots.
+        """
+        self.roots.insert(index, storage)
+        self._buildIndex()
+
+    def removeRoot(self, storage: Storage) -> None:
+        """
+        Removes the given root.
+
+        :raises ValueError: if ``storage`` is not a root of this overlay
+        """
+        self.roots.remove(storage)
+        self._buildIndex()
+
+    def owner(self, key: str) -> Optional[Storage]:
+        """
+        Returns the root the file with the given key is read from, or ``None`` if it
+        does not exist.
+        """
+        i = self._owners.get(key, None)
+        return self.roots[i] if i is not None else None
+
+    def _get(self, key: str) -> Tuple[int, Storage]:
+        try:
+            i = self._owners[key]
+        except KeyError:
+            raise FileNotFoundError("No file %r in any root" % key)
+        return i, self.roots[i]
+
+    def exists(self, key: str) -> bool:
+        return key in self._owners
+
+    def open(self, key: str) -> IO[bytes]:
+        return self._get(key)[1].open(key)
+
+    def read(self, key: str) -> bytes:
+        return self._get(key)[1].read(key)
+
+    def fingerprint(self, key: str) -> Tuple[int, ...]:
+        i, root = self._get(key)
+        # Includes the root to detect e.g. a newly added override
+        return (i,) + tuple(root.fingerprint(key))
+
+    def glob(self, pattern: str) -> List[str]:
+        return sorted(k for k in self._owners if _globMatch(pattern, k))
+
+    def keys(self) -> Set[str]:
+        return self._owners.keys()
+
+    def path(self, key: str) -> Optional[str]:
+        root = self.owner(key)
+        return root.path(key) if root is not None else None
+
+    def refresh(self) -> Set[str]:
+        changed = set()
+        for root in self.roots:
+            changed |= root.refresh()
+
+        for key in changed:
+            for i, root in enumerate(self.roots):
+                if root.exists(key):
+                    self._owners[key] = i
+                    break
+            else:
+                self._owners.pop(key, None)
+        return changed
+
+    def close(self) -> None:
+        for root in self.roots:
+            root.close()
+
+    def __repr__(self):
+        return "OverlayStorage(%r)" % self.roots
+
+
+def packArchive(root: str, filename: str) -> int:
+    """
+    Packs all files below the directory ``root`` into a new archive at ``filename``\\ .
+
+    Keys are the paths of the files relative to ``root``\\ , meaning that ``root`` should
+    usually be the ``assets`` folder of an application.
+
+    Files are stored in sorted order, making archives of the same tree reproducible.
+
+    Returns the number of files packed.
+    """
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            path = os.path.join(dirpath, fname)
+            files.append((os.path.relpath(path, root).replace(os.sep, "/"), path))
+
+    index = {}
+    # Written to a temporary file first to never leave a partial archive behind
+    with open(filename + ".tmp", "wb") as out:
+        out.write(b"\0" * _HEADER.size)
+        offset = _HEADER.size
+        for key, path in files:
+            with open(path, "rb") as f:
+                data = f.read()
+            out.write(data)
+            index[key] = [offset, len(data), zlib.crc32(data)]
+            offset += len(data)
+
+        idata = json.dumps({"files": index}, sort_keys=True).encode("utf-8")
+        out.write(idata)
+        out.seek(0)
+        out.write(_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, offset, len(idata)))
+    os.replace(filename + ".tmp", filename)
+
+    return len(files)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m peng3d.storage", description="Manages peng3d asset archives"
+    )
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    p = sub.add_parser("pack", help="Packs an assets folder into an archive")
+    p.add_argument("root", help="Assets folder to pack")
+    p.add_argument("archive", help="Archive file to create")
+
+    p = sub.add_parser("list", help="Lists the files in an archive")
+    p.add_argument("archive")
+
+    p = sub.add_parser("verify", help="Checks the checksums of an archive")
+    p.add_argument("archive")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        n = packArchive(args.root, args.archive)
+        print("Packed %d files into %s" % (n, args.archive))
+        return 0
+
+    storage = ArchiveStorage(args.archive)
+    try:
+        if args.command == "list":
+            for key in sorted(storage.index):
+                print("%8d  %s" % (storage.index[key][1], key))
+            return 0
+
+        bad = storage.verify()
+        for key in bad:
+            print("Corrupted: %s" % key)
+        print("%d of %d files OK" % (len(storage) - len(bad), len(storage)))
+        return 1 if bad else 0
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
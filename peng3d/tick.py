@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  tick.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+__all__ = [
+    "TickScheduler",
+    "TickSystem",
+]
+
+import time
+
+from typing import Callable, List, Optional, Dict, Union, Tuple, Any, TYPE_CHECKING
+
+try:
+    import pyglet
+
+    _have_pyglet = True
+except ImportError:
+    _have_pyglet = False
+
+# Tolerance for comparing accumulated simulation time, since repeatedly adding
+# e.g. 1/60 will not exactly add up to whole steps
+_EPSILON = 1e-9
+
+if TYPE_CHECKING:
+    import peng3d
+
+
+class TickSystem(object):
+    """
+    Handle of a system registered with :py:meth:`TickScheduler.add()`\\ .
+
+    The handle may be used to remove the system again via :py:meth:`remove()`\\ .
+    """
+
+    __slots__ = [
+        "scheduler",
+        "func",
+        "name",
+        "priority",
+        "interval",
+        "seq",
+        "acc",
+        "calls",
+        "time",
+        "active",
+    ]
+
+    def __init__(
+        self,
+        scheduler: "TickScheduler",
+        func: Callable[[float], Any],
+        name: str,
+        priority: int,
+        interval: Optional[float],
+        seq: int,
+    ):
+        self.scheduler: "TickScheduler" = scheduler
+        self.func: Callable[[float], Any] = func
+        self.name: str = name
+        self.priority: int = priority
+        self.interval: Optional[float] = interval
+        self.seq: int = seq
+
+        # Simulated time accumulated towards the next call, only used with an interval
+        self.acc: float = 0.0
+        self.calls: int = 0
+        self.time: float = 0.0
+        self.active: bool = True
+
+    def remove(self) -> bool:
+        """
+        Removes this system from its scheduler.
+
+        See :py:meth:`TickScheduler.remove()` for more information.
+        """
+        return self.scheduler.remove(self)
+
+    def __repr__(self):
+        return "TickSystem(%r, priority=%d)" % (self.name, self.priority)
+
+
+class TickScheduler(object):
+    """
+    Central fixed-timestep scheduler for simulation code.
+
+    Instead of scheduling one pyglet clock entry per object, simulation code like
+    controllers and animations registers itself as a *system* via :py:meth:`add()`\\ .
+    The scheduler itself only uses a single clock entry and advances the simulation
+    in fixed steps of :py:attr:`step` seconds, independent of the framerate.
+
+    Systems are always run in a deterministic order, sorted by ``priority`` first and
+    registration order second. Every system is called with the simulated time since its
+    last call, which is always :py:attr:`step` for systems without an ``interval``\\ .
+
+    If the application falls behind, e.g. due to a slow frame, at most ``maxsteps`` steps
+    are run to catch up. Any further time is dropped and counted in :py:attr:`dropped`\\ ,
+    preventing the simulation from getting slower and slower.
+
+    Rendering code may use :py:attr:`alpha` to interpolate between the last two
+    simulation states, as the current frame usually lies between two steps.
+
+    All steps are recorded as a single ``tick`` phase in :py:attr:`Peng.profiler <peng3d.peng.Peng.profiler>`
+    and as a span per step in :py:attr:`Peng.tracer <peng3d.peng.Peng.tracer>`\\ , if enabled.
+    Per-system timings are always collected and available via :py:meth:`stats()`\\ .
+
+    The rate and catch-up limit may be configured via :confval:`simulation.tickrate` and
+    :confval:`simulation.maxsteps`\\ .
+    """
+
+    def __init__(
+        self,
+        peng: Optional["peng3d.peng.Peng"] = None,
+        rate: float = 60.0,
+        maxsteps: int = 5,
+    ):
+        if rate <= 0:
+            raise ValueError("Tick rate must be positive")
+        if maxsteps < 1:
+            raise ValueError("maxsteps must be at least 1")
+
+        self.peng: Optional["peng3d.peng.Peng"] = peng
+        self.step: float = 1.0 / rate
+        self.maxsteps: int = maxsteps
+
+        self.ticks: int = 0
+        self.time: float = 0.0
+        self.dropped: float = 0.0
+        self.enabled: bool = True
+
+        self._acc: float = 0.0
+        self._seq: int = 0
+        self._systems: List[TickSystem] = []
+        self._scheduled: bool = False
+
+    @property
+    def rate(self) -> float:
+        """
+        Number of simulation steps per second.
+        """
+        return 1.0 / self.step
+
+    @property
+    def alpha(self) -> float:
+        """
+        Fraction of a step that has elapsed since the last simulation step.
+
+        Always in the range ``[0, 1)`` and intended for interpolating rendered state via
+        ``prev + (cur - prev) * alpha``\\ .
+        """
+        return self._acc / self.step
+
+    @property
+    def systems(self) -> List[TickSystem]:
+        """
+        List of all registered systems, in the order they are run.
+        """
+        return list(self._systems)
+
+    def add(
+        self,
+        func: Callable[[float], Any],
+        priority: int = 0,
+        interval: Optional[float] = None,
+        name: Optional[str] = None,
+    ) -> TickSystem:
+        """
+        Registers a system that should be run every simulation step.
+
+        ``func`` will be called with the simulated time in seconds since its last call.
+
+        Systems with a lower ``priority`` are run first, systems with equal priority are
+        run in the order they were added.
+
+        If ``interval`` is given, the system is run only every ``interval`` seconds of
+        simulated time instead of every step. This is useful for e.g. animations with a
+        lower keyframe rate than the tick rate.
+
+        ``name`` is used in :py:meth:`stats()` and traces and defaults to the qualified
+        name of ``func``\\ .
+
+        Returns a :py:class:`TickSystem` handle that may be passed to :py:meth:`remove()`\\ .
+        """
+        if interval is not None and interval <= 0:
+            raise ValueError("Interval must be positive")
+        if name is None:
+            name = getattr(func, "__qualname__", None) or repr(func)
+
+        system = TickSystem(self, func, name, priority, interval, self._seq)
+        self._seq += 1
+
+        self._systems.append(system)
+        self._systems.sort(key=lambda s: (s.priority, s.seq))
+
+        self.start()
+        return system
+
+    def remove(self, system: Union[TickSystem, Callable]) -> bool:
+        """
+        Removes a system previously registered via :py:meth:`add()`\\ .
+
+        ``system`` may either be the handle returned by :py:meth:`add()` or the function
+        itself, in which case all systems calling that function are removed.
+
+        It is safe to remove systems from within a running system.
+
+        Returns whether any system was removed.
+        """
+        if isinstance(system, TickSystem):
+            matches = [system] if system in self._systems else []
+        else:
+            matches = [s for s in self._systems if s.func == system]
+
+        for s in matches:
+            s.active = False
+        if matches:
+            # Replace the list instead of modifying it, since tick() may be iterating it
+            self._systems = [s for s in self._systems if s.active]
+        return len(matches) > 0
+
+    def start(self) -> None:
+        """
+        Schedules :py:meth:`tick()` on the pyglet clock.
+
+        This is done automatically when the first system is added and does nothing if
+        pyglet is not available.
+        """
+        if self._scheduled or not _have_pyglet:
+            return
+        pyglet.clock.schedule_interval(self.tick, self.step)
+        self._scheduled = True
+
+    def stop(self) -> None:
+        """
+        Removes :py:meth:`tick()` from the pyglet clock.
+
+        Registered systems are kept, the simulation may be resumed via :py:meth:`start()`\\ .
+        """
+        if not self._scheduled:
+            return
+        pyglet.clock.unschedule(self.tick)
+        self._scheduled = False
+
+    def tick(self, dt: float) -> int:
+        """
+        Advances the simulation by ``dt`` seconds of real time.
+
+        Runs as many fixed steps as fit into the accumulated time, but at most
+        :py:attr:`maxsteps`\\ . The remainder is kept for the next call and reflected in
+        :py:attr:`alpha`\\ .
+
+        Called automatically by the pyglet clock, but may also be called manually, e.g. to
+        drive the simulation from tests or a custom main loop.
+
+        Returns the number of steps that were run.
+        """
+        if not self.enabled:
+            return 0
+
+        self._acc += dt
+        steps = int(self._acc / self.step + _EPSILON)
+        if steps > self.maxsteps:
+            # Fell too far behind, drop the excess instead of spiraling
+            self.dropped += (steps - self.maxsteps) * self.step
+            self._acc -= (steps - self.maxsteps) * self.step
+            steps = self.maxsteps
+        if steps == 0:
+            return 0
+
+        profiler = self.peng.profiler if self.peng is not None else None
+        pt = profiler.now() if profiler is not None and profiler.enabled else None
+
+        for _ in range(steps):
+            self._acc -= self.step
+            self._step()
+
+        # Guard against floating point error accumulating to slightly below zero
+        if self._acc < 0.0:
+            self._acc = 0.0
+
+        if pt is not None:
+            profiler.add("tick", pt)
+        return steps
+
+    def _step(self) -> None:
+        tracer = self.peng.tracer if self.peng is not None else None
+        t = tracer.now() if tracer is not None and tracer.enabled else None
+
+        step = self.step
+        now = time.perf_counter
+        for system in self._systems:
+            if not system.active:
+                # Removed by a previous system during this step
+                continue
+
+            if system.interval is None:
+                calls, sdt = 1, step
+            else:
+                system.acc += step
+                calls, sdt = 0, system.interval
+                while system.acc >= system.interval - _EPSILON:
+                    system.acc -= system.interval
+                    calls += 1
+
+            for _ in range(calls):
+                st = now()
+                system.func(sdt)
+                system.time += now() - st
+                system.calls += 1
+
+        self.ticks += 1
+        self.time += step
+
+        if t is not None:
+            tracer.complete("TickScheduler.step", t, "tick", {"tick": self.ticks})
+
+    def stats(self) -> Dict[str, Tuple[int, float]]:
+        """
+        Returns a dictionary mapping system names to a tuple of ``(calls, total)``\\ ,
+        where ``total`` is the time spent in the system in seconds.
+
+        Systems sharing a name are combined.
+        """
+        out = {}
+        for s in self._systems:
+            calls, total = out.get(s.name, (0, 0.0))
+            out[s.name] = (calls + s.calls, total + s.time)
+        return out
+
+    def __len__(self):
+        return len(self._systems)
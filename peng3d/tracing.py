@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  tracing.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+__all__ = [
+    "Tracer",
+    "FrameProfiler",
+]
+
+import collections
+import json
+import os
+import threading
+import time
+
+from typing import Dict, List, Optional, Any, Deque, Tuple, Union, IO
+
+
+class Tracer(object):
+    """
+    Records trace events in the Chrome trace event format.
+
+    Traces exported via :py:meth:`dump()` may be loaded in `Perfetto <https://ui.perfetto.dev>`_
+    or ``about:tracing`` in Chromium-based browsers.
+
+    Recorded events are kept in a ring buffer of ``maxsize`` entries, meaning that only
+    the most recent events are kept. This allows tracing to stay enabled for long periods
+    of time, e.g. to dump the trace after a slow frame has been detected.
+
+    Tracing may be toggled at any time via the :py:attr:`enabled` attribute. To avoid any
+    overhead while disabled, instrumented code should look like this::
+
+        tracer = peng.tracer
+        t = tracer.now() if tracer.enabled else None
+        # Do the actual work
+        if t is not None:
+            tracer.complete("name", t)
+
+    Events may be recorded from any thread, since appending to the ring buffer is atomic.
+    """
+
+    def __init__(self, enabled: bool = False, maxsize: int = 100000):
+        self.enabled: bool = enabled
+
+        # Entries are (phase, name, category, timestamp, duration, thread id, args)
+        self._buffer: Deque[Tuple] = collections.deque(maxlen=maxsize)
+        self._t0: float = time.perf_counter()
+        self._pid: int = os.getpid()
+
+    @property
+    def maxsize(self) -> int:
+        """
+        Maximum number of events kept in the ring buffer.
+        """
+        return self._buffer.maxlen
+
+    def now(self) -> float:
+        """
+        Returns the current timestamp as used by this tracer, in microseconds.
+        """
+        return (time.perf_counter() - self._t0) * 1e6
+
+    def complete(
+        self,
+        name: str,
+        start: float,
+        cat: str = "peng3d",
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Records a span named ``name`` that started at ``start`` and ends now.
+
+        ``start`` must have been obtained via :py:meth:`now()`\\ .
+
+        ``cat`` is the category of the event, which may be used to filter events in the
+        trace viewer. ``args`` may be a dictionary of JSON-serializable values that will
+        be shown alongside the event.
+        """
+        self._buffer.append(
+            (
+                "X",
+                name,
+                cat,
+                start,
+                self.now() - start,
+                threading.get_ident(),
+                args,
+            )
+        )
+
+    def instant(
+        self, name: str, cat: str = "peng3d", args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Records an instant event named ``name``\\ , e.g. a single occurrence without duration.
+        """
+        self._buffer.append(
+            ("i", name, cat, self.now(), None, threading.get_ident(), args)
+        )
+
+    def counter(self, name: str, values: Dict[str, float], cat: str = "peng3d") -> None:
+        """
+        Records the current values of the counter ``name``\\ .
+
+        ``values`` maps series names to their values, which will be shown as a stacked graph.
+        """
+        self._buffer.append(
+            ("C", name, cat, self.now(), None, threading.get_ident(), values)
+        )
+
+    def clear(self) -> None:
+        """
+        Discards all recorded events.
+        """
+        self._buffer.clear()
+
+    def events(self) -> List[Dict[str, Any]]:
+        """
+        Returns a list of all recorded events as trace event dictionaries, oldest first.
+        """
+        out = []
+        for ph, name, cat, ts, dur, tid, args in list(self._buffer):
+            ev = {
+                "ph": ph,
+                "name": name,
+                "cat": cat,
+                "ts": ts,
+                "pid": self._pid,
+                "tid": tid,
+            }
+            if dur is not None:
+                ev["dur"] = dur
+            if ph == "i":
+                ev["s"] = "t"
+            if args is not None:
+                ev["args"] = args
+            out.append(ev)
+        return out
+
+    def dump(self, f: Union[str, IO[str]]) -> None:
+        """
+        Writes all recorded events to the given file path or file-like object as JSON.
+
+        The ring buffer is not cleared by this method.
+        """
+        data = {"traceEvents": self.events(), "displayTimeUnit": "ms"}
+        if isinstance(f, str):
+            with open(f, "w") as fo:
+                json.dump(data, fo)
+        else:
+            json.dump(data, f)
+
+    def __len__(self):
+        return len(self._buffer)
+
+
+class FrameProfiler(object):
+    """
+    Collects the time spent in the phases of each frame.
+
+    Unlike :py:class:`Tracer`\\ , which records individual spans, this class sums up the
+    time spent per phase within a frame. The results of the most recent ``maxframes``
+    frames are kept in a ring buffer and may be accessed via :py:meth:`frames()` and
+    :py:meth:`averages()`\\ . Additionally, the time spent redrawing each widget is
+    collected, see :py:meth:`slowestWidgets()`\\ .
+
+    The following phases are recorded by peng3d itself:
+
+    - ``events.ratelimited`` and ``events.queue`` for pumping rate-limited and queued events
+    - ``layer.redraw``\\ , ``layer.predraw``\\ , ``layer.draw`` and ``layer.postdraw`` for all layers
+    - ``submenu.bg`` for drawing the background of submenus
+    - ``submenu.redraw`` for redrawing widgets marked via :py:meth:`Widget.redraw() <peng3d.gui.widgets.BasicWidget.redraw()>`
+    - ``submenu.batch`` for drawing the batch of submenus
+    - ``submenu.draw`` for calling the custom ``draw()`` methods of widgets
+
+    Note that phases may overlap, e.g. a layer used as a submenu background is counted
+    both within ``submenu.bg`` and the ``layer.*`` phases.
+
+    Profiling may be toggled at any time via the :py:attr:`enabled` attribute. Instrumented
+    code should look like this to avoid any overhead while disabled::
+
+        profiler = peng.profiler
+        t = profiler.now() if profiler.enabled else None
+        # First phase
+        if t is not None:
+            t = profiler.add("first", t)
+        # Second phase
+        if t is not None:
+            profiler.add("second", t)
+    """
+
+    def __init__(self, enabled: bool = False, maxframes: int = 240):
+        self.enabled: bool = enabled
+
+        # Entries are (frame time, {phase: time})
+        self._frames: Deque[Tuple[float, Dict[str, float]]] = collections.deque(
+            maxlen=maxframes
+        )
+        # Maps widget name -> [count, total, max]
+        self._widgets: Dict[str, List] = {}
+
+        self._current: Optional[Dict[str, float]] = None
+        self._start: float = 0.0
+
+    @property
+    def maxframes(self) -> int:
+        """
+        Maximum number of frames kept in the ring buffer.
+        """
+        return self._frames.maxlen
+
+    now = staticmethod(time.perf_counter)
+
+    def beginFrame(self) -> None:
+        """
+        Marks the start of a frame.
+
+        Called automatically by :py:class:`~peng3d.window.PengWindow`\\ .
+        """
+        self._current = {}
+        self._start = time.perf_counter()
+
+    def endFrame(self, keep: bool = True) -> None:
+        """
+        Marks the end of a frame and stores its timings.
+
+        If ``keep`` is false, the frame is discarded, e.g. because nothing was drawn.
+        """
+        current = self._current
+        if current is None:
+            return
+        self._current = None
+        if keep:
+            self._frames.append((time.perf_counter() - self._start, current))
+
+    def add(self, phase: str, start: float) -> float:
+        """
+        Adds the time since ``start`` to the given phase of the current frame.
+
+        ``start`` must have been obtained via :py:meth:`now()`\\ .
+
+        Returns the current time, which may be used as the start of the next phase.
+        """
+        now = time.perf_counter()
+        current = self._current
+        if current is not None:
+            current[phase] = current.get(phase, 0.0) + (now - start)
+        return now
+
+    def addWidget(self, name: str, start: float) -> float:
+        """
+        Records a redraw of the widget with the given name that started at ``start``\\ .
+
+        Returns the current time.
+        """
+        now = time.perf_counter()
+        dt = now - start
+        stats = self._widgets.get(name, None)
+        if stats is None:
+            self._widgets[name] = [1, dt, dt]
+        else:
+            stats[0] += 1
+            stats[1] += dt
+            if dt > stats[2]:
+                stats[2] = dt
+        return now
+
+    def reset(self) -> None:
+        """
+        Discards all collected data.
+        """
+        self._frames.clear()
+        self._widgets.clear()
+
+    def frames(self) -> List[Dict[str, Any]]:
+        """
+        Returns the timings of all frames in the ring buffer, oldest first.
+
+        Each frame is a dictionary with the keys ``time``\\ , containing the total time of
+        the frame, and ``phases``\\ , a dictionary mapping phase names to their time.
+        All times are in seconds.
+        """
+        return [{"time": t, "phases": dict(phases)} for t, phases in self._frames]
+
+    def frameTimes(self) -> List[float]:
+        """
+        Returns the total times of all frames in the ring buffer, oldest first.
+        """
+        return [t for t, _ in self._frames]
+
+    def averages(self) -> Dict[str, float]:
+        """
+        Returns the average time per frame of each phase over the ring buffer.
+
+        The key ``frame`` contains the average total time of a frame.
+        """
+        n = len(self._frames)
+        if n == 0:
+            return {}
+        out = {"frame": 0.0}
+        for t, phases in self._frames:
+            out["frame"] += t
+            for phase, dt in phases.items():
+                out[phase] = out.get(phase, 0.0) + dt
+        return {phase: total / n for phase, total in out.items()}
+
+    def slowestWidgets(self, n: int = 5) -> List[Tuple[str, int, float, float]]:
+        """
+        Returns the ``n`` widgets that spent the most time redrawing.
+
+        Each entry is a tuple of ``(name, count, total, max)``\\ , sorted by total time.
+        """
+        widgets = sorted(self._widgets.items(), key=lambda i: i[1][1], reverse=True)
+        return [(name, c, total, tmax) for name, (c, total, tmax) in widgets[:n]]
+
+    def __len__(self):
+        return len(self._frames)
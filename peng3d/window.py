@@ -22,22 +22,22 @@
 #
 #
 
-__all__ = ["PengWindow"]
+__all__ = ["PengWindow", "FramePacer", "PengEventLoop"]
 
 import math
 import time
-import traceback
 import weakref
 import inspect
+import asyncio
 
 import pyglet
 from pyglet.gl import *
 from pyglet.window import key
 
-from . import config, camera
+from . import config, camera, events, glstate
 from .util.gui import Position
 
-from typing import TYPE_CHECKING, Dict, Optional, Union, Tuple
+from typing import TYPE_CHECKING, Dict, Optional, Union, Tuple, List, Callable
 
 if TYPE_CHECKING:
     import peng3d
@@ -53,6 +53,18 @@ class PengWindow(pyglet.window.Window):
     This class should not be instantiated directly, use the :py:meth:`Peng.createWindow()` method.
     """
 
+    # Defined on class level, since pyglet dispatches events during __init__()
+    inputRecorder: Optional["peng3d.replay.InputRecorder"] = None
+    """
+    Recorder that all events dispatched by this window are passed to, if not ``None``\\ .
+    """
+
+    _dispatchTable: Optional[events.DispatchTable] = None
+
+    # Also defined on class level, since pyglet may call on_resize() etc. during __init__()
+    _dirty: bool = True
+    _skipFlip: bool = False
+
     def __init__(self, peng: "peng3d.Peng", *args, **kwargs):
         if peng.cfg["graphics.stencil.enable"]:
             glconfig = pyglet.gl.Config(stencil_size=peng.cfg["graphics.stencil.bits"])
@@ -67,10 +79,29 @@ class PengWindow(pyglet.window.Window):
         self.activeMenu: Optional[str] = None
 
         self.cfg: config.Config = config.Config({}, defaults=peng.cfg)
-        self.eventHandlers = {}
+        self.eventHandlers: events.ListenerRegistry = events.ListenerRegistry(
+            peng.eventMetrics
+        )
+        self.rateLimiter: events.RateLimiter = events.RateLimiter(peng.eventMetrics)
+        self._dispatchTable = events.DispatchTable(self._eventScopes, peng.eventMetrics)
 
         self.cur_fps: Optional[float] = None
-        self._last_render = time.monotonic()
+        self.pacer: Optional[FramePacer] = None
+        """
+        Frame scheduler used if a frame rate limit is set, see :py:meth:`set_fps()`\\ .
+        """
+
+        self.damageTracking: bool = self.cfg["graphics.damage.enable"]
+        """
+        Whether the window is only redrawn if something changed, see :confval:`graphics.damage.enable`\\ .
+        """
+
+        self.glstate: glstate.GLStateCache = glstate.GLStateCache(
+            self.cfg["graphics.glstate.cache"]
+        )
+        """
+        Cache of the OpenGL state used to skip redundant state changes, see :py:class:`~peng3d.glstate.GLStateCache`\\ .
+        """
 
         self._setup = False
 
@@ -168,13 +199,49 @@ class PengWindow(pyglet.window.Window):
         ``evloop`` may optionally be a subclass of :py:class:`pyglet.app.base.EventLoop` to replace the default event loop.
         """
         self.setup()
-        self.cur_fps = self.cfg["graphics.default_fps"]
 
         if evloop is not None:
             pyglet.app.event_loop = evloop
+        # Needs to happen after the event loop has been replaced to use the correct clock
+        self.set_fps(self.cfg["graphics.default_fps"])
 
         pyglet.app.run()  # This currently just calls the basic pyglet main loop, maybe implement custom main loop for more control
 
+    async def run_async(self, evloop: Optional["pyglet.app.EventLoop"] = None) -> None:
+        """
+        Coroutine variant of :py:meth:`run()` that runs the application within the currently running :py:mod:`asyncio` event loop.
+
+        This method should not be called directly, use :py:meth:`Peng.run_async()` instead.
+
+        Mirrors :py:meth:`pyglet.app.EventLoop.run()`\\ , but instead of blocking while waiting
+        for window events or scheduled functions, control is returned to asyncio.
+        """
+        self.setup()
+
+        if evloop is not None:
+            pyglet.app.event_loop = evloop
+        evloop = pyglet.app.event_loop
+        self.set_fps(self.cfg["graphics.default_fps"])
+        platform_event_loop = pyglet.app.platform_event_loop
+
+        evloop.has_exit = False
+        evloop._legacy_setup()
+        platform_event_loop.start()
+        evloop.dispatch_event("on_enter")
+        evloop.is_running = True
+
+        poll = self.cfg["events.async.poll"]
+        try:
+            while not evloop.has_exit:
+                timeout = evloop.idle()
+                # Only poll, since blocking would also block asyncio
+                platform_event_loop.step(0)
+                await asyncio.sleep(poll if timeout is None else min(timeout, poll))
+        finally:
+            evloop.is_running = False
+            evloop.dispatch_event("on_exit")
+            platform_event_loop.stop()
+
     # Various methods
     def changeMenu(self, menu: str) -> None:
         """
@@ -189,6 +256,8 @@ class PengWindow(pyglet.window.Window):
 
         old = self.activeMenu
         self.activeMenu = menu
+        events.invalidate_dispatch_tables()
+        self._dirty = True
 
         if old is not None:
             self.menus[old].on_exit(menu)
@@ -232,9 +301,7 @@ class PengWindow(pyglet.window.Window):
 
         ilist = []
         for rname in rlist:
-            ilist.append(
-                pyglet.image.load(self.peng.rsrcMgr.resourceNameToPath(rname, ".png"))
-            )
+            ilist.append(self.peng.rsrcMgr.loadImage(rname))
 
         if len(ilist) != 0:
             self.set_icon(*ilist)
@@ -250,34 +317,207 @@ class PengWindow(pyglet.window.Window):
         Note that this is only a limit, which may or may not be fulfilled depending on available
         resources.
 
-        .. note::
-           By default, pyglet only redraws the window when an event arrives. To force a certain
-           redraw rate (which still respects system performance), call :py:meth:`pyglet.clock.schedule_interval()`
-           once during initialization with a dummy function and your desired refresh rate in seconds.
+        If a limit is set, frames are scheduled by a :py:class:`FramePacer`\\ , which is
+        available via :py:attr:`pacer`\\ . The window is then redrawn at the given rate,
+        even if no events arrive. Frames requested by pyglet in between, e.g. due to input
+        events, are skipped without swapping buffers.
+
+        Scheduling uses the clock of the current pyglet event loop, meaning that this method
+        should be called again after replacing the event loop. :py:meth:`run()` does so automatically.
 
         :param fps:
         :return:
         """
         self.cur_fps = fps
 
+        clock = pyglet.app.event_loop.clock
+        clock.unschedule(self._frameTick)
+        if fps is None:
+            self.pacer = None
+        else:
+            self.pacer = FramePacer(fps)
+            clock.schedule_once(self._frameTick, 0)
+
+    def _scheduleFrame(self, delay: float) -> None:
+        clock = pyglet.app.event_loop.clock
+        clock.unschedule(self._frameTick)
+        clock.schedule_once(self._frameTick, delay)
+
+    def _frameTick(self, dt):
+        # Only needs to exist, since pyglet redraws all windows after any scheduled function
+        pass
+
     # Event handlers
+    def markDirty(self) -> None:
+        """
+        Marks the contents of the window as changed, causing it to be redrawn on the next frame.
+
+        This method is only relevant if :py:attr:`damageTracking` is enabled. It is called
+        automatically by :py:meth:`Widget.redraw() <peng3d.gui.widgets.BasicWidget.redraw()>`\\ ,
+        :py:meth:`Layer.redraw() <peng3d.layer.Layer.redraw()>`\\ , :py:meth:`World.redraw() <peng3d.world.World.redraw()>`
+        and when the window is resized, exposed or changes its menu.
+
+        Custom drawing code that changes its output without calling any of these methods
+        must call this method itself.
+        """
+        self._dirty = True
+
+    def needsRedraw(self) -> bool:
+        """
+        Returns whether this window has to be drawn on the next frame.
+
+        This is the case unless :py:attr:`damageTracking` is enabled and nothing has been
+        marked as dirty. Windows with a frame rate limit always need to be drawn, since the
+        :py:attr:`pacer` schedules frames while drawing.
+
+        Used by :py:class:`PengEventLoop` to skip windows entirely.
+        """
+        return not self.damageTracking or self._dirty or self.pacer is not None
+
+    def close(self):
+        """
+        Closes the window and removes it from :py:attr:`Peng.windows <peng3d.peng.Peng.windows>`\\ .
+
+        The event :peng3d:event:`peng3d:window.close` is sent before the context is destroyed.
+        """
+        peng = getattr(self, "peng", None)
+        if peng is not None and self.context is not None:
+            peng.sendEvent("peng3d:window.close", {"peng": peng, "window": self})
+        super(PengWindow, self).close()
+        if peng is not None:
+            peng._removeWindow(self)
+
     def on_draw(self):
         """
         Clears the screen and draws the currently active menu.
+
+        If :py:attr:`damageTracking` is enabled and nothing has been marked as dirty via
+        :py:meth:`markDirty()` since the last frame, nothing is drawn and the previous frame
+        stays visible.
+
+        If a frame rate limit has been set via :py:meth:`set_fps()`\\ , frames requested before
+        the next deadline of the :py:attr:`pacer` are skipped.
         """
-        if (
-            self.cur_fps is not None
-            and self._last_render + (1 / self.cur_fps) > time.monotonic()
-        ):
+        pacer = self.pacer
+        if pacer is None:
+            self._drawFrame()
+            return
+
+        now = time.monotonic()
+        if not pacer.ready(now):
+            # Woken up too early, e.g. by input events
+            self._skipFlip = True
             self.invalid = False
+            self._scheduleFrame(pacer.delay(now))
             return
-        self._last_render = time.monotonic()
+
+        pacer.begin(now)
+        try:
+            self._drawFrame()
+        finally:
+            now = time.monotonic()
+            pacer.end(now)
+            self._scheduleFrame(pacer.delay(now))
+
+    def _drawFrame(self):
+        # A skipped frame that was never flipped, e.g. due to on_expose, must not affect this one
+        self._skipFlip = False
+
+        tracer = self.peng.tracer
+        t = tracer.now() if tracer.enabled else None
+
+        profiler = self.peng.profiler
+        pt = None
+        if profiler.enabled:
+            profiler.beginFrame()
+            pt = profiler.now()
+
         self.peng._pumpRateLimitedEvents()
+        self._pumpRateLimitedEvents()
+        if pt is not None:
+            pt = profiler.add("events.ratelimited", pt)
+        self.peng.pumpEvents()
+        if pt is not None:
+            pt = profiler.add("events.queue", pt)
+
+        rsrcMgr = self.peng.resourceMgr
+        if rsrcMgr is not None and rsrcMgr._texReady:
+            rsrcMgr.processUploads()
+            if pt is not None:
+                pt = profiler.add("rsrc.upload", pt)
+
+        if self.damageTracking and not self._dirty:
+            # The buffers must not be swapped, since the back buffer is now undefined
+            self._skipFlip = True
+            if self.peng._frameWaiters:
+                self.peng._resolveFrameWaiters()
+            if pt is not None:
+                # Skipped frames would only skew the statistics
+                profiler.endFrame(keep=False)
+            return
+        self._dirty = False
+
+        if rsrcMgr is not None and rsrcMgr._dirtyTextures:
+            rsrcMgr.flushMipmaps()
+            if pt is not None:
+                profiler.add("rsrc.mipmaps", pt)
+
+        self.glstate.newFrame()
         self.clear()
 
         if self.activeMenu in self.menus:
             self.menu.draw()
 
+        if self.peng._frameWaiters:
+            self.peng._resolveFrameWaiters()
+
+        if pt is not None:
+            profiler.endFrame()
+
+        if t is not None:
+            tracer.counter(
+                "glstate",
+                {"calls": self.glstate.calls, "skipped": self.glstate.skipped},
+                "frame",
+            )
+            tracer.complete("frame", t, "frame", {"menu": self.activeMenu})
+            duration = (tracer.now() - t) / 1e6
+            hitch = self.cfg["debug.trace.hitch"]
+            if hitch is not None and duration > hitch:
+                self.peng.sendEvent(
+                    "peng3d:trace.hitch",
+                    {
+                        "peng": self.peng,
+                        "window": self,
+                        "tracer": tracer,
+                        "duration": duration,
+                    },
+                )
+
+    def flip(self):
+        if self._skipFlip:
+            self._skipFlip = False
+            return
+        super(PengWindow, self).flip()
+
+    flip.__noautodoc__ = True
+
+    def on_resize(self, width, height):
+        self._dirty = True
+        return super(PengWindow, self).on_resize(width, height)
+
+    on_resize.__noautodoc__ = True
+
+    def on_expose(self):
+        self._dirty = True
+
+    on_expose.__noautodoc__ = True
+
+    def on_show(self):
+        self._dirty = True
+
+    on_show.__noautodoc__ = True
+
     def on_mouse_motion(self, x, y, dx, dy):
         self.mouse_pos = x, y
 
@@ -285,53 +525,90 @@ class PengWindow(pyglet.window.Window):
         """
         Internal event handling method.
 
-        This method extends the behavior inherited from :py:meth:`pyglet.window.Window.dispatch_event()` by calling the various :py:meth:`handleEvent()` methods.
+        This method extends the behavior inherited from :py:meth:`pyglet.window.Window.dispatch_event()` by
+        also sending the event to all peng3d listeners.
 
-        By default, :py:meth:`Peng.handleEvent()`\\ , :py:meth:`handleEvent()` and :py:meth:`Menu.handleEvent()` are called in this order to handle events.
+        Listeners registered via :py:meth:`Peng.addPygletListener()`\\ , :py:meth:`registerEventHandler()`\\ ,
+        :py:meth:`BasicMenu.registerEventHandler()` of the active menu and :py:meth:`World.registerEventHandler()`
+        of its worlds are called in this order. Internally, a :py:class:`~peng3d.events.DispatchTable`
+        is used to call them in a single pass, meaning that overriding the ``handleEvent()``
+        methods of these classes has no effect on events sent by the window.
 
-        Note that some events may not be handled by all handlers during early startup.
+        Note that events dispatched during early startup are not sent to peng3d listeners.
+
+        If :py:attr:`inputRecorder` is set, the event is recorded before it is handled.
+        See :py:class:`~peng3d.replay.InputRecorder` for details.
         """
+        if self.inputRecorder is not None:
+            self.inputRecorder.record(event_type, args)
         super(PengWindow, self).dispatch_event(event_type, *args)
-        try:
-            p = self.peng
-            m = self.menu
-        except AttributeError:
-            # To prevent early startup errors
-            if hasattr(self, "peng") and self.peng.cfg["debug.events.logerr"]:
-                print("Error:")
-                traceback.print_exc()
+
+        table = self._dispatchTable
+        if table is None:
+            # Still within __init__()
             return
-        p.handleEvent(event_type, args, self)
-        self.handleEvent(event_type, args)
-        m.handleEvent(event_type, args)
+        self.peng._preparePygletEvent(event_type, args, self)
+        limiter = self.rateLimiter
+        limiter.flush(event_type)
+        table.dispatch(event_type, args)
+        limiter.coalesce(event_type, args)
+
+    def _eventScopes(self) -> List[events.ListenerRegistry]:
+        scopes = [self.peng.pygletEventHandlers, self.eventHandlers]
+        menu = self.menus.get(self.activeMenu, None)
+        if menu is not None:
+            scopes.append(menu.eventHandlers)
+            for world in menu.worlds:
+                if world.recvEvents:
+                    scopes.append(world.eventHandlers)
+        return scopes
 
     def handleEvent(self, event_type: str, args: Tuple, window=None):
-        args = list(args)
         # if window is not None:
         #    args.append(window)
-        if event_type in self.eventHandlers:
-            for whandler in self.eventHandlers[event_type]:
-                # This allows for proper collection of deleted handler methods by using weak references
-                handler = whandler()
-                if handler is None:
-                    del self.eventHandlers[event_type][
-                        self.eventHandlers[event_type].index(whandler)
-                    ]
-                handler(*args)
+        self.eventHandlers.dispatch(event_type, args)
 
     handleEvent.__noautodoc__ = True
 
-    def registerEventHandler(self, event_type, handler):
+    def registerEventHandler(self, event_type, handler) -> events.ListenerToken:
         if self.peng.cfg["debug.events.register"]:
             print("Registered Event: %s Handler: %s" % (event_type, handler))
-        if event_type not in self.eventHandlers:
-            self.eventHandlers[event_type] = []
         # Only a weak reference is kept
-        if inspect.ismethod(handler):
-            handler = weakref.WeakMethod(handler)
-        else:
-            handler = weakref.ref(handler)
-        self.eventHandlers[event_type].append(handler)
+        return self.eventHandlers.add(event_type, handler)
+
+    def registerRateLimitedEventHandler(
+        self,
+        event_type: str,
+        handler: Callable,
+        policy: Optional[Union[str, events.CoalescePolicy]] = None,
+    ) -> events.ListenerToken:
+        """
+        Registers a rate-limited event handler for events of this window only.
+
+        Works like :py:meth:`Peng.addRateLimitedPygletListener() <peng3d.peng.Peng.addRateLimitedPygletListener()>`\\ ,
+        but events of other windows are neither received nor coalesced with the events
+        of this window. Pending events are dispatched just before this window is drawn.
+
+        The returned token may be passed to :py:meth:`delEventHandler()`\\ .
+        """
+        if self.peng.cfg["debug.events.register"]:
+            print(
+                "Registered Rate Limited Event: %s Handler: %s" % (event_type, handler)
+            )
+        # Only a weak reference is kept
+        return self.rateLimiter.add(event_type, handler, policy)
+
+    def delEventHandler(self, token: events.ListenerToken) -> bool:
+        """
+        Removes the event handler belonging to the token returned by :py:meth:`registerEventHandler()`
+        or :py:meth:`registerRateLimitedEventHandler()`\\ .
+
+        Returns whether the handler was still registered.
+        """
+        return token.remove()
+
+    def _pumpRateLimitedEvents(self, event_types: Optional[List[str]] = None):
+        self.rateLimiter.pump(event_types)
 
     # Properties/Proxies for various things
 
@@ -372,23 +649,24 @@ class PengWindow(pyglet.window.Window):
         """
         Configures OpenGL to draw in 2D.
 
-        Note that wireframe mode is always disabled in 2D-Mode, but can be re-enabled by calling ``glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)``\\ .
+        Note that wireframe mode is always disabled in 2D-Mode, but can be re-enabled by calling ``window.glstate.polygonMode(GL_LINE)``\\ .
+
+        State changes are made via :py:attr:`glstate`\\ , so calling this method repeatedly
+        within a frame is cheap.
         """
-        # Light
+        gl = self.glstate
 
-        glDisable(GL_LIGHTING)
+        # Light
+        gl.disable(GL_LIGHTING)
 
         # To avoid accidental wireframe GUIs and fonts
-        glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
+        gl.polygonMode(GL_FILL)
 
         width, height = self.get_size()
-        glDisable(GL_DEPTH_TEST)
-        glViewport(0, 0, width, height)
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        glOrtho(0, width, 0, height, -1, 1)
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
+        gl.disable(GL_DEPTH_TEST)
+        gl.viewport(0, 0, width, height)
+        gl.projection(("ortho", width, height), glOrtho, 0, width, 0, height, -1, 1)
+        gl.modelview(("identity",))
 
     def set3d(self, cam):
         """
@@ -404,28 +682,188 @@ class PengWindow(pyglet.window.Window):
         if not isinstance(cam, camera.Camera):
             raise TypeError("cam is not of type Camera!")
 
+        gl = self.glstate
+
         # Light
 
         # glEnable(GL_LIGHTING)
 
         if self.cfg["graphics.wireframe"]:
-            glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
+            gl.polygonMode(GL_LINE)
 
         width, height = self.get_size()
-        glEnable(GL_DEPTH_TEST)
-        glViewport(0, 0, width, height)
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(
-            self.cfg["graphics.fieldofview"],
-            width / float(height),
-            self.cfg["graphics.nearclip"],
-            self.cfg["graphics.farclip"],
-        )  # default 60
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
-        x, y = cam.rot
+        gl.enable(GL_DEPTH_TEST)
+        gl.viewport(0, 0, width, height)
+        fov = self.cfg["graphics.fieldofview"]
+        aspect = width / float(height)
+        near, far = self.cfg["graphics.nearclip"], self.cfg["graphics.farclip"]
+        gl.projection(
+            ("perspective", fov, aspect, near, far),
+            gluPerspective,
+            fov,
+            aspect,
+            near,
+            far,
+        )
+        rot, pos = tuple(cam.rot), tuple(cam.pos)
+        gl.modelview(("camera", rot, pos), self._applyCamera, rot, pos)
+
+    def _applyCamera(self, rot, pos):
+        x, y = rot
         glRotatef(x, 0, 1, 0)
         glRotatef(-y, math.cos(math.radians(x)), 0, math.sin(math.radians(x)))
-        x, y, z = cam.pos
+        x, y, z = pos
         glTranslatef(-x, -y, -z)
+
+
+class FramePacer(object):
+    """
+    Frame scheduler that limits the frame rate of a :py:class:`PengWindow` to ``fps`` frames per second.
+
+    Deadlines for each frame are computed from :py:func:`time.monotonic()` and advance by
+    a fixed interval, avoiding the drift of simply waiting a fixed time after each frame.
+
+    The time it takes to draw a frame is measured and smoothed, frames are then started
+    that much earlier to finish close to their deadline.
+
+    If a frame takes so long that the next deadline cannot be met anymore, it is counted
+    in :py:attr:`missed` and the schedule is restarted from the current time.
+    """
+
+    SLACK: float = 0.0005
+    """
+    Time in seconds that frames may be started early, to compensate for timer inaccuracy.
+    """
+
+    SMOOTHING: float = 0.1
+    """
+    Weight of the latest measurement in the exponential moving average of the frame cost.
+    """
+
+    def __init__(self, fps: float):
+        if fps <= 0:
+            raise ValueError("fps must be positive")
+        self.fps: float = fps
+        self.interval: float = 1.0 / fps
+
+        self.deadline: float = time.monotonic()
+        """
+        Time at which the next frame should be finished.
+        """
+        self.cost: float = 0.0
+        """
+        Smoothed time in seconds it takes to draw a frame.
+        """
+        self.frames: int = 0
+        """
+        Number of frames drawn.
+        """
+        self.missed: int = 0
+        """
+        Number of frames that missed their deadline by more than one interval.
+        """
+
+        self._start: Optional[float] = None
+
+    def ready(self, now: float) -> bool:
+        """
+        Returns whether the next frame should be started at time ``now``\\ .
+        """
+        return now >= self.deadline - self.cost - self.SLACK
+
+    def delay(self, now: float) -> float:
+        """
+        Returns the time in seconds until the next frame should be started.
+        """
+        return max(0.0, self.deadline - self.cost - now)
+
+    def begin(self, now: float) -> None:
+        """
+        Marks the start of a frame.
+        """
+        if self.frames == 0:
+            # Prevents the first frame from being counted as missed
+            self.deadline = now
+        self._start = now
+
+    def end(self, now: float) -> None:
+        """
+        Marks the end of a frame and computes the next deadline.
+        """
+        if self._start is not None:
+            self.cost += (now - self._start - self.cost) * self.SMOOTHING
+            self._start = None
+        self.frames += 1
+
+        self.deadline += self.interval
+        if self.deadline - self.cost < now:
+            # Next deadline cannot be met anymore
+            self.missed += 1
+            self.deadline = now + self.interval
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Dictionary containing the ``fps``\\ , ``frames``\\ , ``missed`` and ``cost`` values of this pacer.
+        """
+        return {
+            "fps": self.fps,
+            "frames": self.frames,
+            "missed": self.missed,
+            "cost": self.cost,
+        }
+
+
+class PengEventLoop(pyglet.app.EventLoop):
+    """
+    Event loop running all windows, that only redraws windows needing it.
+
+    The default pyglet event loop redraws all windows whenever any scheduled function has
+    been called. This event loop skips windows for which :py:meth:`PengWindow.needsRedraw()`
+    returns false, avoiding switching contexts and flipping buffers for them. This is
+    especially useful with multiple windows and :confval:`graphics.damage.enable`\\ .
+
+    Events queued via :py:class:`~peng3d.peng.Peng` are still pumped every iteration,
+    even if no window is drawn.
+
+    Used by default by :py:meth:`Peng.run() <peng3d.peng.Peng.run()>`\\ .
+    """
+
+    def idle(self):
+        dt = self.clock.update_time()
+        redraw_all = self.clock.call_scheduled_functions(dt)
+
+        windows = [
+            w
+            for w in pyglet.app.windows
+            if redraw_all or (w._legacy_invalid and w.invalid)
+        ]
+
+        # Maps id(peng) -> [peng, windows of peng]
+        pengs = {}
+        for w in windows:
+            if isinstance(w, PengWindow):
+                pengs.setdefault(id(w.peng), [w.peng, []])[1].append(w)
+
+        for peng, pwindows in pengs.values():
+            if not any(w.needsRedraw() for w in pwindows):
+                # Events are usually pumped while drawing, but no window will be drawn
+                # Pumping may still cause windows to become dirty
+                peng._pumpRateLimitedEvents()
+                peng.pumpEvents()
+                if peng._frameWaiters:
+                    peng._resolveFrameWaiters()
+
+        for window in windows:
+            # Checked just before drawing, since drawing other windows pumps events
+            if isinstance(window, PengWindow) and not window.needsRedraw():
+                # Input of this window is usually pumped while drawing it
+                window._pumpRateLimitedEvents()
+                if not window.needsRedraw():
+                    continue
+            window.switch_to()
+            window.dispatch_event("on_draw")
+            window.flip()
+            window._legacy_invalid = False
+
+        return self.clock.get_sleep_time(True)
@@ -28,6 +28,7 @@ import weakref
 import inspect
 
 from .camera import Camera
+from .events import ListenerRegistry, ListenerToken, invalidate_dispatch_tables
 
 try:
     import pyglet
@@ -54,8 +55,35 @@ class World(object):
         self.actors = {}
         self.views = {}
 
-        self.eventHandlers = {}
-        self.recvEvents = True
+        self.eventHandlers: ListenerRegistry = ListenerRegistry(peng.eventMetrics)
+        self._recvEvents = True
+
+    @property
+    def recvEvents(self) -> bool:
+        """
+        Whether or not this world receives events from the menus it has been added to.
+
+        Defaults to ``True``\\ .
+        """
+        return self._recvEvents
+
+    @recvEvents.setter
+    def recvEvents(self, value: bool):
+        self._recvEvents = value
+        invalidate_dispatch_tables()
+
+    def redraw(self):
+        """
+        Marks all windows showing a view of this world as dirty, causing the world to be
+        rendered again on the next frame.
+
+        This is only relevant if :confval:`graphics.damage.enable` is enabled. Moving or
+        rotating actors and cameras calls this method automatically.
+        """
+        for view in self.views.values():
+            # Views not yet shown by any layer don't need to be redrawn
+            if view._window is not None:
+                view._window.markDirty()
 
     def addCamera(self, camera):
         """
@@ -114,32 +142,25 @@ class World(object):
             if self.peng.cfg["debug.events.dump"]:
                 print("World skyps event type %s" % event_type)
             return
-        args = list(args)
         # if window is not None:
         #    args.append(window)
-        if event_type in self.eventHandlers:
-            for whandler in self.eventHandlers[event_type]:
-                # This allows for proper collection of deleted handler methods by using weak references
-                handler = whandler()
-                if handler is None:
-                    del self.eventHandlers[event_type][
-                        self.eventHandlers[event_type].index(whandler)
-                    ]
-                handler(*args)
+        self.eventHandlers.dispatch(event_type, args)
 
     handle_event.__noautodoc__ = True
 
-    def registerEventHandler(self, event_type, handler):
+    def registerEventHandler(self, event_type, handler) -> ListenerToken:
         if self.peng.cfg["debug.events.register"]:
             print("Registered Event: %s Handler: %s" % (event_type, handler))
-        if event_type not in self.eventHandlers:
-            self.eventHandlers[event_type] = []
         # Only a weak reference is kept
-        if inspect.ismethod(handler):
-            handler = weakref.WeakMethod(handler)
-        else:
-            handler = weakref.ref(handler)
-        self.eventHandlers[event_type].append(handler)
+        return self.eventHandlers.add(event_type, handler)
+
+    def delEventHandler(self, token: ListenerToken) -> bool:
+        """
+        Removes the event handler belonging to the token returned by :py:meth:`registerEventHandler()`\\ .
+
+        Returns whether the handler was still registered.
+        """
+        return self.eventHandlers.remove(token)
 
 
 class StaticWorld(World):
@@ -190,8 +211,25 @@ class WorldView(object):
         self.world = world
         self.name = name
         self.activeCamera = cam
+        self._window = None
         self.cam.on_activate(None)
 
+    @property
+    def window(self):
+        """
+        Property for accessing the window this view is shown in.
+
+        Set automatically by :py:class:`LayerWorld() <peng3d.layer.LayerWorld>`\\ . If the view is
+        not shown by any layer, the first window of the :py:class:`~peng3d.peng.Peng` instance is used.
+        """
+        if self._window is not None:
+            return self._window
+        return self.world.peng.window
+
+    @window.setter
+    def window(self, value):
+        self._window = value
+
     def setActiveCamera(self, name):
         """
         Sets the active camera.
@@ -212,13 +250,13 @@ class WorldView(object):
         """
         Fake event handler called by :py:meth:`Layer.on_menu_enter() <peng3d.layer.Layer.on_menu_enter>` when the containing menu is entered.
         """
-        self.world.peng.window.push_handlers(self)
+        self.window.push_handlers(self)
 
     def on_menu_exit(self, new):
         """
         Fake event handler, same as :py:meth:`on_menu_enter()` but for exiting menus instead.
         """
-        self.world.peng.window.pop_handlers()
+        self.window.pop_handlers()
 
     # Proxy for self.cameras[self.activeCamera]
     @property
@@ -281,14 +319,14 @@ class WorldViewMouseRotatable(WorldView):
         Fake event handler, same as :py:meth:`WorldView.on_menu_enter()` but forces mouse exclusivity.
         """
         super(WorldViewMouseRotatable, self).on_menu_enter(old)
-        self.world.peng.window.toggle_exclusivity(True)
+        self.window.toggle_exclusivity(True)
 
     def on_menu_exit(self, new):
         """
         Fake event handler, same as :py:meth:`WorldView.on_menu_exit()` but force-disables mouse exclusivity.
         """
         super(WorldViewMouseRotatable, self).on_menu_exit(new)
-        self.world.peng.window.toggle_exclusivity(False)
+        self.window.toggle_exclusivity(False)
 
     def on_key_press(self, symbol, modifiers):
         """
@@ -297,7 +335,7 @@ class WorldViewMouseRotatable(WorldView):
         If an escape key press is detected, mouse exclusivity is toggled via :py:meth:`PengWindow.toggle_exclusivity()`\\ .
         """
         if symbol == key.ESCAPE:
-            self.world.peng.window.toggle_exclusivity()
+            self.window.toggle_exclusivity()
             return pyglet.event.EVENT_HANDLED
 
     def on_mouse_motion(self, x, y, dx, dy):
@@ -306,7 +344,7 @@ class WorldViewMouseRotatable(WorldView):
 
         For more information about how to customize mouse movement, see the class documentation here :py:class:`WorldViewMouseRotatable()`\\ .
         """
-        if not self.world.peng.window.exclusive:
+        if not self.window.exclusive:
             return
         m = self.world.peng.cfg["controls.mouse.sensitivity"]
         x, y = self.rot
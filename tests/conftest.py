@@ -75,6 +75,23 @@ def window(peng, xdisplay):
     return peng.createWindow() if peng.window is None else peng.window
 
 
+@pytest.fixture
+def fakegl(request):
+    import peng3d.fakegl
+
+    recorder = peng3d.fakegl.install()
+    request.addfinalizer(peng3d.fakegl.uninstall)
+    return recorder
+
+
+@pytest.fixture
+def fakewindow(request, fakegl):
+    p = peng3d.Peng()
+    w = p.createWindow(peng3d.fakegl.HeadlessWindow)
+    request.addfinalizer(w.close)
+    return w
+
+
 @pytest.fixture
 def dispatcher():
     return peng3d.util.ActionDispatcher()
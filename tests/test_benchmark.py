@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_benchmark.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+import ctypes.util
+import os
+import subprocess
+import sys
+
+import pyglet
+import pytest
+
+import peng3d
+import peng3d.benchmark
+
+
+def test_benchmark_result():
+    result = peng3d.benchmark.BenchmarkResult([0.004, 0.001, 0.003, 0.002, 0.005])
+
+    assert result.percentile(0) == 0.001
+    assert result.percentile(50) == 0.003
+    assert result.percentile(100) == 0.005
+    assert result.percentile(75) == pytest.approx(0.004)
+    assert result.percentile(90) == pytest.approx(0.0046)
+
+    s = result.summary()
+    assert s["frames"] == 5
+    assert s["mean"] == pytest.approx(0.003)
+    assert s["fps"] == pytest.approx(1 / 0.003)
+    assert s["p50"] == 0.003
+    assert "5 frames" in result.format()
+
+    with pytest.raises(ValueError):
+        result.percentile(101)
+    with pytest.raises(ValueError):
+        peng3d.benchmark.BenchmarkResult([]).percentile(50)
+
+
+def test_compare_frames():
+    def image(data):
+        return pyglet.image.ImageData(2, 1, "RGBA", bytes(data))
+
+    a = image([0, 0, 0, 255, 10, 10, 10, 255])
+    assert peng3d.benchmark.compareFrames(a, a) == 0
+    b = image([0, 0, 0, 255, 12, 10, 10, 255])
+    assert peng3d.benchmark.compareFrames(a, b) == 1
+    assert peng3d.benchmark.compareFrames(a, b, tolerance=2) == 0
+
+    with pytest.raises(ValueError):
+        peng3d.benchmark.compareFrames(
+            a, pyglet.image.ImageData(1, 1, "RGBA", bytes(4))
+        )
+
+
+def test_frame_benchmark(fakewindow, fakegl):
+    menu = peng3d.Menu("main", fakewindow)
+    fakewindow.addMenu(menu)
+
+    fakewindow.damageTracking = True
+    bench = peng3d.benchmark.FrameBenchmark(fakewindow, frames=5, warmup=2)
+    result = bench.run("main", capture=[4])
+
+    assert len(result.times) == 5
+    assert list(result.captures) == [4]
+    assert result.captures[4].width == fakewindow.width
+    # Warmup frames are drawn too, damage tracking is disabled while running
+    assert fakegl.frameCount == 7
+    assert fakewindow.damageTracking
+
+
+@pytest.mark.skipif(
+    ctypes.util.find_library("EGL") is None, reason="Requires EGL for headless mode"
+)
+def test_bench_render_headless(tmp_path):
+    # Headless mode has to be enabled before importing pyglet.window, thus a new process is needed
+    script = os.path.join(
+        os.path.dirname(__file__), "..", "benchmarks", "bench_render.py"
+    )
+    out = tmp_path / "frame.png"
+    proc = subprocess.run(
+        [
+            sys.executable,
+            script,
+            "--frames",
+            "3",
+            "--warmup",
+            "1",
+            "--widgets",
+            "4",
+            "--size",
+            "64",
+            "64",
+            "--capture",
+            str(out),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=dict(
+            os.environ,
+            PYTHONPATH=os.path.join(os.path.dirname(__file__), ".."),
+        ),
+        timeout=120,
+    )
+    if proc.returncode != 0 and b"EGL" in proc.stdout:
+        pytest.skip("EGL is not usable: %s" % proc.stdout.decode(errors="replace"))
+    assert proc.returncode == 0, proc.stdout.decode(errors="replace")
+    assert b"3 frames" in proc.stdout
+
+    image = pyglet.image.load(str(out))
+    assert (image.width, image.height) == (64, 64)
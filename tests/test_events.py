@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_events.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import gc
+
+import pytest
+
+import peng3d.events
+
+
+class Listener(object):
+    def __init__(self, calls):
+        self.calls = calls
+
+    def handler(self, *args):
+        self.calls.append((self, args))
+
+
+def test_registry_dispatch_and_remove():
+    reg = peng3d.events.ListenerRegistry()
+    calls = []
+    l1, l2 = Listener(calls), Listener(calls)
+
+    t1 = reg.add("on_test", l1.handler)
+    reg.add("on_test", l2.handler)
+    assert "on_test" in reg
+    assert len(reg) == 2
+
+    reg.dispatch("on_test", (1, 2))
+    assert calls == [(l1, (1, 2)), (l2, (1, 2))]
+
+    assert t1.remove()
+    assert not t1.remove()
+    reg.dispatch("on_test", (3,))
+    assert calls[-1] == (l2, (3,))
+    assert len(calls) == 3
+
+
+def test_registry_dead_weakrefs():
+    reg = peng3d.events.ListenerRegistry()
+    calls = []
+    l1, l2 = Listener(calls), Listener(calls)
+    reg.add("on_test", l1.handler)
+    reg.add("on_test", l2.handler)
+
+    del l1
+    gc.collect()
+
+    reg.dispatch("on_test", ())
+    assert calls == [(l2, ())]
+    assert len(reg) == 1
+
+
+def test_registry_remove_during_dispatch():
+    reg = peng3d.events.ListenerRegistry()
+    calls = []
+    tokens = []
+
+    def remover():
+        calls.append("remover")
+        for t in tokens:
+            t.remove()
+
+    def other():
+        calls.append("other")
+
+    tokens.append(reg.add("on_test", remover, weak=False))
+    tokens.append(reg.add("on_test", other, weak=False))
+
+    # The snapshot taken at the start of the dispatch is used
+    reg.dispatch("on_test", ())
+    assert calls == ["remover", "other"]
+
+    reg.dispatch("on_test", ())
+    assert calls == ["remover", "other"]
+    assert "on_test" not in reg
+
+
+def test_router_wildcards():
+    router = peng3d.events.EventRouter()
+    f = lambda e, d: None
+
+    router.add("*", f)
+    router.add("peng3d:rsrc.*", f)
+    router.add("*:rsrc.tex.load", f)
+
+    assert len(router.resolve("peng3d:rsrc.tex.load")) == 3
+    assert len(router.resolve("peng3d:rsrc")) == 1
+    assert len(router.resolve("other:rsrc.tex.load")) == 2
+
+    router.remove("*", f)
+    assert len(router.resolve("peng3d:rsrc")) == 0
+
+
+def test_router_cachesize():
+    router = peng3d.events.EventRouter(cachesize=2)
+    router.add("test:*", lambda e, d: None)
+
+    for i in range(5):
+        assert len(router.resolve("test:%d" % i)) == 1
+        assert len(router._cache) <= 2
+    assert "test:4" in router._cache
+
+
+def test_dispatch_table():
+    a = peng3d.events.ListenerRegistry()
+    b = peng3d.events.ListenerRegistry()
+    scopes = [a, b]
+    table = peng3d.events.DispatchTable(lambda: scopes)
+    calls = []
+
+    class Listener(object):
+        def on_test(self, x):
+            calls.append(("l", x))
+
+    a.add("on_test", lambda x: calls.append(("a", x)), weak=False)
+    b.add("on_test", lambda x: calls.append(("b", x)), weak=False)
+
+    table.dispatch("on_test", (1,))
+    assert calls == [("a", 1), ("b", 1)]
+    refs = table.compile("on_test")
+    assert table.compile("on_test") is refs
+
+    # Adding listeners invalidates the table
+    l = Listener()
+    a.add("on_test", l.on_test)
+    del calls[:]
+    table.dispatch("on_test", (2,))
+    assert calls == [("a", 2), ("l", 2), ("b", 2)]
+
+    # Dead listeners are removed on the next compile
+    del l
+    assert len(table.compile("on_test")) == 2
+
+    # Changes of the scopes require manual invalidation
+    scopes.remove(a)
+    peng3d.events.invalidate_dispatch_tables()
+    del calls[:]
+    table.dispatch("on_test", (3,))
+    assert calls == [("b", 3)]
+
+
+def test_eventdata():
+    data = peng3d.events.TexLoadEventData(None, "tex", "gui")
+
+    assert data["name"] == "tex"
+    assert data.category == "gui"
+    assert data == {"peng": None, "name": "tex", "category": "gui"}
+    assert list(data) == ["peng", "name", "category"]
+    assert len(data) == 3
+    assert data.get("missing", 42) == 42
+    assert "keys" not in data
+
+    with pytest.raises(KeyError):
+        data["keys"]
+
+    data["name"] = "other"
+    assert data.name == "other"
+
+    # Unknown keys are still supported
+    data["extra"] = 1
+    assert data["extra"] == 1
+    assert "extra" in data
+    assert len(data) == 4
+    del data["extra"]
+    assert data.copy() == {"peng": None, "name": "other", "category": "gui"}
+    assert isinstance(data.copy(), dict)
+
+
+def test_eventdata_slots():
+    data = peng3d.events.KeybindEventData(None, "a", 1, 0, False, True)
+    assert not hasattr(data, "__dict__")
+    assert peng3d.events.KeybindEventData._fields == (
+        "peng",
+        "combo",
+        "symbol",
+        "modifiers",
+        "release",
+        "mod",
+    )
+
+
+def test_eventqueue_error():
+    q = peng3d.events.EventQueue()
+    for i in range(3):
+        q.post("test:ev", i)
+
+    received = []
+
+    def dispatch(event, data):
+        received.append(data)
+        if data == 1:
+            raise ValueError("handler failed")
+
+    with pytest.raises(ValueError):
+        q.pump(dispatch, None)
+    assert received == [0, 1]
+    # The failed event is accounted for, the remaining one is kept for the next pump
+    assert q.stats["dispatched"] == 2
+    assert q.stats["deferred"] == 1
+    assert q.stats["queued"] == 1
+
+    assert q.pump(dispatch, None) == 1
+    assert received == [0, 1, 2]
+    assert q.stats["dispatched"] == 3
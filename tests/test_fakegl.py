@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_fakegl.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+import pyglet
+from pyglet.gl import *
+
+import peng3d
+import peng3d.fakegl
+
+
+def test_fakegl_install():
+    real = pyglet.gl.glEnable
+
+    recorder = peng3d.fakegl.install()
+    try:
+        assert peng3d.fakegl.installed() is recorder
+        assert pyglet.gl.glEnable is not real
+
+        pyglet.gl.glEnable(GL_BLEND)
+        pyglet.gl.glBindTexture(GL_TEXTURE_2D, 1)
+        pyglet.gl.glDrawArrays(GL_QUADS, 0, 4)
+        assert recorder.endFrame() == {
+            peng3d.fakegl.CAT_STATE: 1,
+            peng3d.fakegl.CAT_BIND: 1,
+            peng3d.fakegl.CAT_DRAW: 1,
+        }
+        assert recorder.frames[-1][1]["glEnable"] == 1
+    finally:
+        peng3d.fakegl.uninstall()
+
+    assert pyglet.gl.glEnable is real
+    assert peng3d.fakegl.installed() is None
+
+
+def test_fakegl_gui(fakewindow, fakegl):
+    menu = peng3d.GUIMenu("main", fakewindow)
+    fakewindow.addMenu(menu)
+    sub = peng3d.SubMenu("sub", menu)
+    menu.addSubMenu(sub)
+    menu.changeSubMenu("sub")
+    for i in range(10):
+        peng3d.Button("btn%d" % i, sub, pos=(10, 40 * i), size=(100, 30), label="Btn")
+    fakewindow.changeMenu("main")
+
+    first = fakewindow.drawFrame()
+    assert first[peng3d.fakegl.CAT_UPLOAD] > 0
+
+    # Button backgrounds share the batch of the submenu, only labels need their own draw call
+    second = fakewindow.drawFrame()
+    assert second[peng3d.fakegl.CAT_DRAW] <= 10 + 2
+    assert second[peng3d.fakegl.CAT_UPLOAD] == 0
+
+    # Redundant state changes are skipped by the state cache
+    fakewindow.set2d()
+    fakewindow.set2d()
+    fakewindow.flip()
+    assert fakegl.frames[-1][1].get("glViewport", 0) == 0
+
+
+def test_fakegl_world(fakewindow, fakegl):
+    world = peng3d.StaticWorld(
+        fakewindow.peng,
+        [-1, -1, -1, 1, -1, -1, 1, -1, 1, -1, -1, 1],
+        [255, 255, 255] * 4,
+    )
+    world.addCamera(peng3d.Camera(world, "cam", pos=[0, 0, 5]))
+    world.addView(peng3d.WorldView(world, "view", "cam"))
+
+    menu = peng3d.Menu("world", fakewindow)
+    menu.addLayer(peng3d.LayerWorld(menu, world=world, viewname="view"))
+    fakewindow.addMenu(menu)
+    fakewindow.changeMenu("world")
+
+    fakewindow.drawFrame()
+    counts = fakewindow.drawFrame()
+    assert counts[peng3d.fakegl.CAT_DRAW] == 1
+
+
+def test_fakegl_damage(fakewindow, fakegl):
+    fakewindow.damageTracking = True
+
+    fakewindow.markDirty()
+    assert fakewindow.drawFrame() != {}
+    assert fakewindow.drawFrame() == {}
+
+    # A skipped frame without a flip must not swallow the flip of the next frame
+    fakewindow.dispatch_event("on_draw")
+    fakewindow.markDirty()
+    assert fakewindow.drawFrame() != {}
+
+
+def test_fakegl_glstate_foreign(fakewindow, fakegl):
+    def bg():
+        # Changes state directly, bypassing the state cache
+        pyglet.gl.glEnable(GL_DEPTH_TEST)
+        pyglet.gl.glTranslatef(1, 2, 3)
+
+    menu = peng3d.GUIMenu("main", fakewindow)
+    fakewindow.addMenu(menu)
+    sub = peng3d.SubMenu("sub", menu)
+    sub.setBackground(bg)
+    menu.addSubMenu(sub)
+    menu.changeSubMenu("sub")
+    fakewindow.changeMenu("main")
+
+    fakewindow.drawFrame()
+    fakegl.log = []
+    fakewindow.drawFrame()
+
+    log = fakegl.log
+    i = log.index(("glEnable", (GL_DEPTH_TEST,)))
+    # set2d() after the background restores the state
+    assert ("glDisable", (GL_DEPTH_TEST,)) in log[i:]
+    assert ("glLoadIdentity", ()) in log[i:]
+    # State that may not be changed directly stays cached
+    assert "glViewport" not in [name for name, _ in log[i:]]
+
+
+def test_fakegl_glstate_layers(fakewindow, fakegl):
+    world = peng3d.StaticWorld(fakewindow.peng, [], [])
+    world.addCamera(peng3d.Camera(world, "cam", pos=[0, 0, 5]))
+    world.addView(peng3d.WorldView(world, "view", "cam"))
+
+    menu = peng3d.Menu("main", fakewindow)
+    menu.addLayer(peng3d.LayerWorld(menu, world=world, viewname="view"))
+    menu.addLayer(peng3d.Layer2D(menu))
+    menu.addLayer(peng3d.Layer2D(menu))
+    fakewindow.addMenu(menu)
+    fakewindow.changeMenu("main")
+
+    fakewindow.drawFrame()
+    fakewindow.drawFrame()
+    gl = fakewindow.glstate
+    # The viewport and 2D projection are kept across layers
+    assert gl.skipped > 0
+    assert fakegl.frames[-1][1]["glViewport"] == 1
+
+
+def test_fakegl_textinput_delete(fakewindow, fakegl):
+    menu = peng3d.GUIMenu("main", fakewindow)
+    fakewindow.addMenu(menu)
+    sub = peng3d.SubMenu("sub", menu)
+    menu.addSubMenu(sub)
+    ticker = fakewindow.peng.ticker
+
+    ti = peng3d.TextInput("ti", sub, pos=(0, 0), size=(100, 30))
+    blink = [s for s in ticker.systems if s.name == "TextInput.blink"]
+    assert len(blink) == 1
+    # The blink system must not keep the widget alive
+    assert all(c.cell_contents is not ti for c in blink[0].func.__closure__)
+
+    ti.delete()
+    assert blink[0] not in ticker.systems
+
+
+def test_fakegl_profileroverlay(fakewindow, fakegl):
+    from peng3d.gui.profiler import ProfilerOverlay
+
+    fakewindow.damageTracking = True
+    menu = peng3d.GUIMenu("main", fakewindow)
+    fakewindow.addMenu(menu)
+    sub = peng3d.SubMenu("sub", menu)
+    menu.addSubMenu(sub)
+    menu.changeSubMenu("sub")
+    overlay = ProfilerOverlay("prof", sub, pos=(0, 0), size=(200, 100))
+    fakewindow.changeMenu("main")
+
+    # Fonts are taken from the style
+    assert overlay._label.font_name == sub.style.font
+    assert overlay._label.font_size == sub.style.font_size
+    assert list(overlay._label.color) == list(sub.style.font_color)
+
+    # New samples keep the window dirty
+    assert fakewindow.drawFrame() != {}
+    assert fakewindow.drawFrame() != {}
+    assert len(fakewindow.peng.profiler.frameTimes()) == 2
@@ -59,3 +59,443 @@ def test_peng_eventhandling(peng):
     # TODO: test that event actually arrives
 
 # TODO: add run() test case
+
+
+def test_peng_sendevent_wildcard():
+    p = peng3d.Peng()
+    received = []
+
+    def handler(event, data):
+        received.append((event, data))
+
+    p.addEventListener("test:foo.*", handler)
+    p.addEventListener("test:*.bar", handler)
+
+    p.sendEvent("test:foo.bar.baz", 1)
+    p.sendEvent("test:foo", 2)
+    p.sendEvent("test:other.bar", 3)
+    p.sendEvent("test:foo.bar", 4)
+
+    assert received == [
+        ("test:foo.bar.baz", 1),
+        ("test:other.bar", 3),
+        ("test:foo.bar", 4),
+        ("test:foo.bar", 4),
+    ]
+
+
+def test_peng_sendevent_order_and_removal():
+    p = peng3d.Peng()
+    received = []
+
+    def h1(event, data):
+        received.append(1)
+
+    def h2(event, data):
+        received.append(2)
+
+    p.addEventListener("test:a.b", h1)
+    p.addEventListener("test:*", h2)
+    p.sendEvent("test:a.b")
+    assert received == [1, 2]
+
+    # Resolved handlers are cached and must be invalidated on removal
+    p.delEventListener("test:*", h2)
+    p.sendEvent("test:a.b")
+    assert received == [1, 2, 1]
+
+    with pytest.raises(NameError):
+        p.delEventListener("test:*", h2)
+    with pytest.raises(NameError):
+        p.delEventListener("test:a.b", h2)
+
+
+def test_peng_lazy_pyglet_events():
+    p = peng3d.Peng()
+    assert p.lazyPygletEvents
+
+    p.sendPygletEvent("on_test", (1, 2))
+    # No payloads should have been sent without bridged listeners
+    assert "pyglet:on_test" not in p.events_ignored
+    assert "peng3d:pyglet" not in p.events_ignored
+
+    received = []
+    p.addEventListener("pyglet:on_test", lambda e, d: received.append(d["args"]))
+    p.sendPygletEvent("on_test", (1, 2))
+    assert received == [[1, 2]]
+
+
+def test_peng_event_payloads():
+    p = peng3d.Peng()
+    received = []
+
+    def modify(event, data):
+        received.append(data)
+        data["args"] = None
+        data["combo"] = None
+
+    # Listeners modifying the payload must not affect related events
+    p.addEventListener("pyglet:on_test", modify)
+    p.addEventListener("peng3d:pyglet", lambda e, d: received.append(d["args"]))
+    p.sendPygletEvent("on_test", (1, 2))
+    assert received[-1] == [1, 2]
+
+    p.addEventListener("peng3d:keybind.combo", modify)
+    p.addEventListener(
+        "peng3d:keybind.combo.press", lambda e, d: received.append(d["combo"])
+    )
+    p.keybinds.handle_combo("a", 97, 0)
+    assert received[-1] == "a"
+
+
+def test_peng_eager_pyglet_events():
+    p = peng3d.Peng({"events.pyglet.lazy": False})
+
+    p.sendPygletEvent("on_test", (1, 2))
+    assert p.events_ignored["pyglet:on_test"] == 1
+    assert p.events_ignored["peng3d:pyglet"] == 1
+
+
+class _RLListener(object):
+    # Only weak references are kept, so bound methods of a live object are needed
+    def __init__(self):
+        self.calls = []
+
+    def handler(self, *args):
+        self.calls.append(args)
+
+
+def test_peng_ratelimited_accumulate():
+    p = peng3d.Peng()
+    l = _RLListener()
+    p.addRateLimitedPygletListener("on_mouse_motion", l.handler)
+
+    p.sendPygletEvent("on_mouse_motion", (1, 1, 1, 2))
+    p.sendPygletEvent("on_mouse_motion", (5, 6, 3, 4))
+    assert l.calls == []
+
+    p._pumpRateLimitedEvents()
+    assert l.calls == [(5, 6, 4, 6)]
+
+    # Deltas must be reset after each flush
+    p.sendPygletEvent("on_mouse_motion", (7, 7, 1, 1))
+    p._pumpRateLimitedEvents()
+    p._pumpRateLimitedEvents()
+    assert l.calls == [(5, 6, 4, 6), (7, 7, 1, 1)]
+
+
+def test_peng_ratelimited_policies():
+    p = peng3d.Peng()
+    first, last = _RLListener(), _RLListener()
+    p.addRateLimitedPygletListener("on_test_first", first.handler, "first")
+    p.addRateLimitedPygletListener("on_test_last", last.handler)
+
+    for i in range(3):
+        p.sendPygletEvent("on_test_first", (i,))
+        p.sendPygletEvent("on_test_last", (i,))
+    p._pumpRateLimitedEvents()
+
+    assert first.calls == [(0,)]
+    assert last.calls == [(2,)]
+
+    with pytest.raises(ValueError):
+        p.addRateLimitedPygletListener("on_test_first", last.handler, "last")
+
+
+def test_peng_ratelimited_flush_on():
+    p = peng3d.Peng()
+    order = []
+
+    class L(object):
+        def on_drag(self, *args):
+            order.append("drag")
+
+        def on_release(self, *args):
+            order.append("release")
+
+    l = L()
+    p.addRateLimitedPygletListener("on_mouse_drag", l.on_drag)
+    p.addPygletListener("on_mouse_release", l.on_release)
+
+    p.sendPygletEvent("on_mouse_drag", (0, 0, 1, 1, 1, 0))
+    p.sendPygletEvent("on_mouse_release", (0, 0, 1, 0))
+    p._pumpRateLimitedEvents()
+
+    assert order == ["drag", "release"]
+
+
+def test_peng_postevent():
+    p = peng3d.Peng()
+    received = []
+    p.addEventListener("test:*", lambda e, d: received.append(d))
+
+    p.postEvent("test:a", 1, peng3d.events.PRIORITY_LOW)
+    p.postEvent("test:b", 2)
+    p.postEvent("test:c", 3, peng3d.events.PRIORITY_HIGH)
+    p.postEvent("test:d", 4, peng3d.events.PRIORITY_CRITICAL)
+
+    # Critical events bypass the queue
+    assert received == [4]
+    assert p.eventQueueStats["queued"] == 3
+
+    # At least one event is always sent
+    assert p.pumpEvents(0) == 1
+    assert received == [4, 3]
+    assert p.eventQueueStats["deferred"] == 2
+
+    assert p.pumpEvents(None) == 2
+    assert received == [4, 3, 2, 1]
+    assert p.eventQueueStats["queued"] == 0
+
+
+def test_peng_postevent_maxsize():
+    p = peng3d.Peng({"events.queue.maxsize": 1})
+
+    assert p.postEvent("test:a")
+    assert not p.postEvent("test:b")
+    assert p.eventQueueStats["dropped"] == 1
+
+
+def test_peng_threadsafe():
+    import threading
+
+    p = peng3d.Peng({"events.threadsafe.maxper": 5})
+    received = []
+    p.addEventListener("test:thread", lambda e, d: received.append(d))
+
+    def worker():
+        for i in range(10):
+            p.sendEventThreadsafe("test:thread", i)
+        p.call_soon_threadsafe(received.append, "done")
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+
+    # Nothing is called outside of the main thread
+    assert received == []
+
+    assert p.pumpThreadsafe() == 5
+    assert received == [0, 1, 2, 3, 4]
+    assert p.pumpThreadsafe(None) == 5
+    assert p.pumpThreadsafe(100) == 1
+    assert received == list(range(10)) + ["done"]
+    assert p.pumpThreadsafe() == 0
+
+
+def test_peng_eventstats():
+    p = peng3d.Peng()
+
+    class Listener(object):
+        def on_mouse_motion(self, x, y, dx, dy):
+            pass
+
+    def handler(event, data):
+        pass
+
+    l = Listener()
+    p.addPygletListener("on_mouse_motion", l.on_mouse_motion)
+    p.addEventListener("test:a", handler)
+
+    # Disabled by default
+    p.sendEvent("test:a")
+    assert p.eventStats()["events"] == {}
+
+    p.eventMetrics.enabled = True
+    p.sendEvent("test:a")
+    p.sendEvent("test:a")
+    p.sendPygletEvent("on_mouse_motion", (1, 2, 3, 4))
+
+    stats = p.eventStats(reset=True)
+    ev = stats["events"]["test:a"]
+    assert ev["count"] == 2
+    (name, h), = ev["handlers"].items()
+    assert name.endswith("handler")
+    assert h["count"] == 2
+    assert sum(h["histogram"]) == 2
+    assert len(h["histogram"]) == len(stats["buckets"]) + 1
+
+    ev = stats["events"]["on_mouse_motion"]
+    assert ev["count"] == 1
+    assert list(ev["handlers"]) == [
+        "test_peng.test_peng_eventstats.<locals>.Listener.on_mouse_motion"
+    ]
+
+    assert p.eventStats()["events"] == {}
+
+
+def test_peng_coroutine_handler():
+    import asyncio
+
+    p = peng3d.Peng()
+    received = []
+
+    async def handler(event, data):
+        await asyncio.sleep(0)
+        received.append(data)
+
+    p.addEventListener("test:async", handler)
+
+    # Coroutine handlers need a running event loop
+    with pytest.raises(RuntimeError):
+        p.sendEvent("test:async", 1)
+
+    async def main():
+        p.sendEvent("test:async", 2)
+        assert received == []
+        await asyncio.sleep(0.01)
+        assert received == [2]
+
+    asyncio.run(main())
+
+
+def test_peng_next_frame():
+    import asyncio
+
+    p = peng3d.Peng()
+    frames = []
+
+    async def waiter():
+        for i in range(2):
+            await p.next_frame()
+            frames.append(i)
+
+    async def main():
+        task = asyncio.ensure_future(waiter())
+        await asyncio.sleep(0)
+        assert frames == []
+        # Normally called by PengWindow.on_draw()
+        p._resolveFrameWaiters()
+        await asyncio.sleep(0)
+        assert frames == [0]
+        p._resolveFrameWaiters()
+        await task
+        assert frames == [0, 1]
+
+    asyncio.run(main())
+
+
+def test_peng_multiwindow(fakegl):
+    import pyglet
+    from peng3d.fakegl import HeadlessWindow
+    from peng3d.window import PengEventLoop
+
+    p = peng3d.Peng()
+    w1 = p.createWindow(HeadlessWindow)
+    rsrc = p.resourceMgr
+    w2 = p.createWindow(HeadlessWindow)
+    try:
+        assert p.windows == [w1, w2]
+        assert p.window is w1
+        # Resources are shared between all windows
+        assert p.resourceMgr is rsrc
+        assert w1.context.object_space is w2.context.object_space
+
+        w1.damageTracking = w2.damageTracking = True
+        loop = PengEventLoop()
+
+        def tick():
+            # Redraws only happen after scheduled functions have been called
+            loop.clock.schedule_once(lambda dt: None, 0)
+            n = fakegl.frameCount
+            loop.idle()
+            return fakegl.frameCount - n
+
+        # Both windows start out dirty
+        assert tick() == 2
+        assert tick() == 0
+
+        w2.markDirty()
+        assert tick() == 1
+        assert not w2._dirty
+
+        # Events queued while no window is drawn are still processed
+        received = []
+        p.addEventListener("test:multiwindow", lambda event, data: received.append(data))
+        p.postEvent("test:multiwindow", 1)
+        assert tick() == 0
+        assert received == [1]
+
+        p.markDirty()
+        assert tick() == 2
+    finally:
+        w1.close()
+        w2.close()
+
+    assert p.windows == []
+    assert p.window is None
+
+
+def test_peng_multiwindow_input(fakegl):
+    import pyglet
+    from peng3d.fakegl import HeadlessWindow
+
+    p = peng3d.Peng()
+    windows = [p.createWindow(HeadlessWindow), p.createWindow(HeadlessWindow)]
+    try:
+        actions = {}
+        for i, w in enumerate(windows):
+            menu = peng3d.GUIMenu("main", w)
+            w.addMenu(menu)
+            sub = peng3d.SubMenu("sub", menu)
+            menu.addSubMenu(sub)
+            menu.changeSubMenu("sub")
+            btn = peng3d.Button("btn", sub, pos=(10, 10), size=(100, 30), label="Btn")
+            w.changeMenu("main")
+            actions[i] = []
+            for action in ["press", "click", "hover_start"]:
+                btn.addAction(action, actions[i].append, action)
+
+        w1, w2 = windows
+        w1.dispatch_event("on_mouse_press", 20, 20, pyglet.window.mouse.LEFT, 0)
+        w1.dispatch_event("on_mouse_release", 20, 20, pyglet.window.mouse.LEFT, 0)
+        assert actions == {0: ["press", "click"], 1: []}
+
+        # Rate limited events are coalesced and dispatched per window
+        w2.dispatch_event("on_mouse_motion", 20, 20, 1, 1)
+        w1.drawFrame()
+        assert actions[0] == ["press", "click"]
+        w2.drawFrame()
+        assert actions[1] == ["hover_start"]
+    finally:
+        for w in windows:
+            w.close()
+
+
+def test_peng_multiwindow_world(fakegl):
+    import io
+    from peng3d import replay
+    from peng3d.fakegl import HeadlessWindow
+
+    p = peng3d.Peng()
+    w1 = p.createWindow(HeadlessWindow)
+    w2 = p.createWindow(HeadlessWindow)
+    try:
+        world = peng3d.StaticWorld(p, [], [])
+        world.addCamera(peng3d.Camera(world, "cam"))
+        view = peng3d.WorldViewMouseRotatable(world, "view", "cam")
+        world.addView(view)
+
+        menu = peng3d.Menu("world", w2)
+        menu.addLayer(peng3d.LayerWorld(menu, world=world, viewname="view"))
+        w2.addMenu(menu)
+        w2.changeMenu("world")
+
+        # Handlers and mouse exclusivity belong to the window showing the view
+        assert view.window is w2
+        assert w2.exclusive and not w1.exclusive
+        assert view in [h().__self__ for h in w2._event_stack[0].values()]
+        assert len(w1._event_stack) == len(w2._event_stack) - 1
+
+        # Replays may target any window
+        f = io.BytesIO()
+        replay.InputRecorder(f).record("on_mouse_motion", (10, 10, 10, 0), 0.0)
+        f.seek(0)
+        r = replay.InputReplayer(p, f, window=w2)
+        assert r.window is w2
+        rot = list(view.rot)
+        r.run()
+        assert view.rot[0] != rot[0]
+    finally:
+        w1.close()
+        w2.close()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_replay.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import io
+
+import pytest
+
+import peng3d
+from peng3d import replay
+
+
+EVENTS = [
+    (0.0, "on_mouse_motion", (10, 20, 1, -1)),
+    (0.5, "on_text", ("hällo",)),
+    (0.75, "on_mouse_scroll", (1, 2, 0.0, -1.5)),
+    (1.0, "on_draw", ()),
+    (1.25, "on_activate", ()),
+    (2.0, "on_key_press", (65, 0)),
+]
+
+
+def record(events, **kwargs):
+    f = io.BytesIO()
+    rec = replay.InputRecorder(f, **kwargs)
+    for t, event_type, args in events:
+        rec.record(event_type, args, t)
+    f.seek(0)
+    return rec, f
+
+
+def test_recorder_roundtrip():
+    rec, f = record(EVENTS)
+
+    expected = [e for e in EVENTS if e[1] != "on_draw"]
+    assert rec.recorded == len(expected)
+    assert list(replay.read_recording(f)) == expected
+
+
+def test_recorder_skip():
+    rec, f = record(
+        [(0.0, "on_custom", (object(),)), (1.0, "on_draw", (True, None))], exclude=[]
+    )
+
+    assert rec.skipped == 1
+    assert list(replay.read_recording(f)) == [(1.0, "on_draw", (True, None))]
+
+
+def test_read_invalid():
+    with pytest.raises(ValueError):
+        list(replay.read_recording(io.BytesIO(b"nope")))
+
+
+def test_replayer():
+    _, f = record(EVENTS)
+    p = peng3d.Peng()
+
+    received = []
+    p.addEventListener("pyglet:*", lambda e, d: received.append((e, tuple(d["args"]))))
+
+    r = replay.InputReplayer(p, f, frame_interval=None)
+    ticks = []
+    r.clock.schedule_interval(lambda dt: ticks.append(r.now()), 0.5)
+
+    assert r.step()
+    assert r.now() == 0.0
+    assert received == [("pyglet:on_mouse_motion", (10, 20, 1, -1))]
+
+    assert r.run() == 4
+    assert r.done
+    assert not r.step()
+    assert r.now() == 2.0
+    # Key presses additionally cause on_key_combo events
+    assert [e for e, _ in received if e != "pyglet:on_key_combo"] == [
+        "pyglet:%s" % e[1] for e in EVENTS if e[1] != "on_draw"
+    ]
+    # The virtual clock is ticked with the timestamps of the events
+    assert ticks == [0.5, 1.25, 2.0]
+
+
+def test_replayer_frames(fakewindow, fakegl):
+    import pyglet
+
+    drags = []
+
+    class DragWidget(peng3d.gui.BasicWidget):
+        def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+            drags.append((r.now(), x, y, dx, dy))
+
+    menu = peng3d.GUIMenu("main", fakewindow)
+    fakewindow.addMenu(menu)
+    sub = peng3d.SubMenu("sub", menu)
+    menu.addSubMenu(sub)
+    menu.changeSubMenu("sub")
+    DragWidget("drag", sub, pos=(0, 0), size=(100, 100))
+    fakewindow.changeMenu("main")
+
+    p = fakewindow.peng
+    steps = []
+    p.ticker.add(steps.append)
+
+    left = pyglet.window.mouse.LEFT
+    _, f = record(
+        [
+            (0.0, "on_mouse_press", (10, 10, left, 0)),
+            (0.05, "on_mouse_drag", (11, 10, 1, 0, left, 0)),
+            (0.06, "on_mouse_drag", (13, 11, 2, 1, left, 0)),
+            (0.5, "on_mouse_drag", (20, 20, 7, 9, left, 0)),
+        ]
+    )
+    r = replay.InputReplayer(p, f, frame_interval=0.05)
+
+    assert r.run() == 4
+    # Drags are coalesced and handled on the next frame, without a release
+    assert drags == [
+        (pytest.approx(0.1), 13, 11, 3, 1),
+        (pytest.approx(0.55), 20, 20, 7, 9),
+    ]
+    assert r.frames == 12
+    # The ticker follows the virtual time
+    assert len(steps) == 33
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_resource.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+import os
+import shutil
+import concurrent.futures
+
+import pytest
+import pyglet
+
+import peng3d
+import peng3d.fakegl
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+@pytest.fixture
+def rsrcpeng(request, fakegl):
+    p = peng3d.Peng({"rsrc.basepath": EXAMPLES})
+    w = p.createWindow(peng3d.fakegl.HeadlessWindow)
+    request.addfinalizer(w.close)
+    p.resourceMgr.addCategory("gui")
+    return p
+
+
+def _finishDecoding(rsrc):
+    concurrent.futures.wait(list(rsrc._texFutures.values()), timeout=10)
+
+
+def test_rsrc_async(rsrcpeng):
+    rsrc = rsrcpeng.resourceMgr
+    missing = rsrc.getTex(rsrc.missingtexturename, "gui")
+
+    loaded = []
+    out = rsrc.getTexAsync("test_gui:gui.testbtn", "gui", loaded.append)
+    assert out == missing
+    assert loaded == []
+
+    _finishDecoding(rsrc)
+    rsrcpeng.pumpThreadsafe()
+    assert rsrc.processUploads() == 1
+    assert len(loaded) == 1
+
+    tex = rsrc.getTex("test_gui:gui.testbtn", "gui")
+    assert loaded[0] == tex
+    assert tex != missing
+
+    # Already loaded textures are returned directly
+    assert rsrc.getTexAsync("test_gui:gui.testbtn", "gui", loaded.append) == tex
+    assert len(loaded) == 2
+
+
+def test_rsrc_prefetch(rsrcpeng):
+    rsrc = rsrcpeng.resourceMgr
+    missing_events = []
+    rsrcpeng.addEventListener(
+        "peng3d:rsrc.missing.tex", lambda event, data: missing_events.append(data)
+    )
+
+    rsrc.prefetch("test_gui:gui.testbtn-hover", "gui")
+    rsrc.prefetch("test_gui:gui.doesnotexist", "gui")
+
+    # Synchronous access waits for the background decode
+    tex = rsrc.getTex("test_gui:gui.testbtn-hover", "gui")
+    assert rsrc.getTexSize("test_gui:gui.testbtn-hover", "gui") != (1, 1)
+
+    _finishDecoding(rsrc)
+    rsrcpeng.pumpThreadsafe()
+    # Both are processed even without a budget, the hover texture just isn't uploaded twice
+    assert rsrc.processUploads(budget=0) == 1
+    assert rsrc.processUploads(budget=0) == 1
+    assert rsrc.processUploads() == 0
+
+    assert rsrc.getTex("test_gui:gui.testbtn-hover", "gui") == tex
+    assert len(missing_events) == 1
+
+
+def test_rsrc_corrupt(request, fakegl, tmp_path):
+    path = os.path.join(str(tmp_path), "assets", "test", "textures")
+    os.makedirs(path)
+    with open(os.path.join(path, "corrupt.png"), "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\nnot really a png")
+
+    p = peng3d.Peng({"rsrc.basepath": str(tmp_path)})
+    w = p.createWindow(peng3d.fakegl.HeadlessWindow)
+    request.addfinalizer(w.close)
+    rsrc = p.resourceMgr
+    rsrc.addCategory("gui")
+    missing_events = []
+    p.addEventListener(
+        "peng3d:rsrc.missing.tex", lambda event, data: missing_events.append(data)
+    )
+
+    # Decoder errors in a worker must not propagate into the frame loop
+    rsrc.prefetch("test:corrupt", "gui")
+    _finishDecoding(rsrc)
+    p.pumpThreadsafe()
+    assert rsrc.processUploads() == 1
+
+    assert missing_events == [{"cat": "gui", "name": "test:corrupt"}]
+    # No missing texture file exists, so an in-memory one is used
+    assert rsrc.getTexSize("test:corrupt", "gui") == (1, 1)
+
+
+def test_rsrc_async_errors(rsrcpeng):
+    rsrc = rsrcpeng.resourceMgr
+    missing_events = []
+    rsrcpeng.addEventListener(
+        "peng3d:rsrc.missing.tex",
+        lambda event, data: missing_events.append(data["name"]),
+    )
+
+    decodeTex = rsrc._decodeTex
+
+    def decode(name):
+        if name == "test_gui:gui.testbtn":
+            raise RuntimeError("decoder crashed")
+        return decodeTex(name)
+
+    loaded = []
+    rsrc._decodeTex = decode
+    rsrc.getTexAsync("test_gui:gui.testbtn", "gui", loaded.append)
+    _finishDecoding(rsrc)
+    rsrc._decodeTex = decodeTex
+    rsrcpeng.pumpThreadsafe()
+
+    # The error is reported, but the callbacks are still called
+    assert rsrc.processUploads() == 1
+    assert missing_events == ["test_gui:gui.testbtn"]
+    assert loaded == [rsrc.getTex("test_gui:gui.testbtn", "gui")]
+
+    # Categories may be reset while a texture is decoded
+    rsrc.getTexAsync("test_gui:gui.testbtn-hover", "gui", loaded.append)
+    _finishDecoding(rsrc)
+    rsrc.getTex("test_gui:gui.testbtn-hover", "gui")
+    rsrc.addCategory("gui")
+    rsrcpeng.pumpThreadsafe()
+    assert rsrc.processUploads() == 1
+    assert loaded[-1] == rsrc.getTex("test_gui:gui.testbtn-hover", "gui")
+
+
+def test_rsrc_mipmaps(rsrcpeng, fakegl):
+    rsrc = rsrcpeng.resourceMgr
+    rsrc.flushMipmaps()
+    fakegl.calls.clear()
+    before = rsrc.mipmapStats()
+
+    for name in ["testbtn", "testbtn-hover", "testbtn-pressed"]:
+        rsrc.getTex("test_gui:gui.%s" % name, "gui")
+    assert fakegl.calls["glGenerateMipmap"] == 0
+
+    stats = rsrc.mipmapStats()
+    assert stats["requested"] - before["requested"] == 3
+    assert stats["pending"] == 1
+
+    # Only a single regeneration for the shared atlas
+    assert rsrc.flushMipmaps() == 1
+    assert fakegl.calls["glGenerateMipmap"] == 1
+    assert rsrc.flushMipmaps() == 0
+
+    stats = rsrc.mipmapStats()
+    assert stats["pending"] == 0
+    assert stats["avoided"] - before["avoided"] == 2
+
+
+def _cachepeng(request, basepath):
+    p = peng3d.Peng(
+        {
+            "rsrc.basepath": basepath,
+            "rsrc.maxtexsize": 256,
+            "rsrc.atlascache.path": os.path.join(basepath, "cache"),
+        }
+    )
+    w = p.createWindow(peng3d.fakegl.HeadlessWindow)
+    request.addfinalizer(w.close)
+    p.resourceMgr.addCategory("gui")
+    return p
+
+
+def test_rsrc_atlascache(request, fakegl, tmp_path):
+    shutil.copytree(
+        os.path.join(EXAMPLES, "assets", "test_gui"),
+        os.path.join(str(tmp_path), "assets", "test_gui"),
+    )
+    names = ["test_gui:gui.%s" % n for n in ["testbtn", "testbtn-hover"]]
+
+    p = _cachepeng(request, str(tmp_path))
+    for name in names:
+        p.resourceMgr.getTex(name, "gui")
+    # The cache is written when the last window is closed, while its context is alive
+    w = p.window
+    saves = []
+    save = p.resourceMgr.saveAtlasCache
+    p.resourceMgr.saveAtlasCache = lambda category: saves.append(
+        pyglet.gl.current_context is w.context and w.context is not None
+    ) or save(category)
+    w.close()
+    assert saves == [True]
+    assert os.path.exists(os.path.join(str(tmp_path), "cache", "gui.json"))
+    assert os.path.exists(os.path.join(str(tmp_path), "cache", "gui.0.png"))
+
+    p = _cachepeng(request, str(tmp_path))
+    rsrc = p.resourceMgr
+    decoded = []
+    decode = rsrc._decodeTex
+    rsrc._decodeTex = lambda name: decoded.append(name) or decode(name)
+
+    tex = [rsrc.getTex(name, "gui") for name in names]
+    assert decoded == []
+    assert rsrc.getTexSize(names[1], "gui") == (100, 100)
+    assert tex[0][1] == tex[1][1]
+    assert tex[0][2] != tex[1][2]
+    # Uploading the cached atlas is not counted as a mipmap request
+    assert rsrc.mipmapStats()["requested"] == 0
+    assert rsrc.mipmapStats()["pending"] == 0
+
+    # Textures not in the cache are added to the free space of the cached atlas
+    new = rsrc.getTex("test_gui:gui.testbtn-pressed", "gui")
+    assert decoded == ["test_gui:gui.testbtn-pressed"]
+    assert new[1] == tex[0][1]
+    assert new[2] not in (tex[0][2], tex[1][2])
+    assert rsrc.mipmapStats()["requested"] == 1
+    assert rsrc.flushMipmaps() == 1
+    assert rsrc.mipmapStats()["avoided"] == 0
+
+    # Pages of previous caches are removed
+    stale = os.path.join(str(tmp_path), "cache", "gui.1.png")
+    shutil.copy(os.path.join(str(tmp_path), "cache", "gui.0.png"), stale)
+    assert rsrc.saveAtlasCache("gui")
+    assert not os.path.exists(stale)
+    assert os.path.exists(os.path.join(str(tmp_path), "cache", "gui.0.png"))
+    p.window.close()
+
+    # Changing any source file invalidates the cache
+    path = os.path.join(str(tmp_path), "assets", "test_gui", "gui", "testbtn.png")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    p = _cachepeng(request, str(tmp_path))
+    assert not p.resourceMgr.loadAtlasCache("gui")
+    assert p.resourceMgr.categoriesTexCache["gui"] == {}
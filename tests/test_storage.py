@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_storage.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+import os
+import shutil
+
+import pytest
+
+import peng3d
+import peng3d.fakegl
+from peng3d.storage import (
+    ArchiveStorage,
+    FileStorage,
+    OverlayStorage,
+    packArchive,
+    main,
+)
+
+ASSETS = os.path.join(os.path.dirname(__file__), "..", "examples", "assets")
+
+
+@pytest.fixture
+def archive(tmp_path):
+    fname = os.path.join(str(tmp_path), "assets.p3da")
+    packArchive(ASSETS, fname)
+    storage = ArchiveStorage(fname)
+    yield storage
+    storage.close()
+
+
+def test_storage_archive(archive):
+    files = FileStorage(ASSETS)
+
+    key = "test_gui/gui/testbtn.png"
+    assert archive.exists(key)
+    assert not archive.exists("test_gui/gui/doesnotexist.png")
+    assert archive.read(key) == files.read(key)
+    with archive.open(key) as f:
+        assert f.read() == files.read(key)
+    with pytest.raises(FileNotFoundError):
+        archive.read("test_gui/gui/doesnotexist.png")
+
+    assert archive.glob("i18n/lang/*.lang") == [
+        "i18n/lang/de.lang",
+        "i18n/lang/en.lang",
+    ]
+    assert archive.glob("*/gui/*.png") == files.glob("*/gui/*.png")
+    # Wildcards do not match across directories
+    assert archive.glob("*.png") == []
+
+    assert archive.fingerprint(key)[1] == len(files.read(key))
+    assert archive.verify() == []
+
+
+def test_storage_archive_corrupt(tmp_path, archive):
+    offset, length, crc = archive.index["test_gui/gui/testbtn.png"]
+    fname = os.path.join(str(tmp_path), "corrupt.p3da")
+    with open(archive.filename, "rb") as f:
+        data = bytearray(f.read())
+    data[offset] ^= 0xFF
+    with open(fname, "wb") as f:
+        f.write(data)
+
+    corrupt = ArchiveStorage(fname)
+    assert corrupt.verify() == ["test_gui/gui/testbtn.png"]
+    corrupt.close()
+
+    with open(fname, "wb") as f:
+        f.write(b"not an archive at all")
+    with pytest.raises(ValueError):
+        ArchiveStorage(fname)
+
+
+def test_storage_cli(tmp_path, capsys):
+    fname = os.path.join(str(tmp_path), "cli.p3da")
+    assert main(["pack", ASSETS, fname]) == 0
+    assert main(["list", fname]) == 0
+    assert "test_gui/gui/testbtn.png" in capsys.readouterr().out
+    assert main(["verify", fname]) == 0
+
+
+def test_storage_rsrc(request, fakegl, archive):
+    p = peng3d.Peng(
+        {
+            "rsrc.basepath": os.path.dirname(archive.filename),
+            "rsrc.archive": "assets.p3da",
+        }
+    )
+    w = p.createWindow(peng3d.fakegl.HeadlessWindow)
+    request.addfinalizer(w.close)
+    rsrc = p.resourceMgr
+    assert isinstance(rsrc.storage, ArchiveStorage)
+
+    missing = []
+    p.addEventListener(
+        "peng3d:rsrc.missing.tex", lambda event, data: missing.append(data)
+    )
+    rsrc.addCategory("gui")
+    rsrc.getTex("test_gui:gui.testbtn", "gui")
+    assert missing == []
+    assert rsrc.getTexSize("test_gui:gui.testbtn", "gui") == (100, 100)
+
+    assert sorted(p.i18n.discoverLangs("i18n")) == ["de", "en"]
+    assert p.i18n.loadDomain("i18n", "en")
+
+
+def _write(root, key, data=b"data"):
+    path = os.path.join(root, *key.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    _touch(os.path.dirname(path))
+
+
+def _touch(path):
+    # Guarantees a new modification time even on coarse-grained file systems
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_storage_index(tmp_path):
+    root = str(tmp_path)
+    _write(root, "app/a.png")
+    _write(root, "app/sub/b.png")
+
+    storage = FileStorage(root, index=True)
+    assert storage.indexed
+    assert storage.keys() == {"app/a.png", "app/sub/b.png"}
+    assert storage.glob("app/*.png") == ["app/a.png"]
+
+    # Not visible until refreshed
+    _write(root, "app/sub/new/c.png")
+    os.remove(os.path.join(root, "app", "a.png"))
+    _touch(os.path.join(root, "app"))
+    assert storage.exists("app/a.png")
+    assert not storage.exists("app/sub/new/c.png")
+
+    assert storage.refresh() == {"app/a.png", "app/sub/new/c.png"}
+    assert storage.keys() == {"app/sub/b.png", "app/sub/new/c.png"}
+    assert storage.refresh() == set()
+
+    shutil.rmtree(os.path.join(root, "app", "sub"))
+    _touch(os.path.join(root, "app"))
+    assert storage.refresh() == {"app/sub/b.png", "app/sub/new/c.png"}
+    assert storage.keys() == set()
+
+
+def test_storage_overlay(tmp_path):
+    base = os.path.join(str(tmp_path), "base")
+    mod = os.path.join(str(tmp_path), "mod")
+    _write(base, "app/a.png", b"base")
+    _write(base, "app/b.png", b"base")
+    _write(mod, "app/a.png", b"mod")
+
+    overlay = OverlayStorage([FileStorage(mod), FileStorage(base)])
+    assert overlay.read("app/a.png") == b"mod"
+    assert overlay.read("app/b.png") == b"base"
+    assert overlay.glob("app/*") == ["app/a.png", "app/b.png"]
+    assert overlay.path("app/a.png") == os.path.join(mod, "app", "a.png")
+    assert overlay.fingerprint("app/a.png")[0] == 0
+    assert overlay.fingerprint("app/b.png")[0] == 1
+    with pytest.raises(FileNotFoundError):
+        overlay.read("app/c.png")
+
+    # Removing an override falls back to the base file
+    os.remove(os.path.join(mod, "app", "a.png"))
+    _write(mod, "app/c.png", b"mod")
+    assert overlay.refresh() == {"app/a.png", "app/c.png"}
+    assert overlay.read("app/a.png") == b"base"
+    assert overlay.read("app/c.png") == b"mod"
+
+
+def test_storage_rsrc_roots(request, fakegl, tmp_path):
+    basepath = str(tmp_path)
+    shutil.copytree(ASSETS, os.path.join(basepath, "assets"))
+    _write(os.path.join(basepath, "mod1"), "i18n/lang/fr.lang", b"foo=bar\n")
+    _write(os.path.join(basepath, "mod2"), "i18n/lang/en.lang", b"foo=baz\n")
+
+    p = peng3d.Peng({"rsrc.basepath": basepath, "rsrc.roots": ["mod1"]})
+    w = p.createWindow(peng3d.fakegl.HeadlessWindow)
+    request.addfinalizer(w.close)
+    rsrc = p.resourceMgr
+
+    assert isinstance(rsrc.storage, OverlayStorage)
+    assert sorted(p.i18n.discoverLangs("i18n")) == ["de", "en", "fr"]
+    assert rsrc.resourceExists("test_gui:gui.testbtn", ".png")
+    assert rsrc.resourceNameToPath("i18n:lang.fr", ".lang") == os.path.join(
+        basepath, "mod1", "i18n", "lang", "fr.lang"
+    )
+
+    # Only the first colon separates the domain
+    assert rsrc.resourceNameToKey("i18n:lang:fr.x", ".lang") == "i18n/lang:fr/x.lang"
+    assert rsrc.resourceNameToPath("i18n:lang:fr.x", ".lang") == os.path.join(
+        basepath, "assets", "i18n", "lang:fr", "x.lang"
+    )
+
+    rsrc.addResourceRoot("mod2")
+    assert p.i18n.loadDomain("i18n", "en")
+    assert p.i18n.t("i18n:foo", lang="en") == "baz"
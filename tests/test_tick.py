@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_tick.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+
+import pytest
+
+import peng3d
+from peng3d.tick import TickScheduler
+
+
+def test_tick_fixed_steps():
+    ticker = TickScheduler(rate=10.0, maxsteps=5)
+    ticker.stop()
+
+    dts = []
+    ticker.add(dts.append)
+
+    assert ticker.tick(0.05) == 0
+    assert ticker.alpha == pytest.approx(0.5)
+
+    assert ticker.tick(0.2) == 2
+    assert dts == [pytest.approx(0.1)] * 2
+    assert ticker.ticks == 2
+    assert ticker.alpha == pytest.approx(0.5)
+
+
+def test_tick_catchup_limit():
+    ticker = TickScheduler(rate=10.0, maxsteps=3)
+    ticker.stop()
+
+    calls = []
+    ticker.add(calls.append)
+
+    assert ticker.tick(1.0) == 3
+    assert len(calls) == 3
+    assert ticker.dropped == pytest.approx(0.7)
+    assert 0.0 <= ticker.alpha < 1.0
+
+
+def test_tick_order_and_remove():
+    ticker = TickScheduler(rate=10.0)
+    ticker.stop()
+
+    order = []
+    ticker.add(lambda dt: order.append("b"), name="b")
+    ticker.add(lambda dt: order.append("late"), priority=10, name="late")
+    first = ticker.add(lambda dt: order.append("a"), priority=-1, name="a")
+    ticker.add(lambda dt: order.append("c"), name="c")
+
+    ticker.tick(0.1)
+    assert order == ["a", "b", "c", "late"]
+
+    # Systems may remove other systems while running
+    def remover(dt):
+        order.append("r")
+        first.remove()
+
+    ticker.add(remover, priority=-2)
+    del order[:]
+    ticker.tick(0.1)
+    assert order == ["r", "b", "c", "late"]
+    assert not first.remove()
+    assert ticker.remove(remover)
+    assert len(ticker) == 3
+
+    assert ticker.stats()["b"][0] == 2
+
+
+def test_tick_interval():
+    ticker = TickScheduler(rate=60.0)
+    ticker.stop()
+
+    dts = []
+    ticker.add(dts.append, interval=0.5)
+
+    for _ in range(60):
+        ticker.tick(1 / 60.0)
+    assert len(dts) == 2
+    assert dts[0] == pytest.approx(0.5)
+
+    with pytest.raises(ValueError):
+        ticker.add(dts.append, interval=0)
+
+
+def test_peng_ticker():
+    peng = peng3d.Peng({"simulation.tickrate": 30.0, "simulation.maxsteps": 2})
+    assert peng.ticker.rate == pytest.approx(30.0)
+    assert peng.ticker.maxsteps == 2
+
+    peng.profiler.enabled = True
+    peng.profiler.beginFrame()
+    peng.ticker.add(lambda dt: None)
+    peng.ticker.tick(1 / 30.0)
+    peng.profiler.endFrame()
+    peng.ticker.stop()
+
+    assert "tick" in peng.profiler.frames()[-1]["phases"]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_tracing.py
+#
+#  Copyright 2022 notna <notna@apparat.org>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import io
+import json
+
+import peng3d
+
+
+def test_tracer_events():
+    tracer = peng3d.tracing.Tracer(True)
+
+    t = tracer.now()
+    tracer.complete("a", t, "test", {"x": 1})
+    tracer.instant("b")
+    tracer.counter("c", {"v": 2})
+
+    evs = tracer.events()
+    assert [e["ph"] for e in evs] == ["X", "i", "C"]
+    assert evs[0]["name"] == "a"
+    assert evs[0]["cat"] == "test"
+    assert evs[0]["args"] == {"x": 1}
+    assert evs[0]["dur"] >= 0
+    assert "dur" not in evs[1]
+    assert evs[2]["args"] == {"v": 2}
+
+
+def test_tracer_ringbuffer():
+    tracer = peng3d.tracing.Tracer(True, maxsize=3)
+
+    for i in range(5):
+        tracer.instant("ev%d" % i)
+
+    assert len(tracer) == 3
+    assert [e["name"] for e in tracer.events()] == ["ev2", "ev3", "ev4"]
+
+    tracer.clear()
+    assert len(tracer) == 0
+
+
+def test_tracer_dump():
+    tracer = peng3d.tracing.Tracer(True)
+    tracer.instant("a")
+
+    f = io.StringIO()
+    tracer.dump(f)
+    data = json.loads(f.getvalue())
+    assert len(data["traceEvents"]) == 1
+    assert data["traceEvents"][0]["name"] == "a"
+
+
+def test_peng_tracer():
+    p = peng3d.Peng()
+    assert not p.tracer.enabled
+
+    p = peng3d.Peng({"debug.trace.enable": True, "debug.trace.maxsize": 10})
+    assert p.tracer.enabled
+    assert p.tracer.maxsize == 10
+
+    p._pumpRateLimitedEvents()
+    assert [e["name"] for e in p.tracer.events()] == ["Peng._pumpRateLimitedEvents"]
+
+
+def test_profiler_frames():
+    profiler = peng3d.tracing.FrameProfiler(True, maxframes=3)
+
+    for i in range(5):
+        profiler.beginFrame()
+        t = profiler.now()
+        t = profiler.add("a", t)
+        profiler.add("b", t)
+        profiler.add("b", t)
+        profiler.endFrame()
+
+    assert len(profiler) == 3
+    frames = profiler.frames()
+    assert len(frames) == 3
+    for frame in frames:
+        assert set(frame["phases"]) == {"a", "b"}
+        assert frame["time"] >= frame["phases"]["a"]
+    assert profiler.frameTimes() == [f["time"] for f in frames]
+
+    avg = profiler.averages()
+    assert set(avg) == {"frame", "a", "b"}
+
+    # Discarded frames and phases outside of frames are ignored
+    profiler.beginFrame()
+    profiler.endFrame(keep=False)
+    profiler.add("c", profiler.now())
+    assert len(profiler) == 3
+    assert "c" not in profiler.averages()
+
+    profiler.reset()
+    assert len(profiler) == 0
+    assert profiler.averages() == {}
+
+
+def test_profiler_widgets():
+    profiler = peng3d.tracing.FrameProfiler(True)
+
+    profiler.addWidget("fast", profiler.now())
+    profiler.addWidget("slow", profiler.now() - 1.0)
+    profiler.addWidget("slow", profiler.now() - 0.5)
+
+    slowest = profiler.slowestWidgets(1)
+    assert len(slowest) == 1
+    name, count, total, tmax = slowest[0]
+    assert name == "slow"
+    assert count == 2
+    assert total >= 1.5
+    assert tmax >= 1.0
+
+    assert [w[0] for w in profiler.slowestWidgets()] == ["slow", "fast"]
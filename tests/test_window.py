@@ -50,4 +50,86 @@ def test_window_menu(window):
     assert window.menu is menu
 
 
+def test_window_damage(fakewindow):
+    window = fakewindow
+    window.damageTracking = True
+
+    window.markDirty()
+    window.on_draw()
+    assert not window._dirty
+    assert not window._skipFlip
+
+    # Nothing changed, so neither drawing nor flipping should happen
+    window.on_draw()
+    assert window._skipFlip
+    window.flip()
+    assert not window._skipFlip
+
+    # Worlds only mark the windows showing them dirty
+    world = peng3d.World(window.peng)
+    cam = peng3d.Camera(world, "cam")
+    world.addCamera(cam)
+    world.addView(peng3d.WorldView(world, "view", "cam"))
+    cam.pos = [0, 0, 1]
+    assert not window._dirty
+
+    menu = peng3d.Menu("main", window)
+    menu.addLayer(peng3d.LayerWorld(menu, world=world, viewname="view"))
+    window.on_draw()
+    cam.pos = [0, 0, 2]
+    assert window._dirty
+
+    # Actors and cameras without a world can still be moved
+    peng3d.Camera(None, "cam").pos = [0, 0, 1]
+
+
+def test_window_glstate(fakewindow):
+    window = fakewindow
+    gl = window.glstate
+    assert gl.enabled
+
+    gl.newFrame()
+    window.set2d()
+    calls, skipped = gl.calls, gl.skipped
+
+    # Nothing changed, so no calls should be issued
+    window.set2d()
+    assert gl.calls == calls
+    assert gl.skipped > skipped
+
+    gl.invalidate()
+    window.set2d()
+    assert gl.calls == 2 * calls
+
+    gl.newFrame()
+    assert gl.stats["calls"] == 2 * calls
+    assert gl.calls == 0
+
+
+def test_framepacer():
+    from peng3d.window import FramePacer
+
+    pacer = FramePacer(10)
+    assert pacer.interval == 0.1
+
+    # Timestamps are arbitrary, since the pacer only uses the values given to it
+    pacer.begin(100.0)
+    pacer.end(100.02)
+    assert pacer.deadline == pytest.approx(100.1)
+    assert pacer.cost == pytest.approx(0.002)
+    assert not pacer.ready(100.05)
+    assert pacer.ready(100.098)
+    assert pacer.delay(100.05) == pytest.approx(0.048)
+
+    # Frame took longer than one interval
+    pacer.begin(100.1)
+    pacer.end(100.35)
+    assert pacer.missed == 1
+    assert pacer.deadline == pytest.approx(100.45)
+    assert pacer.stats["frames"] == 2
+
+    with pytest.raises(ValueError):
+        FramePacer(0)
+
+
 # TODO: add graphic tests